@@ -0,0 +1,155 @@
+"""
+In-memory audio buffers shared by audio input, speech-to-text and text-to-speech.
+
+An AudioBuffer wraps a numpy sample array (int16 by default) plus its sample
+rate, so audio flows from the microphone to Whisper and from Coqui to the
+speaker without touching the filesystem. WAV files are only written when
+`audio_debug_dump: true` is set in `config/config.yaml`.
+"""
+
+import io
+import struct
+import config_loader
+import numpy as np
+
+
+CFG = config_loader.load()
+
+# Granularity at which playback notices a cancellation (barge-in).
+PLAYBACK_BLOCK_SECONDS = 0.05
+
+_WAVE_FORMAT_PCM = 1
+_WAVE_FORMAT_IEEE_FLOAT = 3
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class AudioBuffer:
+	"""
+	PCM samples with sample-rate metadata.
+	Args:
+		samples: numpy array of shape (frames,) or (frames, channels), or raw
+			little-endian int16 bytes / memoryview (wrapped without copying).
+		sample_rate (int): Samples per second.
+	"""
+
+	__slots__ = ("samples", "sample_rate")
+
+	def __init__(self, samples, sample_rate: int = 16000):
+		if not isinstance(samples, np.ndarray):
+			samples = np.frombuffer(samples, dtype="<i2")
+		self.samples = samples
+		self.sample_rate = int(sample_rate)
+
+	def __len__(self):
+		return len(self.samples)
+
+	def __repr__(self):
+		return f"AudioBuffer(frames={len(self)}, channels={self.channels}, sample_rate={self.sample_rate}, dtype={self.samples.dtype})"
+
+	@property
+	def channels(self) -> int:
+		return 1 if self.samples.ndim == 1 else self.samples.shape[1]
+
+	@property
+	def duration(self) -> float:
+		return len(self.samples) / float(self.sample_rate) if self.sample_rate else 0.0
+
+	def mono(self) -> "AudioBuffer":
+		"""Return a 1-D view (first channel) without copying when already mono."""
+		if self.samples.ndim == 1:
+			return self
+		return AudioBuffer(self.samples[:, 0], self.sample_rate)
+
+	def memoryview(self) -> memoryview:
+		"""Zero-copy view of the raw sample bytes."""
+		return memoryview(np.ascontiguousarray(self.samples)).cast("B")
+
+	def to_wav_bytes(self) -> bytes:
+		"""Encode as a WAV file in memory (16-bit PCM for int16 samples, float otherwise)."""
+		samples = np.ascontiguousarray(self.samples)
+		if samples.dtype == np.int16:
+			fmt, width = _WAVE_FORMAT_PCM, 2
+			samples = samples.astype("<i2", copy=False)
+		else:
+			fmt, width = _WAVE_FORMAT_IEEE_FLOAT, 4
+			samples = samples.astype("<f4", copy=False)
+		data = memoryview(samples).cast("B")
+		channels = self.channels
+		header = struct.pack(
+			"<4sI4s4sIHHIIHH4sI",
+			b"RIFF", 36 + data.nbytes, b"WAVE",
+			b"fmt ", 16, fmt, channels, self.sample_rate,
+			self.sample_rate * channels * width, channels * width, width * 8,
+			b"data", data.nbytes,
+		)
+		return b"".join((header, data))
+
+	@classmethod
+	def from_wav_bytes(cls, data) -> "AudioBuffer":
+		"""
+		Decode WAV data from bytes, a memoryview or an mmap.
+		16-bit PCM and 32-bit float samples are wrapped in place without copying;
+		other encodings fall back to scipy's WAV reader.
+		"""
+		view = memoryview(data)
+		if view.nbytes < 12 or bytes(view[0:4]) != b"RIFF" or bytes(view[8:12]) != b"WAVE":
+			raise ValueError("Not a RIFF/WAVE buffer")
+		pos, fmt = 12, None
+		while pos + 8 <= view.nbytes:
+			chunk_id = bytes(view[pos:pos + 4])
+			size = struct.unpack_from("<I", view, pos + 4)[0]
+			body = pos + 8
+			if chunk_id == b"fmt ":
+				fmt = list(struct.unpack_from("<HHIIHH", view, body))
+				if fmt[0] == _WAVE_FORMAT_EXTENSIBLE and size >= 40:
+					# The real format code leads the SubFormat GUID.
+					fmt[0] = struct.unpack_from("<H", view, body + 24)[0]
+			elif chunk_id == b"data" and fmt is not None:
+				# Streaming encoders may leave the size unset; clamp to what we have.
+				end = min(body + size, view.nbytes)
+				audio_format, channels, rate, _, _, bits = fmt
+				dtype = {(_WAVE_FORMAT_PCM, 16): "<i2", (_WAVE_FORMAT_IEEE_FLOAT, 32): "<f4"}.get((audio_format, bits))
+				if dtype is None:
+					break
+				width = np.dtype(dtype).itemsize * channels
+				frames = (end - body) // width
+				samples = np.frombuffer(view, dtype=dtype, count=frames * channels, offset=body)
+				if channels > 1:
+					samples = samples.reshape(-1, channels)
+				return cls(samples, rate)
+			pos = body + size + (size & 1)
+		from scipy.io import wavfile
+		rate, samples = wavfile.read(io.BytesIO(bytes(view)))
+		return cls(samples, rate)
+
+	def dump(self, path: str):
+		"""Write the buffer to a WAV file."""
+		with open(path, "wb") as f:
+			f.write(self.to_wav_bytes())
+
+
+def debug_dump(buffer: AudioBuffer, path: str):
+	"""Write `buffer` to `path` only when `audio_debug_dump` is enabled."""
+	if not path or not CFG.get("audio_debug_dump", False):
+		return
+	try:
+		buffer.dump(path)
+		print(f"Audio saved to {path}")
+	except Exception as e:
+		print("Audio debug dump error:", e)
+
+
+def play(buffer: AudioBuffer, cancel=None):
+	"""
+	Play a buffer on a dedicated output stream (so it can overlap with recording)
+	in short blocks, stopping early when the `cancel` event is set.
+	"""
+	import sounddevice as sd
+	samples = buffer.samples
+	block = max(1, int(buffer.sample_rate * PLAYBACK_BLOCK_SECONDS))
+	with sd.OutputStream(samplerate=buffer.sample_rate, channels=buffer.channels, dtype=samples.dtype) as stream:
+		for start in range(0, len(samples), block):
+			if cancel is not None and cancel.is_set():
+				stream.abort()
+				return
+			stream.write(samples[start:start + block])
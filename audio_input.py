@@ -1,21 +1,120 @@
 """
 Handles microphone input and audio recording for Nova.
+
+sounddevice (and with it PortAudio) is imported on the first recording, not
+when the module is imported, so it does not delay startup.
 """
 
-import sounddevice as sd
+import queue
+import time
+import config_loader
 import numpy as np
-from scipy.io.wavfile import write
+from audio_buffer import AudioBuffer, debug_dump
+import metrics
+from vad import Endpointer, VoiceActivityDetector
+
+
+CFG = config_loader.load()
+
 
-def record_audio(filename: str, duration: int = 5, fs: int = 16000):
+def record_audio(filename: str = None, duration: int = 5, fs: int = 16000) -> AudioBuffer:
 	"""
-	Records audio from the default microphone and saves as a WAV file.
+	Records audio from the default microphone into memory.
 	Args:
-		filename (str): Path to save the recorded audio.
+		filename (str): Optional path; the recording is only written there when
+			`audio_debug_dump` is enabled in config.
 		duration (int): Duration in seconds.
 		fs (int): Sample rate.
+	Returns:
+		AudioBuffer: Mono int16 samples.
 	"""
+	import sounddevice as sd
 	print(f"Recording for {duration} seconds...")
 	audio = sd.rec(int(duration * fs), samplerate=fs, channels=1, dtype='int16')
 	sd.wait()
-	write(filename, fs, audio)
-	print(f"Audio saved to {filename}")
+	buffer = AudioBuffer(np.reshape(audio, -1), fs)
+	debug_dump(buffer, filename)
+	return buffer
+
+
+def make_endpointer(fs: int = 16000, energy_threshold: float = None) -> Endpointer:
+	"""
+	Build an Endpointer from the `vad_*` settings in config/config.yaml.
+	`energy_threshold` overrides `vad_energy_threshold` (e.g. while Nova is speaking).
+	"""
+	if energy_threshold is None:
+		energy_threshold = float(CFG.get("vad_energy_threshold", 0.02))
+	detector = VoiceActivityDetector(
+		energy_threshold=energy_threshold,
+		zcr_threshold=float(CFG.get("vad_zcr_threshold", 0.25)),
+		noise_ratio=float(CFG.get("vad_noise_ratio", 3.0)),
+	)
+	return Endpointer(
+		sample_rate=fs,
+		frame_ms=int(CFG.get("vad_frame_ms", 30)),
+		onset_ms=int(CFG.get("vad_onset_ms", 90)),
+		trailing_silence_ms=int(CFG.get("vad_trailing_silence_ms", 700)),
+		pre_roll_ms=int(CFG.get("vad_pre_roll_ms", 300)),
+		keep_silence_ms=int(CFG.get("vad_keep_silence_ms", 150)),
+		max_duration=float(CFG.get("vad_max_duration", 15.0)),
+		detector=detector,
+	)
+
+
+def record_until_silence(filename: str = None, fs: int = 16000, listen_timeout: float = None, on_audio=None, stop_event=None, energy_threshold: float = None):
+	"""
+	Streams audio from the default microphone and returns one utterance,
+	trimmed to the detected speech (see vad.Endpointer).
+	Args:
+		filename (str): Optional debug dump path (only written when `audio_debug_dump` is enabled).
+		fs (int): Sample rate.
+		listen_timeout (float): Give up if no speech starts within this many
+			seconds (`vad_listen_timeout`, default 10). Returns None then.
+		on_audio (callable): Optional; called with each chunk of int16 samples
+			from speech onset onwards, as it arrives.
+		stop_event (threading.Event): Optional; aborts the capture when set.
+		energy_threshold (float): Optional speech onset energy, overriding `vad_energy_threshold`.
+	Returns:
+		AudioBuffer or None: The utterance, or None if nobody spoke.
+	"""
+	import sounddevice as sd
+	if listen_timeout is None:
+		listen_timeout = float(CFG.get("vad_listen_timeout", 10.0))
+	endpointer = make_endpointer(fs, energy_threshold)
+	chunks = queue.Queue()
+
+	def _callback(indata, frames, time_info, status):
+		# Runs on the PortAudio thread: copy the block out and return immediately.
+		chunks.put(indata[:, 0].copy())
+
+	blocksize = endpointer.frame_len * int(CFG.get("vad_block_frames", 2))
+	deadline = time.monotonic() + listen_timeout
+	# Time spent in the endpointer itself (the rest of the capture is waiting for audio)
+	vad_started = time.perf_counter()
+	vad_seconds = 0.0
+	vad_chunks = 0
+	with sd.InputStream(samplerate=fs, channels=1, dtype="int16", blocksize=blocksize, callback=_callback):
+		while True:
+			if stop_event is not None and stop_event.is_set():
+				return None
+			if not endpointer.started and time.monotonic() > deadline:
+				return None
+			try:
+				chunk = chunks.get(timeout=0.1)
+			except queue.Empty:
+				continue
+			was_started = endpointer.started
+			t0 = time.perf_counter()
+			finished = endpointer.feed(chunk)
+			vad_seconds += time.perf_counter() - t0
+			vad_chunks += 1
+			if on_audio is not None and endpointer.started:
+				# On onset, hand over everything captured so far (pre-roll included).
+				on_audio(chunk if was_started else endpointer.audio().copy())
+			if finished:
+				break
+	metrics.record_span("vad", vad_started, vad_seconds, chunks=vad_chunks)
+	buffer = AudioBuffer(endpointer.audio().copy(), fs)
+	print(f"Captured {buffer.duration:.1f}s utterance.")
+	debug_dump(buffer, filename)
+	return buffer
@@ -0,0 +1,4 @@
+"""
+Latency benchmarks for Nova: turns against local stand-in backends (turn_latency.py) and
+startup imports (import_time.py).
+"""
@@ -0,0 +1,442 @@
+"""
+Local stand-ins for Nova's backends and audio devices, used by the benchmarks.
+
+FakeOllama streams NDJSON replies at a set number of tokens per second after
+a prefill delay. FakeCoqui returns synthetic WAVs after a delay proportional
+to the audio length. FakeWhisper answers /inference with the transcript of
+the utterance last played into the fake microphone, and
+write_whisper_binary() creates a whisper.cpp stand-in for the subprocess
+backend.
+
+FakeAudioDevices replaces the `sounddevice` module. An InputStream delivers
+background noise to the stream callback in real time. Like a user, it only
+speaks the next synthetic utterance once the previous turn is over.
+OutputStream.write() sleeps for as long as its samples would take to play,
+or `playback_speedup` times less. The devices note when each
+utterance's speech ended and when the reply's first samples reached the
+speaker.
+"""
+
+import json
+import os
+import random
+import stat
+import sys
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from audio_buffer import AudioBuffer
+
+WORDS = (
+    "the morning air was calm and the kettle hummed while a small robot sorted "
+    "letters by colour near the window so that every plan for the day could start "
+    "gently with music and a short walk along the river before work began"
+).split()
+
+
+def _sleep_until(deadline):
+    delay = deadline - time.perf_counter()
+    if delay > 0:
+        time.sleep(delay)
+
+
+# -- HTTP backends -----------------------------------------------------------
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep-alive, like the real servers (Nova's HTTP sessions are pooled)
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        return
+
+    @property
+    def backend(self):
+        return self.server.backend
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _send(self, body, content_type="application/json", status=200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, data, status=200):
+        self._send(json.dumps(data).encode(), status=status)
+
+    def _start_chunked(self, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def do_GET(self):
+        self.backend.handle_get(self)
+
+    def do_POST(self):
+        self.backend.handle_post(self)
+
+
+class FakeServer:
+    """A backend served on 127.0.0.1 from its own threads, on an ephemeral port."""
+
+    def __init__(self):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.backend = self
+        self.port = self.httpd.server_address[1]
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name=f"fake-{type(self).__name__}", daemon=True)
+        self._thread.start()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def _count(self):
+        with self._lock:
+            self.requests += 1
+            return self.requests
+
+    def handle_get(self, handler):
+        handler._send_json({"error": "not found"}, status=404)
+
+    def handle_post(self, handler):
+        handler._send_json({"error": "not found"}, status=404)
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class FakeOllama(FakeServer):
+    """
+    /api/generate: waits `prefill_ms`, then produces `reply_tokens` tokens
+    (words, with a full stop every `sentence_words`) at `tokens_per_second`.
+    Replies vary from request to request but are the same for every run.
+    A request without a prompt only "loads the model", as with Ollama.
+    """
+
+    def __init__(self, tokens_per_second=40.0, prefill_ms=150.0, reply_tokens=40, sentence_words=10, seed=0):
+        super().__init__()
+        self.tokens_per_second = float(tokens_per_second)
+        self.prefill_ms = float(prefill_ms)
+        self.reply_tokens = int(reply_tokens)
+        self.sentence_words = int(sentence_words)
+        self.seed = seed
+        self.tokens = 0
+        self.generation_seconds = 0.0
+        self.loads = 0
+
+    def reply(self, n):
+        rng = random.Random(self.seed * 100003 + n)
+        tokens = []
+        for i in range(self.reply_tokens):
+            word = rng.choice(WORDS)
+            last = (i + 1) % self.sentence_words == 0 or i + 1 == self.reply_tokens
+            tokens.append(word + (". " if last else " "))
+        return tokens
+
+    def handle_post(self, handler):
+        payload = json.loads(handler._body() or b"{}")
+        if "prompt" not in payload:
+            with self._lock:
+                self.loads += 1
+            handler._send_json({"model": payload.get("model", "llama3"), "response": "", "done": True, "done_reason": "load"})
+            return
+        n = self._count()
+        tokens = self.reply(n)
+        started = time.perf_counter()
+        first = started + self.prefill_ms / 1000.0
+        interval = 1.0 / self.tokens_per_second
+        prompt_tokens = len(str(payload.get("prompt", "")).split())
+        final = {
+            "model": payload.get("model", "llama3"),
+            "response": "",
+            "done": True,
+            "context": list(payload.get("context") or []) + list(range(n * 1000, n * 1000 + prompt_tokens + len(tokens))),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(self.prefill_ms * 1e6),
+            "eval_count": len(tokens),
+        }
+        if not payload.get("stream"):
+            _sleep_until(first + len(tokens) * interval)
+            final["response"] = "".join(tokens)
+            self._account(len(tokens), started)
+            handler._send_json(final)
+            return
+        handler._start_chunked("application/x-ndjson")
+        for i, token in enumerate(tokens):
+            _sleep_until(first + i * interval)
+            handler._chunk(json.dumps({"model": final["model"], "response": token, "done": False}).encode() + b"\n")
+        handler._chunk(json.dumps(final).encode() + b"\n")
+        handler._chunk(b"")
+        self._account(len(tokens), started)
+
+    def _account(self, tokens, started):
+        with self._lock:
+            self.tokens += tokens
+            self.generation_seconds += time.perf_counter() - started
+
+
+def synthetic_speech(seconds, sample_rate=16000, seed=0, amplitude=0.3):
+    """A voiced, speech-like signal: a harmonic tone with a syllable-rate envelope (float32, -1..1)."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    f0 = rng.uniform(110.0, 220.0)
+    # Pitch drifts a little, like intonation
+    phase = 2 * np.pi * np.cumsum(f0 * (1.0 + 0.05 * np.sin(2 * np.pi * 0.7 * t))) / sample_rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = 0.35 + 0.65 * np.abs(np.sin(np.pi * rng.uniform(3.0, 5.0) * t))
+    signal = amplitude * envelope * voice / np.max(np.abs(voice))
+    return (signal + rng.normal(0.0, 0.003, len(t))).astype(np.float32)
+
+
+def background_noise(seconds, sample_rate=16000, seed=0, level=0.002):
+    rng = np.random.default_rng(seed + 7919)
+    return rng.normal(0.0, level, int(seconds * sample_rate)).astype(np.float32)
+
+
+def to_int16(signal):
+    return (np.clip(signal, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+class FakeCoqui(FakeServer):
+    """
+    /api/tts: a synthetic WAV of `seconds_per_char` per character, returned
+    after `base_ms` plus `realtime_factor` times the audio length.
+    """
+
+    def __init__(self, realtime_factor=0.15, base_ms=40.0, seconds_per_char=0.06, sample_rate=22050):
+        super().__init__()
+        self.realtime_factor = float(realtime_factor)
+        self.base_ms = float(base_ms)
+        self.seconds_per_char = float(seconds_per_char)
+        self.sample_rate = int(sample_rate)
+
+    def handle_get(self, handler):
+        if handler.path.startswith("/api/voices"):
+            handler._send_json({"voices": [{"name": "en_US", "language": "en", "style": "neutral"}]})
+        else:
+            super().handle_get(handler)
+
+    def handle_post(self, handler):
+        started = time.perf_counter()
+        payload = json.loads(handler._body() or b"{}")
+        n = self._count()
+        seconds = max(0.3, len(payload.get("text", "")) * self.seconds_per_char)
+        wav = AudioBuffer(to_int16(synthetic_speech(seconds, self.sample_rate, seed=n, amplitude=0.2)), self.sample_rate).to_wav_bytes()
+        _sleep_until(started + self.base_ms / 1000.0 + self.realtime_factor * seconds)
+        handler._send(wav, content_type="audio/wav")
+
+
+class FakeWhisper(FakeServer):
+    """
+    /inference: the transcript returned by `transcript()`, after `base_ms`
+    plus `ms_per_second` per second of audio received.
+    """
+
+    def __init__(self, transcript, base_ms=120.0, ms_per_second=40.0):
+        super().__init__()
+        self.transcript = transcript
+        self.base_ms = float(base_ms)
+        self.ms_per_second = float(ms_per_second)
+
+    def handle_post(self, handler):
+        started = time.perf_counter()
+        body = handler._body()
+        self._count()
+        # 16 kHz mono int16; the multipart overhead is negligible
+        seconds = len(body) / 32000.0
+        _sleep_until(started + (self.base_ms + self.ms_per_second * seconds) / 1000.0)
+        handler._send_json({"text": self.transcript()})
+
+
+WHISPER_BINARY = """#!{python}
+# whisper.cpp stand-in written by benchmarks/fakes.py
+import sys, time
+args = sys.argv[1:]
+audio = args[args.index("-f") + 1]
+time.sleep({delay})
+with open({transcript_path!r}) as f:
+    text = f.read()
+with open(audio.replace(".wav", ".txt"), "w") as f:
+    f.write(text)
+"""
+
+
+def write_whisper_binary(path, transcript_path, delay_ms=400.0):
+    """
+    Write an executable whisper.cpp stand-in at `path`: it waits `delay_ms`
+    (the model load and decode of the real binary) and writes the text in
+    `transcript_path` next to the audio file, as `-otxt` does.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        f.write(WHISPER_BINARY.format(python=sys.executable, delay=delay_ms / 1000.0, transcript_path=os.path.abspath(transcript_path)))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+
+# -- audio devices -------------------------------------------------------------
+
+
+class FakeAudioDevices:
+    """
+    Microphone and speaker stand-ins. `utterances` is a list of
+    (int16 samples, speech end in seconds from the start, transcript),
+    spoken into the microphone one by one. Utterance i starts once
+    `may_speak(i)` is true (e.g. when i turns have completed; by default
+    right away), or `give_up` seconds after the previous utterance ended.
+    `on_transcript(text)` is called as each utterance starts.
+    """
+
+    def __init__(self, utterances, sample_rate=16000, playback_speedup=1.0, on_transcript=None, may_speak=None, give_up=20.0):
+        self.utterances = list(utterances)
+        self.sample_rate = sample_rate
+        self.playback_speedup = float(playback_speedup)
+        self.on_transcript = on_transcript
+        self.may_speak = may_speak
+        self.give_up = give_up
+        self.transcript = ""
+        self.speech_ended = []     # perf_counter() when each utterance's speech ended
+        self.reply_started = []    # perf_counter() of the first speaker write after it
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """The next utterance if it is the user's turn to speak, else None."""
+        now = time.perf_counter()
+        with self._lock:
+            if self._next >= len(self.utterances):
+                return None
+            if self.may_speak is not None and not self.may_speak(self._next):
+                if not self.speech_ended or now - self.speech_ended[-1] < self.give_up:
+                    return None
+            utterance = self.utterances[self._next]
+            self._next += 1
+            return utterance
+
+    def _speech_ended(self, when):
+        with self._lock:
+            self.speech_ended.append(when)
+
+    def _speaker_write(self, when):
+        with self._lock:
+            if len(self.reply_started) < len(self.speech_ended):
+                self.reply_started.append(when)
+
+    def module(self):
+        """A stand-in for the `sounddevice` module, backed by these devices."""
+        devices = self
+        module = types.ModuleType("sounddevice")
+
+        class InputStream:
+            def __init__(self, samplerate=16000, channels=1, dtype="int16", blocksize=480, callback=None, **kwargs):
+                self.samplerate = samplerate
+                self.blocksize = blocksize or 480
+                self.callback = callback
+                self._stop = threading.Event()
+                self._thread = None
+
+            def _run(self):
+                noise = to_int16(background_noise(1.0, self.samplerate))
+                samples, offset, end_sample, spoken = None, 0, None, False
+                started = time.perf_counter()
+                position = 0
+                while not self._stop.is_set():
+                    if samples is None and not spoken:
+                        utterance = devices._take()
+                        if utterance is not None:
+                            samples, speech_end, text = utterance
+                            offset, end_sample, spoken = position, position + int(speech_end * self.samplerate), True
+                            devices.transcript = text
+                            if devices.on_transcript is not None:
+                                devices.on_transcript(text)
+                    if samples is not None and position - offset < len(samples):
+                        block = samples[position - offset:position - offset + self.blocksize]
+                    else:
+                        samples = None
+                        start = position % (len(noise) - self.blocksize)
+                        block = noise[start:start + self.blocksize]
+                    block = np.pad(block, (0, self.blocksize - len(block)))
+                    position += self.blocksize
+                    # Blocks arrive when they have been "recorded"
+                    _sleep_until(started + position / self.samplerate)
+                    if end_sample is not None and position >= end_sample:
+                        devices._speech_ended(time.perf_counter())
+                        end_sample = None
+                    self.callback(block.reshape(-1, 1), self.blocksize, None, None)
+
+            def start(self):
+                self._thread = threading.Thread(target=self._run, name="fake-microphone", daemon=True)
+                self._thread.start()
+
+            def stop(self):
+                self._stop.set()
+                if self._thread is not None:
+                    self._thread.join(1.0)
+
+            def __enter__(self):
+                self.start()
+                return self
+
+            def __exit__(self, *exc):
+                self.stop()
+
+        class OutputStream:
+            def __init__(self, samplerate=22050, channels=1, dtype="int16", **kwargs):
+                self.samplerate = samplerate
+                self.channels = channels
+
+            def write(self, samples):
+                devices._speaker_write(time.perf_counter())
+                time.sleep(len(samples) / self.samplerate / devices.playback_speedup)
+
+            def abort(self):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                pass
+
+        def rec(frames, samplerate=16000, channels=1, dtype="int16", **kwargs):
+            raise RuntimeError("fixed-length recording is not simulated; enable vad_enabled")
+
+        module.InputStream = InputStream
+        module.OutputStream = OutputStream
+        module.rec = rec
+        module.wait = lambda: None
+        return module
+
+
+def make_utterances(count, sample_rate=16000, seed=0, lead=0.4, speech=(1.0, 2.0), trail=1.5):
+    """
+    `count` (samples, speech end, transcript) utterances: `lead` seconds of
+    background noise, speech of a random length in the `speech` range, then
+    `trail` seconds of noise (longer than the VAD's trailing silence).
+    """
+    rng = random.Random(seed)
+    utterances = []
+    for i in range(count):
+        seconds = rng.uniform(*speech)
+        signal = np.concatenate([
+            background_noise(lead, sample_rate, seed=i),
+            synthetic_speech(seconds, sample_rate, seed=seed * 1000 + i),
+            background_noise(trail, sample_rate, seed=i + 1),
+        ])
+        words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 12)))
+        utterances.append((to_int16(signal), lead + seconds, f"Tell me about {words} number {i + 1}"))
+    return utterances
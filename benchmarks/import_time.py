@@ -0,0 +1,226 @@
+"""
+Import-time profile of Nova's entry points.
+
+Imports each entry point in fresh interpreters with `python -X importtime`,
+from a scratch directory holding a copy of config/ (so modules that read the
+config at import do so as on a real start). The targets are main.py, as the
+`nova` package, and the dashboard (interface.py). Only the entry point's own
+import is measured, not the interpreter's startup. The fastest of --repeat
+runs is reported (noise only ever adds to import time), in milliseconds:
+  total                  time to import the entry point
+  modules                the slowest modules by cumulative time (self time
+                         beside it: what the module itself costs)
+Modules in LAZY are heavy or hardware-bound and are meant to load on first
+use, not at startup. Importing one of them flags the run.
+
+The timings depend on the machine, so they are only reported. What fails a
+run does not: with --baseline, the packages each target imports (outside the
+standard library and the repo itself) are compared with a stored list, and
+the run exits with status 1 if:
+  - a LAZY module is imported;
+  - a package not in the baseline is imported.
+A baseline holds only those package lists (--save-baseline), so it can be
+committed and checked on any machine. The committed one is for a full install
+of requirements.txt (it lists rpi_ws281x, which the LED code imports when it
+is installed); packages missing locally are simply not imported.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --baseline benchmarks/import_baseline.json
+    python -m benchmarks.import_time --save-baseline benchmarks/import_baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Printed to stderr right before the measured import; lines above it belong to interpreter startup
+MARKER = "-- nova import --"
+
+TARGETS = {
+    "main": (
+        "import importlib.util, sys, types\n"
+        "sys.path.insert(0, {repo!r})\n"
+        "if importlib.util.find_spec('nova') is None:\n"
+        "    package = types.ModuleType('nova')\n"
+        "    package.__path__ = [{repo!r}]\n"
+        "    sys.modules['nova'] = package\n"
+        "sys.stderr.write({marker!r} + '\\n')\n"
+        "import nova.main\n"
+        "print('\\n'.join(sys.modules))\n"
+    ),
+    "interface": (
+        "import sys\n"
+        "sys.path.insert(0, {repo!r})\n"
+        "sys.stderr.write({marker!r} + '\\n')\n"
+        "import interface\n"
+        "print('\\n'.join(sys.modules))\n"
+    ),
+}
+
+# Modules that must not be imported just by importing the target
+LAZY = {
+    "main": ("sounddevice", "requests", "urllib3", "flask", "PIL", "icalendar"),
+    "interface": ("sounddevice", "requests", "urllib3", "PIL", "icalendar"),
+}
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    {module: (self ms, cumulative ms)} for the imports after MARKER in
+    `python -X importtime` output. With no MARKER, every import is included.
+    """
+    lines = stderr.splitlines()
+    if MARKER in lines:
+        lines = lines[lines.index(MARKER) + 1:]
+    modules = {}
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header
+        modules[fields[2].strip()] = (int(fields[0]) / 1000.0, int(fields[1]) / 1000.0)
+    return modules
+
+
+def measure(target: str, cwd: str) -> dict:
+    """One fresh-interpreter import of `target`, as parse_importtime() output (modules that loaded)."""
+    code = TARGETS[target].format(repo=REPO, marker=MARKER)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=cwd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing {target} failed:\n{proc.stderr[-2000:]}")
+    # -X importtime also lists imports that failed (optional dependencies that are not installed)
+    loaded = set(proc.stdout.split())
+    return {name: times for name, times in parse_importtime(proc.stderr).items() if name in loaded}
+
+
+def packages(names) -> list:
+    """The top-level packages among module `names`, without the standard library and the repo's own modules."""
+    tops = {name.split(".", 1)[0] for name in names}
+    return sorted(
+        top for top in tops
+        if top not in sys.stdlib_module_names and top != "nova"
+        and not os.path.exists(os.path.join(REPO, f"{top}.py")) and not os.path.isdir(os.path.join(REPO, top))
+    )
+
+
+def profile(target: str, runs: list, top: int = 15) -> dict:
+    """Total and per-module times of several runs of one target (the fastest of each)."""
+    names = set().union(*runs)
+    modules = {}
+    for name in names:
+        times = [run[name] for run in runs if name in run]
+        modules[name] = {
+            "self_ms": round(min(t[0] for t in times), 2),
+            "cumulative_ms": round(min(t[1] for t in times), 2),
+        }
+    # Everything imported after the marker is nested in the target's own import
+    total = max((m["cumulative_ms"] for m in modules.values()), default=0.0)
+    slowest = sorted(modules.items(), key=lambda item: item[1]["cumulative_ms"], reverse=True)
+    return {
+        "total_ms": total,
+        "module_count": len(modules),
+        "lazy_imported": sorted(name for name in names if name in LAZY.get(target, ())),
+        "packages": packages(names),
+        "modules": dict(slowest[:top]),
+        "all_modules": {name: m["cumulative_ms"] for name, m in modules.items()},
+    }
+
+
+def run_benchmark(args) -> dict:
+    scratch = tempfile.mkdtemp(prefix="nova-imports-")
+    try:
+        shutil.copytree(os.path.join(REPO, "config"), os.path.join(scratch, "config"))
+        targets = {}
+        for target in args.targets:
+            runs = [measure(target, scratch) for _ in range(args.repeat)]
+            targets[target] = profile(target, runs, args.top)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return {
+        "settings": {"repeat": args.repeat},
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "targets": targets,
+    }
+
+
+def compare(result, baseline) -> list:
+    """
+    Import regressions of `result` against `baseline`, as readable strings:
+    LAZY modules imported at startup and packages the baseline does not list.
+    """
+    problems = []
+    for target, now in result["targets"].items():
+        for name in now["lazy_imported"]:
+            problems.append(f"{target}: {name} is imported at startup (it should load on first use)")
+        before = baseline.get("targets", {}).get(target)
+        if not before:
+            continue
+        known = set(before.get("packages", []))
+        for name in now["packages"]:
+            if name not in known:
+                problems.append(f"{target}: new import {name} ({now['all_modules'].get(name, 0.0):.1f} ms)")
+    return problems
+
+
+def baseline_of(result) -> dict:
+    """The machine-independent part of `result`: the packages each target imports."""
+    return {"targets": {target: {"packages": t["packages"]} for target, t in result["targets"].items()}}
+
+
+def format_report(result) -> str:
+    lines = []
+    for target, t in result["targets"].items():
+        lines.append(f"{target}: {t['total_ms']:.1f} ms, {t['module_count']} modules")
+        lines.append(f"  {'module':<44}{'cumulative':>11}{'self':>9}")
+        for name, m in t["modules"].items():
+            lines.append(f"  {name:<44}{m['cumulative_ms']:>11.1f}{m['self_ms']:>9.1f}")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Nova import-time profile (python -X importtime).")
+    parser.add_argument("--targets", nargs="+", choices=sorted(TARGETS), default=list(TARGETS), help="entry points to import (default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per target; the fastest is reported (default 5)")
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list per target")
+    parser.add_argument("--output", help="write the result as JSON to this file")
+    parser.add_argument("--baseline", help="compare with this stored result")
+    parser.add_argument("--save-baseline", metavar="PATH", help="store the result as the baseline at PATH")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    result = run_benchmark(args)
+    print(format_report(result))
+    for path, data in ((args.output, result), (args.save_baseline, baseline_of(result))):
+        if path:
+            with open(path, "w") as f:
+                json.dump(data, f, indent=2)
+                f.write("\n")
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+    problems = compare(result, baseline)
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    if problems:
+        return 1
+    if args.baseline:
+        print(f"No import regressions against {args.baseline}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,330 @@
+"""
+End-to-end turn latency benchmark.
+
+Runs Nova's real turn pipeline, main.main(), with VAD capture, streaming
+speech-to-text, plugins, streaming reasoning, sentence-by-sentence speech and
+memory. The backends are the local stand-ins in benchmarks/fakes.py: a fake
+Ollama, Coqui and whisper.cpp (server or binary), plus synthetic utterances
+played into a fake microphone. The run happens in a scratch directory with its
+own config/config.yaml and logs/, so your history and caches are not touched.
+
+Reported, in milliseconds:
+  time_to_first_audio    end of capture -> first reply sentence starts playing
+  speech_end_to_audio    end of the user's speech -> first reply samples reach
+                         the speaker (includes the VAD's trailing silence)
+  stages.<stage>         the pipeline's own stage timings (capture, stt, ...)
+each as p50/p95/p99/mean/max, with throughput (turns per minute, generated
+tokens per second). --output writes the result as JSON. --baseline compares
+it with a stored result and exits with status 1 when a percentile got more
+than --tolerance slower (and by more than --min-delta-ms).
+
+Latencies depend on the machine, so a baseline is only meaningful on the
+host that recorded it: save one on your machine (or CI runner) from the
+revision you compare against, then compare your change with it. A baseline
+from another environment is reported with a warning.
+benchmarks/baseline.example.json shows the format; it is not a reference.
+
+    python -m benchmarks.turn_latency --turns 20 --output bench.json
+    python -m benchmarks.turn_latency --save-baseline bench-baseline.json
+    python -m benchmarks.turn_latency --baseline bench-baseline.json
+
+The microphone runs in real time, so endpointing behaves as it does live.
+Replies are "played" --playback-speedup times faster (4 by default) to keep
+runs short. This affects the tts and turn stages and the throughput, but not
+the time to first audio.
+"""
+
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import types
+import _thread
+
+import numpy as np
+import yaml
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO not in sys.path:
+    sys.path.insert(0, REPO)
+
+from voice_pipeline import STAGES, StageStats  # noqa: E402
+from benchmarks.fakes import FakeAudioDevices, FakeCoqui, FakeOllama, FakeWhisper, make_utterances, write_whisper_binary  # noqa: E402
+
+PERCENTILES = ("p50", "p95", "p99")
+
+
+def summarize(samples_ms) -> dict:
+    """count, mean, p50, p95, p99 and max of a list of milliseconds."""
+    if not samples_ms:
+        return {"count": 0}
+    values = np.asarray(samples_ms, dtype=np.float64)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": len(values),
+        "mean": round(float(values.mean()), 1),
+        "p50": round(float(p50), 1),
+        "p95": round(float(p95), 1),
+        "p99": round(float(p99), 1),
+        "max": round(float(values.max()), 1),
+    }
+
+
+class RecordingStats(StageStats):
+    """StageStats that also keeps every sample, and notes when `turns` turns have completed."""
+
+    def __init__(self, turns):
+        super().__init__()
+        self.turns = turns
+        self.samples = {}
+        self.turn_finished = []
+        self.finished = threading.Event()
+
+    def record(self, stage, seconds):
+        super().record(stage, seconds)
+        with self._lock:
+            self.samples.setdefault(stage, []).append(seconds * 1000.0)
+            if stage == "turn":
+                self.turn_finished.append(time.perf_counter())
+                if len(self.turn_finished) >= self.turns:
+                    self.finished.set()
+
+
+def _import_main():
+    """
+    main.py imports its sibling modules as the `nova` package (the repository
+    checked out as nova/). When no such package is importable, the
+    repository itself is registered under that name.
+    """
+    try:
+        importlib.import_module("nova.voice_pipeline")
+    except ImportError:
+        package = types.ModuleType("nova")
+        package.__path__ = [REPO]
+        sys.modules["nova"] = package
+    return importlib.import_module("nova.main")
+
+
+def _parse_overrides(pairs):
+    overrides = {}
+    for pair in pairs or []:
+        key, _, value = pair.partition("=")
+        overrides[key.strip()] = yaml.safe_load(value)
+    return overrides
+
+
+def _write_config(args, ollama, coqui, whisper):
+    with open(os.path.join(REPO, "config", "config.yaml"), "r") as f:
+        cfg = yaml.safe_load(f) or {}
+    cfg.update({
+        "ollama_endpoint": ollama.url("/api/generate"),
+        "coqui_tts_endpoint": coqui.url("/api/tts"),
+        "whisper_backend": args.whisper,
+        "whisper_server_url": whisper.url("/inference"),
+        "vad_enabled": True,
+        "stt_streaming": args.streaming,
+        "use_open_webui": False,
+        # Every reply should reach the stand-ins, not a cache
+        "response_cache_enabled": False,
+        "tts_cache_enabled": False,
+    })
+    cfg.update(_parse_overrides(args.set))
+    os.makedirs("config", exist_ok=True)
+    os.makedirs("logs", exist_ok=True)
+    with open(os.path.join("config", "config.yaml"), "w") as f:
+        yaml.safe_dump(cfg, f)
+
+
+def settings(args) -> dict:
+    """The options that determine the result; a baseline is only comparable with the same ones."""
+    return {
+        "turns": args.turns,
+        "seed": args.seed,
+        "playback_speedup": args.playback_speedup,
+        "tokens_per_second": args.tokens_per_second,
+        "prefill_ms": args.prefill_ms,
+        "reply_tokens": args.reply_tokens,
+        "tts_realtime_factor": args.tts_rtf,
+        "tts_base_ms": args.tts_base_ms,
+        "whisper": args.whisper,
+        "whisper_ms": args.whisper_ms,
+        "streaming": args.streaming,
+        "set": sorted(args.set or []),
+    }
+
+
+def run_benchmark(args) -> dict:
+    utterances = make_utterances(args.turns, seed=args.seed)
+    stats = RecordingStats(args.turns)
+    # The next utterance is spoken once the previous turn is over
+    devices = FakeAudioDevices(utterances, playback_speedup=args.playback_speedup, may_speak=lambda i: len(stats.turn_finished) >= i)
+    whisper = FakeWhisper(lambda: devices.transcript, base_ms=args.whisper_ms)
+    ollama = FakeOllama(args.tokens_per_second, args.prefill_ms, args.reply_tokens, seed=args.seed)
+    coqui = FakeCoqui(realtime_factor=args.tts_rtf, base_ms=args.tts_base_ms)
+    scratch = tempfile.mkdtemp(prefix="nova-bench-")
+    previous_cwd = os.getcwd()
+    previous_sounddevice = sys.modules.get("sounddevice")
+    try:
+        os.chdir(scratch)
+        _write_config(args, ollama, coqui, whisper)
+        if args.whisper == "subprocess":
+            transcript_path = os.path.join(scratch, "transcript.txt")
+            write_whisper_binary(os.path.join("whisper.cpp", "main"), transcript_path, delay_ms=args.whisper_ms)
+
+            def on_transcript(text):
+                with open(transcript_path, "w") as f:
+                    f.write(text)
+            devices.on_transcript = on_transcript
+        sys.modules["sounddevice"] = devices.module()
+        log_path = os.path.join(scratch, "nova.log")
+        with open(log_path, "w") as log, contextlib.redirect_stdout(sys.stdout if args.verbose else log):
+            nova_main = _import_main()
+
+            def stop_when_done():
+                # Ctrl+C, exactly as a user stops Nova, so shutdown runs too
+                stats.finished.wait(args.timeout * args.turns)
+                _thread.interrupt_main()
+
+            threading.Thread(target=stop_when_done, name="bench-stop", daemon=True).start()
+            started = time.perf_counter()
+            nova_main.main(stats=stats)
+        return build_result(args, stats, devices, ollama, coqui, whisper, started)
+    finally:
+        os.chdir(previous_cwd)
+        if previous_sounddevice is not None:
+            sys.modules["sounddevice"] = previous_sounddevice
+        for server in (ollama, coqui, whisper):
+            server.close()
+        if args.keep:
+            print(f"Scratch directory kept: {scratch}", file=sys.stderr)
+        else:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+def build_result(args, stats, devices, ollama, coqui, whisper, started) -> dict:
+    completed = len(stats.turn_finished)
+    elapsed = (stats.turn_finished[-1] - started) if completed else 0.0
+    perceived = [(reply - end) * 1000.0 for end, reply in zip(devices.speech_ended, devices.reply_started)]
+    return {
+        "settings": settings(args),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "completed_turns": completed,
+        "metrics": {
+            "time_to_first_audio_ms": summarize(stats.samples.get("first_audio", [])),
+            "speech_end_to_audio_ms": summarize(perceived),
+            "stages": {stage: summarize(stats.samples[stage]) for stage in STAGES if stage in stats.samples and stage != "first_audio"},
+        },
+        "throughput": {
+            "elapsed_seconds": round(elapsed, 2),
+            "turns_per_minute": round(completed * 60.0 / elapsed, 2) if elapsed else 0.0,
+            "llm_tokens_per_second": round(ollama.tokens / ollama.generation_seconds, 1) if ollama.generation_seconds else 0.0,
+            "requests": {"ollama": ollama.requests, "coqui": coqui.requests, "whisper": whisper.requests},
+        },
+    }
+
+
+def _flatten(result) -> dict:
+    metrics = result.get("metrics", {})
+    flat = {name: value for name, value in metrics.items() if name != "stages"}
+    flat.update({f"stages.{stage}": value for stage, value in metrics.get("stages", {}).items()})
+    return flat
+
+
+def compare(result, baseline, tolerance=0.2, min_delta_ms=5.0) -> list:
+    """
+    Percentiles in `result` that are more than `tolerance` (a fraction)
+    slower than in `baseline`, and by more than `min_delta_ms`, as
+    (metric, percentile, baseline ms, current ms).
+    """
+    regressions = []
+    current = _flatten(result)
+    for name, before in _flatten(baseline).items():
+        after = current.get(name)
+        if not after or not after.get("count") or not before.get("count"):
+            continue
+        for p in PERCENTILES:
+            if after[p] > before[p] * (1.0 + tolerance) and after[p] - before[p] > min_delta_ms:
+                regressions.append((name, p, before[p], after[p]))
+    return regressions
+
+
+def format_report(result) -> str:
+    lines = [f"{'metric (ms)':<28}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"]
+    for name, s in _flatten(result).items():
+        if s.get("count"):
+            lines.append(f"{name:<28}" + "".join(f"{s[k]:>9.1f}" for k in PERCENTILES + ("max",)))
+    t = result["throughput"]
+    lines.append(
+        f"{result['completed_turns']}/{result['settings']['turns']} turns in {t['elapsed_seconds']:.1f}s: "
+        f"{t['turns_per_minute']:.1f} turns/min, {t['llm_tokens_per_second']:.1f} LLM tokens/s"
+    )
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Nova end-to-end turn latency benchmark (local stand-in backends).")
+    parser.add_argument("--turns", type=int, default=10, help="utterances to play (default 10)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--playback-speedup", type=float, default=4.0, help="play replies this many times faster than real time (default 4)")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0, help="fake Ollama generation rate")
+    parser.add_argument("--prefill-ms", type=float, default=150.0, help="fake Ollama delay before the first token")
+    parser.add_argument("--reply-tokens", type=int, default=40, help="tokens per fake Ollama reply")
+    parser.add_argument("--tts-rtf", type=float, default=0.15, help="fake Coqui synthesis time per second of audio")
+    parser.add_argument("--tts-base-ms", type=float, default=40.0, help="fake Coqui fixed delay per sentence")
+    parser.add_argument("--whisper", choices=("server", "subprocess"), default="server", help="whisper.cpp stand-in to use")
+    parser.add_argument("--whisper-ms", type=float, default=120.0, help="fake whisper.cpp delay per transcription")
+    parser.add_argument("--no-streaming", dest="streaming", action="store_false", help="disable streaming STT partials")
+    parser.add_argument("--set", action="append", metavar="KEY=VALUE", help="override a config.yaml setting (repeatable)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds allowed per turn before the run is stopped")
+    parser.add_argument("--output", help="write the result as JSON to this file")
+    parser.add_argument("--baseline", help="compare with this stored result")
+    parser.add_argument("--save-baseline", metavar="PATH", help="store the result as the baseline at PATH")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown against the baseline (fraction, default 0.2)")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--verbose", action="store_true", help="show Nova's own output")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch directory (config, logs, nova.log)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    result = run_benchmark(args)
+    print(format_report(result))
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(result, f, indent=2)
+                f.write("\n")
+    if result["completed_turns"] < args.turns:
+        print(f"Only {result['completed_turns']} of {args.turns} turns completed.", file=sys.stderr)
+        return 2
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        if baseline.get("settings") != result["settings"]:
+            print("Warning: the baseline was taken with different settings.", file=sys.stderr)
+        if baseline.get("environment") != result["environment"]:
+            print("Warning: the baseline was taken on another machine or Python; timings are not comparable.", file=sys.stderr)
+        regressions = compare(result, baseline, args.tolerance, args.min_delta_ms)
+        for name, p, before, after in regressions:
+            print(f"REGRESSION {name} {p}: {before:.1f} -> {after:.1f} ms (+{(after / before - 1) * 100 if before else 0:.0f}%)")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+"""
+Shared access to `config/config.yaml`.
+
+Every module used to parse the file itself at import time, so starting Nova
+parsed the same YAML more than a dozen times. load() parses it once (with
+libyaml's C loader when PyYAML was built with it) and again only when the
+file changes. Each caller gets its own copy, so a module (or a test) changing
+its CFG does not affect the others.
+"""
+
+import copy
+import os
+import threading
+import yaml
+
+CONFIG_PATH = os.path.join("config", "config.yaml")
+
+_Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_cache = {}
+_lock = threading.Lock()
+
+
+def load(path: str = CONFIG_PATH) -> dict:
+    """The settings in `path` (relative to the working directory), or {} if it is missing or invalid."""
+    try:
+        full_path = os.path.abspath(path)
+        st = os.stat(full_path)
+    except OSError:
+        return {}
+    version = (st.st_mtime_ns, st.st_size)
+    with _lock:
+        cached = _cache.get(full_path)
+        if cached is None or cached[0] != version:
+            try:
+                with open(full_path, "r") as f:
+                    data = yaml.load(f, Loader=_Loader) or {}
+            except Exception as e:
+                print("Config error:", e)
+                data = {}
+            if not isinstance(data, dict):
+                data = {}
+            cached = _cache[full_path] = (version, data)
+    return copy.deepcopy(cached[1])
@@ -0,0 +1,202 @@
+"""
+Append-only conversation history in SQLite.
+
+Turns are rows in a single table, so saving a turn is one INSERT and reading
+the last N turns is a ranged read over the primary key, regardless of how long
+the history grows. The database runs in WAL mode: Nova (main.py) and the
+dashboard (interface.py) share it through the logs/ volume, and readers never
+block the writer. Each thread gets its own connection.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+
+_SCHEMA = (
+	"""
+CREATE TABLE IF NOT EXISTS turns (
+	id INTEGER PRIMARY KEY AUTOINCREMENT,
+	time REAL NOT NULL,
+	user TEXT NOT NULL,
+	nova TEXT NOT NULL
+)
+""",
+	# "generation" counts clears, so indexes kept outside the database can tell
+	# their turns were deleted (ids keep growing after a clear).
+	"CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+)
+
+
+def _is_busy(error: sqlite3.OperationalError) -> bool:
+	message = str(error).lower()
+	return "locked" in message or "busy" in message
+
+
+def _row_to_turn(row) -> dict:
+	return {"user": row[2], "nova": row[3], "time": row[1]}
+
+
+class ConversationStore:
+	"""
+	SQLite-backed conversation log, safe to use from several threads and processes.
+	"""
+
+	def __init__(self, path: str, busy_timeout: float = 5.0):
+		self.path = path
+		self.busy_timeout = busy_timeout
+		self._local = threading.local()
+		self._init_lock = threading.Lock()
+		self._initialized = False
+
+	def retry(self, operation):
+		"""
+		Runs `operation` and retries it while another connection holds a lock
+		SQLite's busy handler does not wait for (e.g. switching journal mode),
+		for up to `busy_timeout` seconds.
+		"""
+		deadline = time.monotonic() + self.busy_timeout
+		delay = 0.005
+		while True:
+			try:
+				return operation()
+			except sqlite3.OperationalError as e:
+				if not _is_busy(e) or time.monotonic() >= deadline:
+					raise
+				time.sleep(delay)
+				delay = min(delay * 2, 0.1)
+
+	def _initialize(self, conn: sqlite3.Connection):
+		# The journal mode is persistent in the database file, so WAL is only
+		# switched on once, when a process first finds the database in another mode.
+		if conn.execute("PRAGMA journal_mode").fetchone()[0].lower() != "wal":
+			self.retry(lambda: conn.execute("PRAGMA journal_mode=WAL"))
+		for statement in _SCHEMA:
+			self.retry(lambda: conn.execute(statement))
+
+	def connection(self) -> sqlite3.Connection:
+		"""The calling thread's connection (autocommit mode), opened on first use."""
+		conn = getattr(self._local, "conn", None)
+		if conn is not None:
+			return conn
+		directory = os.path.dirname(self.path)
+		if directory:
+			os.makedirs(directory, exist_ok=True)
+		conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+		# Connection-local settings; these take no database lock.
+		conn.execute("PRAGMA synchronous=NORMAL")
+		# Cleared history is overwritten on disk, not just unlinked from the b-tree.
+		conn.execute("PRAGMA secure_delete=ON")
+		with self._init_lock:
+			if not self._initialized:
+				self._initialize(conn)
+				self._initialized = True
+		self._local.conn = conn
+		return conn
+
+	def append(self, user_text: str, nova_response: str, timestamp: float = None) -> int:
+		"""Append one turn and return its id."""
+		conn = self.connection()
+		row = (timestamp if timestamp is not None else time.time(), user_text or "", nova_response or "")
+		cur = self.retry(lambda: conn.execute("INSERT INTO turns (time, user, nova) VALUES (?, ?, ?)", row))
+		return cur.lastrowid
+
+	def recent(self, n: int) -> list:
+		"""The last `n` turns, oldest first."""
+		rows = self.connection().execute(
+			"SELECT id, time, user, nova FROM turns ORDER BY id DESC LIMIT ?", (int(n),)
+		).fetchall()
+		return [_row_to_turn(row) for row in reversed(rows)]
+
+	def iter_turns(self, after_id: int = 0, batch: int = 500):
+		"""Yield (id, turn) for every turn after `after_id`, oldest first, in batches."""
+		conn = self.connection()
+		while True:
+			rows = conn.execute(
+				"SELECT id, time, user, nova FROM turns WHERE id > ? ORDER BY id LIMIT ?", (after_id, batch)
+			).fetchall()
+			if not rows:
+				return
+			for row in rows:
+				yield row[0], _row_to_turn(row)
+			after_id = rows[-1][0]
+
+	def get_turns(self, ids) -> dict:
+		"""The turns with the given ids, as {id: turn} (missing ids are left out)."""
+		ids = [int(i) for i in ids]
+		if not ids:
+			return {}
+		placeholders = ",".join("?" * len(ids))
+		rows = self.connection().execute(
+			f"SELECT id, time, user, nova FROM turns WHERE id IN ({placeholders})", ids
+		).fetchall()
+		return {row[0]: _row_to_turn(row) for row in rows}
+
+	def last_id(self) -> int:
+		"""Id of the newest turn, 0 if the history is empty."""
+		return self.connection().execute("SELECT COALESCE(MAX(id), 0) FROM turns").fetchone()[0]
+
+	def count(self) -> int:
+		return self.connection().execute("SELECT COUNT(*) FROM turns").fetchone()[0]
+
+	def generation(self) -> int:
+		"""Number of times the history was cleared; changes with every clear()."""
+		row = self.connection().execute("SELECT value FROM store_meta WHERE key = 'generation'").fetchone()
+		return row[0] if row else 0
+
+	def clear(self):
+		"""Delete every turn and bump the generation, in one transaction."""
+		conn = self.connection()
+		self.retry(lambda: conn.execute("BEGIN IMMEDIATE"))
+		try:
+			conn.execute("DELETE FROM turns")
+			conn.execute(
+				"INSERT INTO store_meta (key, value) VALUES ('generation', 1) "
+				"ON CONFLICT(key) DO UPDATE SET value = value + 1"
+			)
+			conn.execute("COMMIT")
+		except Exception:
+			conn.execute("ROLLBACK")
+			raise
+		conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+	def import_json(self, json_path: str) -> int:
+		"""
+		One-time migration from the legacy JSON history file. The turns are
+		imported only into an empty store, then the file is renamed to
+		`<json_path>.migrated`. Returns the number of imported turns.
+		"""
+		if not os.path.exists(json_path):
+			return 0
+		try:
+			with open(json_path, "r") as f:
+				turns = json.load(f)
+		except Exception as e:
+			print("Error reading legacy conversation history:", e)
+			turns = []
+		conn = self.connection()
+		imported = 0
+		self.retry(lambda: conn.execute("BEGIN IMMEDIATE"))
+		try:
+			if conn.execute("SELECT COUNT(*) FROM turns").fetchone()[0] == 0:
+				now = time.time()
+				rows = [(now, t.get("user", ""), t.get("nova", "")) for t in turns if isinstance(t, dict)]
+				conn.executemany("INSERT INTO turns (time, user, nova) VALUES (?, ?, ?)", rows)
+				imported = len(rows)
+			conn.execute("COMMIT")
+		except Exception:
+			conn.execute("ROLLBACK")
+			raise
+		try:
+			os.replace(json_path, f"{json_path}.migrated")
+		except FileNotFoundError:
+			pass  # another process migrated it first
+		return imported
+
+	def close(self):
+		"""Close the calling thread's connection."""
+		conn = getattr(self._local, "conn", None)
+		if conn is not None:
+			conn.close()
+			self._local.conn = None
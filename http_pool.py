@@ -0,0 +1,126 @@
+"""
+Shared HTTP connection pools for Nova's backends.
+
+Each backend (Ollama, Open Web UI, Coqui TTS, the whisper.cpp server and the
+plugins' web APIs) gets one long-lived `requests.Session`, so connections are
+kept alive and reused across turns and retries instead of a new TCP
+connection being opened per call.
+
+Pool sizes, timeouts and retry/backoff come from `config/config.yaml`:
+
+    http_pool_connections: 4      # hosts cached per session
+    http_pool_maxsize: 8          # connections kept per host
+    http_timeout: 15              # seconds
+    http_retries: 2               # connection/5xx retries (urllib3 Retry)
+    http_backoff: 0.3             # backoff factor between retries
+    http_backends:                # per-backend overrides of any of the above
+      ollama: {timeout: 60, pool_maxsize: 2}
+
+requests and urllib3 are imported when the first session is built, so the
+backends can be imported without them; main.py's warm-up builds the sessions
+in the background while Nova listens for the first time.
+"""
+
+import functools
+import threading
+from typing import TYPE_CHECKING
+import config_loader
+import metrics
+
+if TYPE_CHECKING:
+    import requests
+
+
+CFG = config_loader.load()
+
+# Timeouts used when neither the backend nor `http_timeout` is configured.
+DEFAULT_TIMEOUTS = {"ollama": 15, "open_webui": 15, "coqui": 30, "whisper": 30, "plugins": 5}
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+def backend_settings(backend: str) -> dict:
+    """Effective pool/timeout/retry settings for `backend`."""
+    overrides = (CFG.get("http_backends") or {}).get(backend) or {}
+
+    def setting(key, default):
+        return overrides.get(key, CFG.get(f"http_{key}", default))
+
+    return {
+        "pool_connections": int(setting("pool_connections", 4)),
+        "pool_maxsize": int(setting("pool_maxsize", 8)),
+        "timeout": float(setting("timeout", DEFAULT_TIMEOUTS.get(backend, 15))),
+        "retries": int(setting("retries", 2)),
+        "backoff": float(setting("backoff", 0.3)),
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _counting_retry_class():
+    """urllib3's Retry, counting every retried failure in the `http_retries` metric."""
+    from urllib3.util.retry import Retry
+
+    class CountingRetry(Retry):
+        def __init__(self, *args, backend=None, **kwargs):
+            self.backend = backend
+            super().__init__(*args, **kwargs)
+
+        def new(self, **kwargs):
+            retry = super().new(**kwargs)
+            retry.backend = self.backend
+            return retry
+
+        def increment(self, *args, **kwargs):
+            metrics.inc("http_retries", backend=self.backend)
+            return super().increment(*args, **kwargs)
+
+    return CountingRetry
+
+
+def _build_session(backend: str) -> "requests.Session":
+    import requests
+    from requests.adapters import HTTPAdapter
+    settings = backend_settings(backend)
+    # Connection errors are retried for every method (the request never left);
+    # read errors and 502/503/504 only for idempotent methods, so a POST that
+    # reached the server is never silently replayed.
+    retry = _counting_retry_class()(
+        backend=backend,
+        total=settings["retries"],
+        connect=settings["retries"],
+        read=settings["retries"],
+        status=settings["retries"],
+        backoff_factor=settings["backoff"],
+        status_forcelist=(502, 503, 504),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=settings["pool_connections"], pool_maxsize=settings["pool_maxsize"], max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session(backend: str) -> "requests.Session":
+    """Return the pooled session for `backend`, creating it on first use."""
+    session = _sessions.get(backend)
+    if session is None:
+        with _lock:
+            session = _sessions.get(backend)
+            if session is None:
+                session = _sessions[backend] = _build_session(backend)
+    return session
+
+
+def get_timeout(backend: str) -> float:
+    """Configured request timeout (seconds) for `backend`."""
+    return backend_settings(backend)["timeout"]
+
+
+def close_all():
+    """Close every pooled session (e.g. on shutdown or after a config reload)."""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -2,9 +2,14 @@
 Minimal Flask interface for Nova status and memory.
 """
 
-from flask import Flask, render_template_string, redirect, url_for
-from memory_manager import load_memory, clear_memory, suggest_routine, get_routines, add_reminder, get_reminders
+import json
+
+from flask import Flask, render_template_string, redirect, url_for, jsonify
+from memory_manager import load_memory, clear_memory, suggest_routine, get_routine_details, add_reminder, get_reminders
 from text_to_speech import get_available_voices
+from speech_to_text import read_partial
+from reasoning_jobs import get_job_manager, JobQueueFull
+import metrics
 
 app = Flask(__name__)
 
@@ -28,11 +33,14 @@ TEMPLATE = """
         .reminder-btn { background: #2a7b4f; color: #fff; border: none; padding: 6px 12px; border-radius: 4px; cursor: pointer; margin-left: 8px; }
         .reminders { background: #fffbe6; color: #b8860b; padding: 10px; border-radius: 6px; margin-bottom: 18px; }
         .tts-select { background: #eaf1fa; color: #2a2a2a; padding: 10px; border-radius: 6px; margin-bottom: 18px; }
+        .partial { color: #777; font-style: italic; margin-bottom: 18px; min-height: 1em; }
     </style>
 </head>
 <body>
     <div class="container">
         <h1>Nova Status & Memory</h1>
+        <p><a href="/traces">Turn traces</a> &middot; <a href="/metrics">Metrics</a></p>
+        <div class="partial" id="partial-transcript"></div>
         <div class="tts-select">
             <form method="POST" action="/set_tts_voice">
                 <strong>TTS Voice:</strong>
@@ -56,22 +64,37 @@ TEMPLATE = """
         <div class="reminders">
             <strong>Active Reminders:</strong>
             {% if reminders %}
-                {{ reminders|join(", ") }}
+                {% for r in reminders %}{{ r.routine }}{% if r.time %} at {{ r.time }}{% endif %}{% if r.recurrence != "once" %} ({{ r.recurrence }}){% endif %}{% if not loop.last %}, {% endif %}{% endfor %}
             {% else %}
                 None
             {% endif %}
+            <form method="POST" action="/add_reminder" style="margin-top:8px;">
+                <input type="text" name="routine" placeholder="Remind me to...">
+                <input type="time" name="time">
+                <select name="recurrence">
+                    <option value="daily">Daily</option>
+                    <option value="weekdays">Weekdays</option>
+                    <option value="weekly">Weekly</option>
+                    <option value="once">Once</option>
+                    <option value="hourly">Hourly</option>
+                </select>
+                <button class="reminder-btn" type="submit">Add Reminder</button>
+            </form>
         </div>
         <form method="POST" action="/clear_memory">
             <button class="clear-btn" type="submit">Clear Memory</button>
         </form>
         <h2>Talk to Nova (Text)</h2>
-        <form method="POST" action="/text_input">
+        <form method="POST" action="/text_input" id="text-form">
             <input type="text" name="user_text" placeholder="Type your message..." style="width:80%;padding:8px;">
             <button type="submit">Send</button>
         </form>
-        {% if text_response %}
-            <div class="nova" style="margin-top:16px;"><strong>Nova:</strong> {{ text_response }}</div>
+        {% if text_error %}
+            <div class="nova" style="margin-top:16px;">{{ text_error }}</div>
         {% endif %}
+        <div class="nova" id="text-response" style="margin-top:16px;{% if not text_job %}display:none;{% endif %}">
+            <strong>Nova:</strong> <span id="text-response-body">{% if text_job %}{{ text_job.text }}{% endif %}</span>
+        </div>
         <h2>Recent Conversation</h2>
         {% for turn in memory %}
             <div class="turn">
@@ -82,12 +105,123 @@ TEMPLATE = """
             <p>No conversation history.</p>
         {% endfor %}
     </div>
+    <script>
+        // Show what Nova is hearing while the user is still speaking
+        setInterval(function () {
+            fetch("/partial_transcript").then(function (r) { return r.json(); }).then(function (p) {
+                var el = document.getElementById("partial-transcript");
+                el.textContent = p.text ? (p.final ? "Heard: " : "Hearing: ") + p.text : "";
+            }).catch(function () {});
+        }, 1000);
+
+        // Reasoning runs as a background job; its reply streams in over Server-Sent Events
+        function followJob(id) {
+            var box = document.getElementById("text-response");
+            var body = document.getElementById("text-response-body");
+            box.style.display = "";
+            body.textContent = "";
+            var source = new EventSource("/jobs/" + id + "/events");
+            source.onmessage = function (e) { body.textContent += JSON.parse(e.data).token; };
+            source.addEventListener("done", function (e) {
+                var job = JSON.parse(e.data);
+                body.textContent = job.error ? "Error: " + job.error : job.text;
+                source.close();
+            });
+        }
+        document.getElementById("text-form").addEventListener("submit", function (e) {
+            e.preventDefault();
+            var form = e.target;
+            fetch(form.action, {method: "POST", body: new FormData(form), headers: {"Accept": "application/json"}})
+                .then(function (r) { return r.json(); })
+                .then(function (r) {
+                    if (r.job_id) { followJob(r.job_id); form.reset(); }
+                    else if (r.error) { alert(r.error); }
+                });
+        });
+        {% if text_job and not text_job.done %}followJob("{{ text_job.id }}");{% endif %}
+    </script>
 </body>
 </html>
 """
 
 
 
+TRACES_TEMPLATE = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Nova Traces</title>
+    <meta http-equiv="refresh" content="10">
+    <style>
+        body { font-family: sans-serif; background: #f7f7f7; }
+        .container { max-width: 900px; margin: 40px auto; background: #fff; padding: 24px; border-radius: 8px; box-shadow: 0 2px 8px #ccc; }
+        h1 { color: #2a2a2a; }
+        table { border-collapse: collapse; width: 100%; margin-bottom: 24px; }
+        td, th { text-align: left; padding: 2px 8px; font-size: 13px; }
+        .trace { margin-bottom: 20px; }
+        .trace-head { font-size: 14px; margin-bottom: 4px; }
+        .row { display: flex; align-items: center; font-size: 12px; height: 18px; }
+        .label { width: 140px; flex: none; color: #555; }
+        .lane { position: relative; flex: 1; height: 12px; background: #f0f0f0; }
+        .bar { position: absolute; top: 0; height: 12px; min-width: 1px; background: #0074d9; }
+        .ms { width: 80px; flex: none; text-align: right; color: #555; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>Turn Traces</h1>
+        <p><a href="/">Back</a> &middot; <a href="/traces.json">JSON</a> &middot; <a href="/metrics">Prometheus metrics</a></p>
+        <h2>Spans</h2>
+        {% if summary %}
+            <table>
+                <tr><th>Process</th><th>Span</th><th>Count</th><th>p50 (ms)</th><th>p95 (ms)</th><th>Mean (ms)</th></tr>
+                {% for (process, name), s in summary %}
+                    <tr><td>{{ process }}</td><td>{{ name }}</td><td>{{ s.count }}</td><td>{{ s.p50_ms }}</td><td>{{ s.p95_ms }}</td><td>{{ s.mean_ms }}</td></tr>
+                {% endfor %}
+            </table>
+        {% else %}
+            <p>No spans recorded yet.</p>
+        {% endif %}
+        <h2>Recent Turns</h2>
+        {% for t in traces %}
+            <div class="trace">
+                <div class="trace-head"><strong>{{ t.name }} {{ t.id }}</strong> ({{ t.process }}) {{ t.duration_ms }} ms
+                    {% if t.attrs.outcome %}&middot; {{ t.attrs.outcome }}{% endif %}
+                    {% if t.attrs.transcript %}&middot; "{{ t.attrs.transcript }}"{% endif %}</div>
+                {% for s in t.spans %}
+                    <div class="row">
+                        <div class="label">{{ s.name }}</div>
+                        <div class="lane"><div class="bar" style="left:{{ s.left }}%;width:{{ s.width }}%;"></div></div>
+                        <div class="ms">{{ s.duration_ms }} ms</div>
+                    </div>
+                {% endfor %}
+            </div>
+        {% else %}
+            <p>No traces recorded yet.</p>
+        {% endfor %}
+    </div>
+</body>
+</html>
+"""
+
+
+def _metric_snapshots():
+    """The voice loop's last snapshot (written by main.py) and this process's own metrics."""
+    return [snap for snap in (metrics.read_snapshot(), metrics.snapshot("dashboard")) if snap]
+
+
+def _recent_traces(snapshots, limit=20):
+    """The latest traces of every process, newest first, with waterfall offsets in percent."""
+    traces = []
+    for snap in snapshots:
+        for t in snap.get("traces", []):
+            total = max([t["duration_ms"]] + [s["start_ms"] + s["duration_ms"] for s in t["spans"]]) or 1.0
+            spans = [dict(s, left=round(100.0 * max(s["start_ms"], 0.0) / total, 2), width=round(100.0 * s["duration_ms"] / total, 2))
+                     for s in t["spans"]]
+            traces.append(dict(t, process=snap.get("process"), spans=spans))
+    traces.sort(key=lambda t: t["started"], reverse=True)
+    return traces[:limit]
+
 
 from flask import session
 app.secret_key = "nova_secret_key"
@@ -95,28 +229,65 @@ app.secret_key = "nova_secret_key"
 @app.route("/")
 def index():
     memory = load_memory()
-    routine_suggestion = suggest_routine()
-    routines = get_routines()
+    details = get_routine_details()
+    routine_suggestion = suggest_routine(details)
+    routines = [r["keyword"] for r in details]
     reminders = get_reminders()
     voices = get_available_voices()
     selected_voice = session.get("tts_voice", "en_US")
-    text_response = session.pop("text_response", None)
-    return render_template_string(TEMPLATE, memory=memory, routine_suggestion=routine_suggestion, routines=routines, reminders=reminders, voices=voices, selected_voice=selected_voice, text_response=text_response)
+    text_job = get_job_manager().get(session.pop("text_job", None))
+    text_error = session.pop("text_error", None)
+    return render_template_string(TEMPLATE, memory=memory, routine_suggestion=routine_suggestion, routines=routines, reminders=reminders, voices=voices, selected_voice=selected_voice, text_job=text_job, text_error=text_error)
 @app.route("/text_input", methods=["POST"])
 def text_input():
     from flask import request
     user_text = request.form.get("user_text")
-    response = ""
-    if user_text:
-        # Reasoning engine
-        from reasoning_engine import query_ollama
-        try:
-            response = query_ollama(user_text, endpoint="http://localhost:11434/api/generate", model="llama3")
-        except Exception as e:
-            response = f"Error: {e}"
-        session["text_response"] = response
+    wants_json = request.accept_mimetypes.best == "application/json"
+    if not user_text:
+        return (jsonify(error="Empty message"), 400) if wants_json else redirect(url_for('index'))
+    # Reasoning runs in the background; the reply is streamed from /jobs/<id>/events
+    try:
+        job = get_job_manager().submit(user_text, endpoint="http://localhost:11434/api/generate", model="llama3")
+    except JobQueueFull:
+        if wants_json:
+            return jsonify(error="Nova is busy, please try again in a moment."), 503
+        session["text_error"] = "Nova is busy, please try again in a moment."
+        return redirect(url_for('index'))
+    if wants_json:
+        return jsonify(job_id=job.id), 202
+    session["text_job"] = job.id
     return redirect(url_for('index'))
 
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify(error="Unknown job"), 404
+    return jsonify(job.to_dict())
+
+@app.route("/jobs/<job_id>/events")
+def job_events(job_id):
+    from flask import request, Response, stream_with_context
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify(error="Unknown job"), 404
+    try:
+        # A reconnecting EventSource resumes after the last token it received
+        start = int(request.headers.get("Last-Event-ID", -1)) + 1
+    except ValueError:
+        start = 0
+
+    def generate():
+        yield "retry: 500\n\n"
+        for index, chunk in job.events(start, timeout=15.0):
+            yield f"id: {index}\ndata: {json.dumps({'token': chunk})}\n\n"
+        if job.done:
+            yield f"event: done\ndata: {json.dumps(job.to_dict())}\n\n"
+        # Otherwise the stream ends after 15 s without tokens and the browser reconnects
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.route("/set_tts_voice", methods=["POST"])
 def set_tts_voice():
     from flask import request
@@ -130,13 +301,37 @@ def add_reminder_route():
     from flask import request
     routine = request.form.get("routine")
     if routine:
-        add_reminder(routine)
+        time_str = request.form.get("time") or None
+        recurrence = request.form.get("recurrence") or None
+        try:
+            add_reminder(routine, time_str, recurrence if time_str or recurrence == "hourly" else None)
+        except ValueError as e:
+            print("Invalid reminder:", e)
     return redirect(url_for('index'))
 
+@app.route("/partial_transcript")
+def partial_transcript():
+    return jsonify(read_partial())
+
+@app.route("/metrics")
+def metrics_route():
+    from flask import Response
+    return Response(metrics.render_prometheus(_metric_snapshots()), mimetype="text/plain; version=0.0.4")
+
+@app.route("/traces")
+def traces():
+    snapshots = _metric_snapshots()
+    summary = sorted(metrics.span_summary(snapshots).items())
+    return render_template_string(TRACES_TEMPLATE, traces=_recent_traces(snapshots), summary=summary)
+
+@app.route("/traces.json")
+def traces_json():
+    return jsonify(traces=_recent_traces(_metric_snapshots()))
+
 @app.route("/clear_memory", methods=["POST"])
 def clear():
     clear_memory()
     return redirect(url_for('index'))
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=False)
+    app.run(host="0.0.0.0", port=5000, debug=False, threaded=True)
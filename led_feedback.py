@@ -1,18 +1,33 @@
 """
 Controls LED ring or RGB light for Nova's state feedback.
+
+Animations run on a dedicated thread (LedController) at a fixed frame rate
+(`led_fps` in config/config.yaml); set_led_state() only posts the target
+state and returns immediately, so the voice loop never waits for the ring.
+Each state's animation is precomputed once as NumPy arrays (packed 24-bit
+colours per pixel and a brightness per frame), so drawing a frame only
+pushes the pixels that changed since the previous one. FakePixelStrip
+records what would be shown, for tests and machines without the ring.
 """
 
+import threading
 import time
+import numpy as np
+import config_loader
 try:
 	from rpi_ws281x import PixelStrip, Color
 except ImportError:
 	PixelStrip = None
 	Color = None
 
+
+CFG = config_loader.load()
+
 # LED configuration
 LED_COUNT = 12      # Number of LED pixels
 LED_PIN = 18        # GPIO pin (default)
 LED_BRIGHTNESS = 64 # Brightness (0-255)
+LED_FPS = float(CFG.get("led_fps", 30))
 
 def setup_led():
 	if PixelStrip is None:
@@ -22,47 +37,229 @@ def setup_led():
 	strip.begin()
 	return strip
 
+
+def pack_rgb(r, g, b):
+	"""24-bit colours like rpi_ws281x.Color(), for scalars or arrays."""
+	return (np.asarray(r, dtype=np.uint32) << 16) | (np.asarray(g, dtype=np.uint32) << 8) | np.asarray(b, dtype=np.uint32)
+
+
+class Frames:
+	"""A precomputed animation: colours (frames x pixels, packed RGB) and brightness per frame."""
+
+	def __init__(self, colors, brightness):
+		self.colors = np.ascontiguousarray(colors, dtype=np.uint32)
+		self.brightness = np.ascontiguousarray(brightness, dtype=np.uint8)
+
+	def __len__(self):
+		return len(self.colors)
+
+
+def _solid(color, count, brightness):
+	return Frames(np.full((1, count), color, dtype=np.uint32), [brightness])
+
+
+def _brightness_wave(color, count, fps, period, low, high, shape):
+	"""One period of a brightness animation on a solid colour."""
+	n = max(2, int(round(period * fps)))
+	phase = np.arange(n) / n
+	if shape == "triangle":
+		wave = 1.0 - np.abs(2.0 * phase - 1.0)
+	else:  # smooth breathing
+		wave = 0.5 - 0.5 * np.cos(2.0 * np.pi * phase)
+	levels = np.round(low + (high - low) * wave)
+	return Frames(np.full((n, count), color, dtype=np.uint32), levels)
+
+
+def _rainbow(count, fps, period, brightness):
+	"""The ring's rainbow, rotated by one pixel every period / count seconds."""
+	j = np.arange(count)
+	base = pack_rgb((j * 20) % 255, (255 - j * 20) % 255, (j * 10) % 255)
+	steps = max(1, int(round(period * fps / count)))
+	rotations = np.stack([np.roll(base, i) for i in range(count)])
+	return Frames(np.repeat(rotations, steps, axis=0), np.full(count * steps, brightness))
+
+
+def build_frames(count=LED_COUNT, brightness=LED_BRIGHTNESS, fps=LED_FPS) -> dict:
+	"""The animation of every state, computed for `count` pixels at `fps`."""
+	low = min(20, brightness)
+	return {
+		"listening": _brightness_wave(pack_rgb(0, 0, 255), count, fps, 2.0, low, brightness, "breathing"),  # Soft blue
+		"thinking": _brightness_wave(pack_rgb(255, 255, 255), count, fps, 0.8, low, brightness, "triangle"),  # White pulse
+		"speaking": _rainbow(count, fps, 1.2, brightness),
+		"idle": _solid(0, count, brightness),  # Off
+	}
+
+
+class LedController:
+	"""
+	Draws the current state's animation on `strip` from its own thread at
+	`fps` frames per second. Single-frame states are drawn once and the
+	thread then sleeps until the next post().
+	"""
+
+	def __init__(self, strip, fps=LED_FPS, count=LED_COUNT, brightness=LED_BRIGHTNESS):
+		self.strip = strip
+		self.fps = float(fps)
+		self.frames = build_frames(count, brightness, self.fps)
+		self._target = "idle"
+		self._version = 0
+		self._stopped = False
+		self._cond = threading.Condition()
+		self._shown = None           # colours currently on the strip
+		self._shown_brightness = None
+		self.frames_drawn = 0
+		self.frames_skipped = 0
+		self._thread = threading.Thread(target=self._run, name="nova-led", daemon=True)
+		self._thread.start()
+
+	@property
+	def state(self):
+		return self._target
+
+	def post(self, state):
+		"""Switch to `state` (unknown states turn the ring off); returns immediately."""
+		with self._cond:
+			self._target = state if state in self.frames else "idle"
+			self._version += 1
+			self._cond.notify()
+
+	def stop(self, timeout=1.0, turn_off=True):
+		"""Stop the thread, then (by default) turn the ring off."""
+		with self._cond:
+			self._stopped = True
+			self._cond.notify()
+		self._thread.join(timeout)
+		if turn_off and not self._thread.is_alive():
+			try:
+				self._draw(self.frames["idle"], 0)
+			except Exception as e:
+				print("LED error:", e)
+
+	def _draw(self, frames, i):
+		colors = frames.colors[i]
+		if self._shown is None:
+			changed = range(len(colors))
+		else:
+			changed = np.flatnonzero(colors != self._shown)
+		for p in changed:
+			self.strip.setPixelColor(int(p), int(colors[p]))
+		brightness = int(frames.brightness[i])
+		if brightness != self._shown_brightness:
+			self.strip.setBrightness(brightness)
+		self.strip.show()
+		self._shown = colors
+		self._shown_brightness = brightness
+		self.frames_drawn += 1
+
+	def _run(self):
+		interval = 1.0 / self.fps
+		version = None
+		while True:
+			with self._cond:
+				if self._stopped:
+					return
+				if version == self._version:
+					# Nothing animating: sleep until the state changes
+					self._cond.wait()
+					continue
+				version, frames = self._version, self.frames[self._target]
+			started = time.monotonic()
+			n = 0
+			while True:
+				try:
+					self._draw(frames, n % len(frames))
+				except Exception as e:
+					print("LED error:", e)
+					break
+				if len(frames) == 1:
+					break
+				# Frames are scheduled from the state's start time, so timing does
+				# not drift; frames that are already late are skipped, not queued
+				n += 1
+				due = started + n * interval
+				now = time.monotonic()
+				if now > due + interval:
+					late = int((now - due) / interval)
+					n += late
+					self.frames_skipped += late
+					due = started + n * interval
+				with self._cond:
+					if self._stopped or version != self._version:
+						break
+					self._cond.wait(max(0.0, due - time.monotonic()))
+					if self._stopped or version != self._version:
+						break
+
+
+class FakePixelStrip:
+	"""
+	Stand-in for rpi_ws281x.PixelStrip that records every show() as
+	(monotonic time, pixel colours, brightness) in `shows`.
+	"""
+
+	def __init__(self, num, pin=LED_PIN, brightness=LED_BRIGHTNESS):
+		self._pixels = [0] * num
+		self._brightness = brightness
+		self.shows = []
+		self._lock = threading.Lock()
+
+	def begin(self):
+		pass
+
+	def numPixels(self):
+		return len(self._pixels)
+
+	def setPixelColor(self, n, color):
+		self._pixels[n] = color
+
+	def getPixelColor(self, n):
+		return self._pixels[n]
+
+	def setBrightness(self, brightness):
+		self._brightness = brightness
+
+	def getBrightness(self):
+		return self._brightness
+
+	def show(self):
+		with self._lock:
+			self.shows.append((time.monotonic(), tuple(self._pixels), self._brightness))
+
+	def snapshot(self):
+		with self._lock:
+			return list(self.shows)
+
+
+_CONTROLLERS = {}
+_controllers_lock = threading.Lock()
+
+
+def get_controller(strip) -> LedController:
+	"""The LedController driving `strip`, started on first use."""
+	with _controllers_lock:
+		controller = _CONTROLLERS.get(id(strip))
+		if controller is None or controller.strip is not strip:
+			controller = _CONTROLLERS[id(strip)] = LedController(strip)
+		return controller
+
+
 def set_led_state(strip, state: str):
 	"""
 	Set LED color/effect based on Nova state.
-	States: listening, thinking, speaking, idle
-	Advanced: breathing, rainbow, pulse animations.
+	States: listening (blue breathing), thinking (white pulse),
+	speaking (rotating rainbow), idle (off).
+	Returns immediately; the animation runs on the strip's controller thread.
 	"""
 	if strip is None:
 		return
-	color_map = {
-		"listening": Color(0, 0, 255),    # Soft blue
-		"thinking": Color(255, 255, 255), # White pulse
-		"speaking": Color(255, 140, 0),   # Warm amber
-		"idle": Color(0, 0, 0)            # Off
-	}
-	color = color_map.get(state, Color(0, 0, 0))
-	for i in range(LED_COUNT):
-		strip.setPixelColor(i, color)
-	strip.show()
-	if state == "thinking":
-		# Pulse effect
-		for b in range(20, LED_BRIGHTNESS, 5):
-			strip.setBrightness(b)
-			strip.show()
-			time.sleep(0.03)
-		for b in range(LED_BRIGHTNESS, 20, -5):
-			strip.setBrightness(b)
-			strip.show()
-			time.sleep(0.03)
-	if state == "listening":
-		# Breathing animation stub
-		for b in range(20, LED_BRIGHTNESS, 8):
-			strip.setBrightness(b)
-			strip.show()
-			time.sleep(0.05)
-		for b in range(LED_BRIGHTNESS, 20, -8):
-			strip.setBrightness(b)
-			strip.show()
-			time.sleep(0.05)
-	if state == "speaking":
-		# Rainbow animation stub
-		for j in range(LED_COUNT):
-			strip.setPixelColor(j, Color((j*20)%255, (255-j*20)%255, (j*10)%255))
-		strip.show()
-		time.sleep(0.2)
+	get_controller(strip).post(state)
+
+
+def stop_led(strip):
+	"""Turn the ring off and stop its controller thread."""
+	if strip is None:
+		return
+	with _controllers_lock:
+		controller = _CONTROLLERS.pop(id(strip), None)
+	if controller is not None:
+		controller.stop()
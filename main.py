@@ -1,18 +1,30 @@
 """
 Nova: The Ambient Personal AI
 Main entry point for the offline AI assistant.
+
+Heavy dependencies (sounddevice, requests) are imported on first use, and the
+backends are warmed up in the background while Nova listens for the first
+time. Startup is timed against `startup_budget_ms`; see benchmarks/import_time.py
+for where import time goes.
 """
 
-from nova.audio_input import record_audio
-from nova.speech_to_text import transcribe_audio
-from nova.reasoning_engine import query_ollama
-from nova.text_to_speech import synthesize_speech
-from nova.memory_manager import save_turn, clear_memory, check_due_reminders
-from nova.led_feedback import setup_led, set_led_state
+import time
+# Taken before the imports below, so the startup time includes them
+STARTED = time.perf_counter()
+
+from nova.audio_input import record_audio, record_until_silence
+from nova.speech_to_text import transcribe_audio, StreamingTranscriber, publish_partial, warm_up as warm_up_stt
+from nova.reasoning_engine import stream_ollama, iter_sentences, preload_model
+from nova.text_to_speech import synthesize_stream, prewarm_cache, pin_phrases, get_available_voices
+from nova.memory_manager import save_turn, get_reminders, get_scheduler
+from nova.led_feedback import setup_led, set_led_state, stop_led
+from nova.voice_pipeline import VoicePipeline
 
-import yaml
 import os
-import time
+import threading
+# Shared with the backend modules, which import them as top-level modules too
+import metrics
+import config_loader
 from nova.plugins.plugin_manager import NovaPluginManager
 
 
@@ -26,19 +38,89 @@ def load_tts_config():
                 selected_voice = f.read().strip()
         except Exception:
             selected_voice = None
-    try:
-        with open("config/config.yaml", "r") as f:
-            cfg = yaml.safe_load(f)
-        return {
-            "voice": selected_voice or cfg.get("coqui_tts_voice", "en_US"),
-            "speaker": cfg.get("coqui_tts_speaker", "default"),
-            "style": cfg.get("coqui_tts_style", "neutral")
-        }
-    except Exception as e:
-        print("Error loading TTS config:", e)
-        return {"voice": selected_voice or "en_US", "speaker": "default", "style": "neutral"}
+    cfg = config_loader.load()
+    return {
+        "endpoint": cfg.get("coqui_tts_endpoint", "http://localhost:5002/api/tts"),
+        "voice": selected_voice or cfg.get("coqui_tts_voice", "en_US"),
+        "speaker": cfg.get("coqui_tts_speaker", "default"),
+        "style": cfg.get("coqui_tts_style", "neutral")
+    }
+
+def load_pipeline_config():
+    cfg = config_loader.load()
+    return {
+        "queue_size": int(cfg.get("pipeline_queue_size", 2)),
+        "barge_in": bool(cfg.get("pipeline_barge_in", False)),
+        "barge_in_energy": float(cfg.get("vad_barge_in_energy_threshold", 0.08)),
+        "idle_delay": float(cfg.get("pipeline_idle_delay", 0)),
+        "vad_enabled": bool(cfg.get("vad_enabled", True)),
+        "stt_streaming": bool(cfg.get("stt_streaming", True)),
+        "ollama_endpoint": cfg.get("ollama_endpoint", "http://localhost:11434/api/generate"),
+        "ollama_model": cfg.get("ollama_model", "llama3"),
+        "warmup_enabled": bool(cfg.get("warmup_enabled", True)),
+        "startup_budget_ms": float(cfg.get("startup_budget_ms", 0)),
+    }
+
+
+def load_prewarm_phrases():
+    return list(config_loader.load().get("tts_prewarm_phrases") or [])
+
+
+def reminder_text(reminder):
+    return f"Reminder: {reminder['routine']}."
+
 
-def main():
+def prewarm_tts(tts_cfg):
+    # Check the voice exists, then cache reminder announcements and fixed phrases so they play instantly
+    voices = get_available_voices(tts_cfg["endpoint"].rsplit("/", 1)[0] + "/voices")
+    if voices and tts_cfg["voice"] not in [v.get("name") for v in voices]:
+        print(f"TTS voice {tts_cfg['voice']!r} is not offered by the Coqui server.")
+    phrases = [reminder_text(r) for r in get_reminders()] + load_prewarm_phrases()
+    warmed = prewarm_cache(
+        phrases,
+        tts_endpoint=tts_cfg["endpoint"],
+        voice=tts_cfg["voice"],
+        speaker=tts_cfg["speaker"],
+        style=tts_cfg["style"]
+    )
+    if warmed:
+        print(f"Pre-warmed {warmed} TTS phrases.")
+
+
+def warm_up(tts_cfg, pipeline_cfg):
+    """Load the Ollama model, warm up whisper.cpp and Coqui in parallel background threads."""
+    tasks = {
+        "ollama": lambda: preload_model(endpoint=pipeline_cfg["ollama_endpoint"], model=pipeline_cfg["ollama_model"]),
+        "whisper": warm_up_stt,
+        "tts": lambda: prewarm_tts(tts_cfg),
+    }
+
+    def run(name, task):
+        started = time.perf_counter()
+        try:
+            with metrics.span(f"warmup_{name}"):
+                task()
+        except Exception as e:
+            print(f"Warm-up error ({name}):", e)
+        print(f"Warm-up {name}: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    threads = [threading.Thread(target=run, args=item, name=f"nova-warmup-{item[0]}", daemon=True) for item in tasks.items()]
+    for t in threads:
+        t.start()
+    return threads
+
+
+def report_startup(budget_ms):
+    elapsed = time.perf_counter() - STARTED
+    metrics.record_span("startup", STARTED, elapsed)
+    print(f"Nova is ready for interaction ({elapsed * 1000:.0f} ms).")
+    if budget_ms and elapsed * 1000 > budget_ms:
+        print(f"Startup took {elapsed * 1000:.0f} ms, over the {budget_ms:.0f} ms budget (startup_budget_ms); "
+              "python -m benchmarks.import_time shows where import time goes.")
+
+
+def main(stats=None):
+    """Run the voice loop until interrupted. `stats` optionally collects the stage timings (a StageStats)."""
     print("Nova: Ambient Personal AI - Starting up...")
     strip = None
     try:
@@ -46,101 +128,117 @@ def main():
     except Exception as e:
         print("LED setup error:", e)
     tts_cfg = load_tts_config()
+    pipeline_cfg = load_pipeline_config()
     plugin_manager = NovaPluginManager()
-    while True:
-        # Sleep/wake cycle: sleep for 10 seconds between interactions (simulated low-power mode)
-        print("Nova is idle. Sleeping for 10 seconds...")
-        try:
-            set_led_state(strip, "idle")
-        except Exception as e:
-            print("LED idle state error:", e)
-        time.sleep(10)
-        # Check for due reminders and notify user
-        due_reminders = check_due_reminders()
-        for r in due_reminders:
-            try:
-                set_led_state(strip, "speaking")
-            except Exception:
-                pass
-            try:
-                synthesize_speech(
-                    f"Reminder: {r['routine']}.",
-                    tts_endpoint="http://localhost:5002/api/tts",
-                    output_path="nova_reminder.wav",
-                    voice=tts_cfg["voice"],
-                    speaker=tts_cfg["speaker"],
-                    style=tts_cfg["style"]
-                )
-            except Exception as e:
-                print("TTS reminder error:", e)
-        print("Nova waking up. Ready for interaction.")
-        # Listening state
-        try:
-            set_led_state(strip, "listening")
-        except Exception as e:
-            print("LED listening state error:", e)
-        audio_file = "temp_input.wav"
-        try:
-            record_audio(audio_file, duration=5)
-        except Exception as e:
-            print("Audio input error:", e)
-            print("Nova could not record audio. Please check your microphone.")
-            continue
-        # Thinking state
-        try:
-            set_led_state(strip, "thinking")
-        except Exception as e:
-            print("LED thinking state error:", e)
-        transcript = ""
-        try:
-            transcript = transcribe_audio(audio_file, whisper_path="./whisper.cpp/main")
-            print("Transcript:", transcript)
-        except Exception as e:
-            print("Speech-to-text error:", e)
-            print("Nova could not transcribe audio.")
-            continue
-        # Run plugins and collect results
-        plugin_results = plugin_manager.run_all({"transcript": transcript})
-        for pname, presult in plugin_results.items():
-            print(f"Plugin [{pname}]: {presult}")
-        # Reasoning engine
-        if transcript:
+
+    def on_partial(text, final):
+        if not final:
+            print("Partial transcript:", text)
+        publish_partial(text, final)
+
+    def capture():
+        # Audio stays in memory; temp_input.wav is only written in debug mode
+        if not pipeline_cfg["vad_enabled"]:
+            return record_audio("temp_input.wav", duration=5), None
+        transcriber = None
+        if pipeline_cfg["stt_streaming"]:
+            # Transcribe while the user is still speaking
+            transcriber = StreamingTranscriber(on_partial=on_partial, whisper_path="./whisper.cpp/main")
+        # While a reply is playing, only speech clearly louder than the speaker starts a capture
+        threshold = pipeline_cfg["barge_in_energy"] if pipeline.speaking else None
+        audio = record_until_silence("temp_input.wav", on_audio=transcriber.feed if transcriber else None, energy_threshold=threshold)
+        if audio is None:
+            if transcriber:
+                transcriber.finalize()
+            return None
+        return audio, transcriber
+
+    def transcribe(captured):
+        audio, transcriber = captured
+        if transcriber is not None:
+            return transcriber.finalize(audio)
+        return transcribe_audio(audio, whisper_path="./whisper.cpp/main")
+
+    def run_plugins(transcript):
+        return plugin_manager.run_all({"transcript": transcript})
+
+    def reason(transcript, plugin_results):
+        # Simple plugin queries ("what's the weather?") are answered without the LLM
+        answer = plugin_manager.direct_answer(transcript, plugin_results)
+        if answer:
+            yield answer
+            return
+        got_reply = False
+        # Plugin results are part of the cache key so a changed context never gets a stale reply
+        replies = stream_ollama(transcript, endpoint=pipeline_cfg["ollama_endpoint"], model=pipeline_cfg["ollama_model"], cache_context=plugin_results)
+        for sentence in iter_sentences(replies):
+            got_reply = True
+            yield sentence
+        # Combine plugin results with LLM response
+        if got_reply:
+            for pname, presult in plugin_results.items():
+                yield f"{pname}: {presult}"
+
+    def speak(sentences, cancel, on_play):
+        synthesize_stream(
+            sentences,
+            tts_endpoint=tts_cfg["endpoint"],
+            output_path="nova_reply.wav",
+            voice=tts_cfg["voice"],
+            speaker=tts_cfg["speaker"],
+            style=tts_cfg["style"],
+            cancel=cancel,
+            on_play=on_play
+        )
+
+    def set_state(state):
+        # Only posts the state; the LED controller thread draws the animation
+        set_led_state(strip, state)
+
+    def announce_reminders(pipeline):
+        # Sleeps until the next reminder is due (or one is added) and announces it
+        scheduler = get_scheduler()
+        while not pipeline.stopped.is_set():
             try:
-                response = query_ollama(transcript, endpoint="http://localhost:11434/api/generate", model="llama3")
-                print("Nova Response:", response)
+                due = scheduler.wait(timeout=1.0, stop_event=pipeline.stopped)
             except Exception as e:
-                print("Reasoning engine error:", e)
-                print("Nova could not process your request.")
+                print("Reminder scheduler error:", e)
+                if pipeline.stopped.wait(5.0):
+                    return
                 continue
-            # Combine plugin results with LLM response
-            full_response = response
-            if plugin_results:
-                full_response += "\n" + "\n".join([f"{pname}: {presult}" for pname, presult in plugin_results.items()])
-            if response:
-                try:
-                    set_led_state(strip, "speaking")
-                except Exception as e:
-                    print("LED speaking state error:", e)
-                try:
-                    synthesize_speech(
-                        full_response,
-                        tts_endpoint="http://localhost:5002/api/tts",
-                        output_path="nova_reply.wav",
-                        voice=tts_cfg["voice"],
-                        speaker=tts_cfg["speaker"],
-                        style=tts_cfg["style"]
-                    )
-                except Exception as e:
-                    print("TTS error:", e)
-                    print("Nova could not speak the response.")
-                try:
-                    save_turn(transcript, full_response)
-                except Exception as e:
-                    print("Memory save error:", e)
-            else:
-                print("No response from reasoning engine.")
-        else:
-            print("No transcript to process.")
+            for r in due:
+                # Announcements are cached on first use; they will be repeated
+                pin_phrases([reminder_text(r)], voice=tts_cfg["voice"], speaker=tts_cfg["speaker"], style=tts_cfg["style"])
+                pipeline.announce(reminder_text(r))
+
+    pipeline = VoicePipeline(
+        capture=capture,
+        transcribe=transcribe,
+        plugins=run_plugins,
+        reason=reason,
+        speak=speak,
+        persist=save_turn,
+        set_state=set_state,
+        queue_size=pipeline_cfg["queue_size"],
+        barge_in=pipeline_cfg["barge_in"],
+        idle_delay=pipeline_cfg["idle_delay"],
+        stats=stats,
+    )
+    threading.Thread(target=announce_reminders, args=(pipeline,), name="nova-reminders", daemon=True).start()
+    metrics.start_exporter("voice")
+    if pipeline_cfg["warmup_enabled"]:
+        # Runs while the capture stage waits for the first utterance
+        warm_up(tts_cfg, pipeline_cfg)
+    report_startup(pipeline_cfg["startup_budget_ms"])
+    pipeline.run_forever()
+    print("Stage latency summary:", pipeline.stats.snapshot())
+    print("Plugin latency summary:", plugin_manager.stats())
+    print("Plugin cache:", plugin_manager.cache_stats())
+    print("Plugin workers:", plugin_manager.worker_stats())
+    plugin_manager.shutdown()
+    stop_led(strip)
+    metrics.write_snapshot("voice")
+
 
 if __name__ == "__main__":
     main()
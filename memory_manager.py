@@ -1,94 +1,195 @@
 """
 Manages local memory, conversation history, and privacy controls.
+
+The full conversation history is kept in an append-only SQLite store
+(conversation_store.py); MEMORY_LIMIT only bounds the context window that
+load_memory() returns. Routines are detected by an index over the same
+database that is updated as turns are saved (routine_index.py), and older
+turns related to a new prompt are recalled from a vector index over the
+whole history (semantic_memory.py).
 """
 
 import json
 import os
+import threading
+import config_loader
+from conversation_store import ConversationStore
+from routine_index import RoutineIndex, normalize_keywords
+from reminder_scheduler import ReminderScheduler
+from semantic_memory import SemanticMemory
+
 
+CFG = config_loader.load()
+
+MEMORY_DB = "logs/conversation_history.db"
+# Legacy whole-file history, imported into MEMORY_DB on first use.
 MEMORY_FILE = "logs/conversation_history.json"
 MEMORY_LIMIT = 20
 
+_store = None
+_routine_index = None
+_semantic_memory = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> ConversationStore:
+	global _store
+	with _store_lock:
+		if _store is None or _store.path != MEMORY_DB:
+			_store = ConversationStore(MEMORY_DB)
+			try:
+				_store.import_json(MEMORY_FILE)
+			except Exception as e:
+				print("Error migrating conversation history:", e)
+		return _store
+
+
+def get_routine_index() -> RoutineIndex:
+	global _routine_index
+	store = get_store()
+	keywords = normalize_keywords(CFG.get("routine_keywords"))
+	with _store_lock:
+		if _routine_index is None or _routine_index.store is not store or _routine_index.keywords != keywords:
+			_routine_index = RoutineIndex(store, keywords)
+		return _routine_index
+
 
-def load_memory():
-	if not os.path.exists(MEMORY_FILE):
+def get_semantic_memory() -> SemanticMemory:
+	global _semantic_memory
+	store = get_store()
+	with _store_lock:
+		if _semantic_memory is None or _semantic_memory.store is not store:
+			_semantic_memory = SemanticMemory(
+				store,
+				# Next to the database it indexes
+				os.path.splitext(MEMORY_DB)[0] + "_vectors",
+				dim=int(CFG.get("semantic_memory_dim", 256)),
+				dtype=CFG.get("semantic_memory_dtype", "int8"),
+			)
+		return _semantic_memory
+
+
+def load_memory(limit: int = None):
+	"""
+	Returns the context window: the last `limit` turns (default MEMORY_LIMIT), oldest first.
+	"""
+	try:
+		return get_store().recent(MEMORY_LIMIT if limit is None else limit)
+	except Exception as e:
+		print("Error loading conversation history:", e)
+		return []
+
+def recall_turns(text: str, k: int = None, exclude_recent: int = 0):
+	"""
+	Earlier turns related to `text`, oldest first, from the whole history.
+	The newest `exclude_recent` turns are skipped, as they are already in the
+	context window (turn ids are consecutive: the history is only ever
+	cleared as a whole).
+	"""
+	if not CFG.get("semantic_memory_enabled", False):
+		return []
+	try:
+		store = get_store()
+		exclude_after = store.last_id() - exclude_recent if exclude_recent else None
+		return get_semantic_memory().recall(
+			text,
+			k=int(CFG.get("semantic_memory_top_k", 3)) if k is None else k,
+			exclude_after=exclude_after,
+			min_score=float(CFG.get("semantic_memory_min_score", 0.1)),
+		)
+	except Exception as e:
+		print("Error recalling conversation history:", e)
+		return []
+
+def get_routine_details():
+	"""
+	Recurring requests with their counts and time-of-day histograms (see
+	RoutineIndex.routines), for keywords mentioned in at least
+	`routine_min_count` turns.
+	"""
+	try:
+		return get_routine_index().routines(int(CFG.get("routine_min_count", 2)))
+	except Exception as e:
+		print("Error reading routine index:", e)
 		return []
-	with open(MEMORY_FILE, "r") as f:
-		try:
-			return json.load(f)
-		except Exception:
-			return []
 
 def get_routines():
 	"""
-	Analyze memory for recurring requests (simple keyword-based routine detection).
+	Analyze memory for recurring requests (keyword-based routine detection).
 	Returns a list of detected routines (e.g., reminders, meetings).
 	"""
-	memory = load_memory()
-	routines = {}
-	for turn in memory:
-		user_text = turn.get("user", "").lower()
-		# Simple keyword detection for routines
-		for keyword in ["remind", "meeting", "drink water", "study", "exercise"]:
-			if keyword in user_text:
-				routines[keyword] = routines.get(keyword, 0) + 1
-	# Return routines that occurred more than once
-	return [k for k, v in routines.items() if v > 1]
-
-def suggest_routine():
+	return [r["keyword"] for r in get_routine_details()]
+
+def suggest_routine(details=None):
 	"""
 	Suggest a routine to the user based on detected patterns.
+	`details` may be passed to reuse a get_routine_details() result.
 	"""
-	routines = get_routines()
-	if routines:
-		return f"You seem to often mention: {', '.join(routines)}. Would you like a regular reminder?"
+	if details is None:
+		details = get_routine_details()
+	if details:
+		mentions = ", ".join(f"{r['keyword']} (usually around {r['peak_hour']:02d}:00)" for r in details)
+		return f"You seem to often mention: {mentions}. Would you like a regular reminder?"
 	return "No recurring routines detected yet."
 
 def save_turn(user_text: str, nova_response: str):
-	memory = load_memory()
-	memory.append({"user": user_text, "nova": nova_response})
-	if len(memory) > MEMORY_LIMIT:
-		memory = memory[-MEMORY_LIMIT:]
-	with open(MEMORY_FILE, "w") as f:
-		json.dump(memory, f, indent=2)
+	get_store().append(user_text, nova_response)
+	try:
+		get_routine_index().sync()
+	except Exception as e:
+		print("Error updating routine index:", e)
+	if CFG.get("semantic_memory_enabled", False):
+		try:
+			get_semantic_memory().sync()
+		except Exception as e:
+			print("Error updating semantic memory:", e)
 
 
 def clear_memory():
-	if os.path.exists(MEMORY_FILE):
-		os.remove(MEMORY_FILE)
+	get_store().clear()
+	get_routine_index().clear()
+	get_semantic_memory().clear()
+	for path in (MEMORY_FILE, f"{MEMORY_FILE}.migrated"):
+		if os.path.exists(path):
+			os.remove(path)
 	print("Conversation memory cleared.")
 
 
 # Reminder management
+# Legacy reminder list, imported into the reminder scheduler on first use.
 REMINDER_FILE = "logs/active_reminders.json"
 
-import datetime
+_scheduler = None
+
 
-def add_reminder(routine: str, time_str: str = None):
-	reminders = get_reminders()
-	reminder = {"routine": routine}
-	if time_str:
-		reminder["time"] = time_str
-	if reminder not in reminders:
-		reminders.append(reminder)
-	with open(REMINDER_FILE, "w") as f:
-		json.dump(reminders, f, indent=2)
+def get_scheduler() -> ReminderScheduler:
+	global _scheduler
+	store = get_store()
+	with _store_lock:
+		if _scheduler is None or _scheduler.store is not store:
+			_scheduler = ReminderScheduler(store, poll_interval=float(CFG.get("reminder_poll_interval", 5.0)))
+			if os.path.exists(REMINDER_FILE):
+				try:
+					with open(REMINDER_FILE, "r") as f:
+						_scheduler.import_json(json.load(f))
+					os.replace(REMINDER_FILE, f"{REMINDER_FILE}.migrated")
+				except Exception as e:
+					print("Error migrating reminders:", e)
+		return _scheduler
+
+def add_reminder(routine: str, time_str: str = None, recurrence: str = None):
+	"""
+	Schedules a reminder. `time_str` is "HH:MM"; `recurrence` is one of the
+	rules in reminder_scheduler.py (daily when a time is given).
+	"""
+	return get_scheduler().add(routine, time_str, recurrence)
 
 def get_reminders():
-	if not os.path.exists(REMINDER_FILE):
-		return []
-	with open(REMINDER_FILE, "r") as f:
-		try:
-			return json.load(f)
-		except Exception:
-			return []
+	return get_scheduler().reminders()
 
 def check_due_reminders():
 	"""
-	Returns a list of reminders that are due (time <= now).
+	Returns the reminders that are due now. Each occurrence is returned only
+	once; use get_scheduler().wait() to block until the next one is due.
 	"""
-	now = datetime.datetime.now().strftime("%H:%M")
-	due = []
-	for r in get_reminders():
-		if "time" in r and r["time"] == now:
-			due.append(r)
-	return due
+	return get_scheduler().pop_due()
@@ -0,0 +1,380 @@
+"""
+In-process metrics and per-turn traces for Nova.
+
+Spans time one step of a turn (capture, VAD, STT, plugins, prompt build, LLM
+first/last token, TTS first byte, playback, ...). Every span feeds a
+fixed-bucket histogram (`nova_span_seconds{span=...}`). It is also added to
+the trace of the turn it belongs to. Counters track fallbacks, retries and
+cache hits/misses. Recording a value costs one bisect and one short lock
+hold. Nothing grows with traffic: the histograms have fixed buckets and only
+the last `metrics_trace_history` traces are kept.
+
+A trace is started for each turn and activated on whichever thread works on
+the turn (activate()). Code deep in the backends then only calls span() or
+record_span(), and the span lands in the right trace without the trace being
+passed around.
+
+The voice loop and the dashboard are separate processes. The voice process
+writes snapshot() to `metrics_snapshot_path` every `metrics_snapshot_interval`
+seconds (start_exporter). The dashboard serves that snapshot together with
+its own as Prometheus text (render_prometheus) on /metrics, and the traces
+on /traces.
+
+Settings in `config/config.yaml`:
+
+    metrics_enabled: true
+    metrics_snapshot_path: logs/metrics.json
+    metrics_snapshot_interval: 5
+    metrics_trace_history: 50
+"""
+
+import bisect
+import collections
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+import config_loader
+
+
+CFG = config_loader.load()
+
+ENABLED = bool(CFG.get("metrics_enabled", True))
+SNAPSHOT_PATH = CFG.get("metrics_snapshot_path", "logs/metrics.json")
+
+# Upper bounds (seconds) of the histogram buckets, from sub-millisecond
+# backend calls to a long turn.
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+DESCRIPTIONS = {
+    "span_seconds": "Duration of turn stages and backend calls.",
+    "plugin_seconds": "Duration of plugin runs.",
+    "fallbacks": "Times a backend failed and another one was used instead.",
+    "retries": "Application-level retries of backend calls.",
+    "http_retries": "Connection/5xx retries made by the pooled HTTP sessions.",
+    "cache_hits": "Lookups answered from a cache.",
+    "cache_misses": "Lookups a cache could not answer.",
+    "turns": "Finished turns, by outcome.",
+}
+
+
+class Histogram:
+    """Counts of observations per fixed bucket, with their sum."""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # the last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def quantile(self, q):
+        """Estimate of the q-quantile (0..1), interpolated within its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = BUCKETS[i - 1] if i else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else lower
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return BUCKETS[-1]
+
+    def to_dict(self):
+        return {"counts": list(self.counts), "sum": self.sum, "count": self.count}
+
+    @classmethod
+    def from_dict(cls, data):
+        h = cls()
+        counts = list(data.get("counts") or [])
+        if len(counts) == len(h.counts):
+            h.counts = counts
+        h.sum = float(data.get("sum", 0.0))
+        h.count = int(data.get("count", 0))
+        return h
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Trace:
+    """The spans of one turn, with offsets from the start of the turn."""
+
+    def __init__(self, name="turn", **attrs):
+        self.id = secrets.token_hex(4)
+        self.name = name
+        self.attrs = attrs
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.end = None
+        self.spans = []
+
+    def add(self, name, start, duration, attrs=None):
+        # list.append is atomic; spans arrive from the stage threads
+        self.spans.append((name, start, duration, attrs or {}))
+
+    def to_dict(self):
+        spans = sorted(self.spans, key=lambda s: s[1])
+        end = self.end or max([self.start] + [s[1] + s[2] for s in spans])
+        return {
+            "id": self.id,
+            "name": self.name,
+            "started": self.started,
+            "duration_ms": round((end - self.start) * 1000.0, 1),
+            "attrs": self.attrs,
+            "spans": [
+                {"name": name, "start_ms": round((start - self.start) * 1000.0, 1), "duration_ms": round(duration * 1000.0, 1), "attrs": attrs}
+                for name, start, duration, attrs in spans
+            ],
+        }
+
+
+class Registry:
+    """Counters, histograms and finished traces of one process."""
+
+    def __init__(self, trace_history=50):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._traces = collections.deque(maxlen=trace_history)
+
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = _key(name, labels)
+        i = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            h = self._histograms.get(key)
+            if h is None:
+                h = self._histograms[key] = Histogram()
+            h.counts[i] += 1
+            h.sum += seconds
+            h.count += 1
+
+    def add_trace(self, trace):
+        with self._lock:
+            self._traces.append(trace)
+
+    def histogram(self, name, **labels):
+        with self._lock:
+            h = self._histograms.get(_key(name, labels))
+            return Histogram.from_dict(h.to_dict()) if h else None
+
+    def counter(self, name, **labels):
+        with self._lock:
+            return self._counters.get(_key(name, labels), 0)
+
+    def snapshot(self, process="nova"):
+        """Everything recorded so far, as JSON-serializable data."""
+        with self._lock:
+            counters = [{"name": n, "labels": dict(l), "value": v} for (n, l), v in self._counters.items()]
+            histograms = [dict(h.to_dict(), name=n, labels=dict(l)) for (n, l), h in self._histograms.items()]
+            traces = list(self._traces)
+        return {
+            "process": process,
+            "pid": os.getpid(),
+            "written": time.time(),
+            "counters": counters,
+            "histograms": histograms,
+            "traces": [t.to_dict() for t in traces],
+        }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._traces.clear()
+
+
+REGISTRY = Registry(int(CFG.get("metrics_trace_history", 50)))
+_local = threading.local()
+
+
+# -- recording ---------------------------------------------------------------
+
+
+def inc(name, value=1, **labels):
+    """Add `value` to counter `name` (exported as nova_<name>_total)."""
+    if ENABLED:
+        REGISTRY.inc(name, value, **labels)
+
+
+def observe(name, seconds, **labels):
+    """Record `seconds` in histogram `name`."""
+    if ENABLED:
+        REGISTRY.observe(name, seconds, **labels)
+
+
+def current_trace():
+    return getattr(_local, "trace", None)
+
+
+@contextmanager
+def activate(trace):
+    """Make `trace` the current trace of this thread (None: no trace) for the block."""
+    previous = current_trace()
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        _local.trace = previous
+
+
+def start_trace(name="turn", **attrs):
+    """A new trace, or None when metrics are disabled."""
+    return Trace(name, **attrs) if ENABLED else None
+
+
+def finish_trace(trace, **attrs):
+    """Close `trace` and keep it among the recent traces; `attrs` are added (e.g. outcome)."""
+    if trace is None or not ENABLED:
+        return
+    trace.attrs.update(attrs)
+    trace.end = time.perf_counter()
+    REGISTRY.add_trace(trace)
+    inc("turns", kind=trace.name, outcome=trace.attrs.get("outcome", "ok"))
+
+
+def record_span(name, start, duration, trace=None, **attrs):
+    """
+    Record a span that began at perf_counter() time `start` and lasted
+    `duration` seconds, in the histogram and in `trace` (default: the
+    current trace of this thread).
+    """
+    if not ENABLED:
+        return
+    REGISTRY.observe("span_seconds", duration, span=name)
+    trace = trace or current_trace()
+    if trace is not None:
+        trace.add(name, start, duration, attrs)
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time the block as span `name`. Yields its attribute dict, which the block may add to."""
+    start = time.perf_counter()
+    try:
+        yield attrs
+    finally:
+        record_span(name, start, time.perf_counter() - start, **attrs)
+
+
+# -- export ------------------------------------------------------------------
+
+
+def snapshot(process="nova"):
+    return REGISTRY.snapshot(process)
+
+
+def write_snapshot(process="voice", path=None):
+    """Atomically write snapshot() for other processes (the dashboard)."""
+    path = path or SNAPSHOT_PATH
+    tmp_path = f"{path}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot(process), f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print("Metrics snapshot error:", e)
+
+
+def read_snapshot(path=None):
+    """The snapshot written by another process, or None."""
+    try:
+        with open(path or SNAPSHOT_PATH, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def start_exporter(process="voice", path=None, interval=None, stop_event=None):
+    """Write a snapshot every `interval` seconds from a daemon thread (until `stop_event` is set)."""
+    if not ENABLED:
+        return None
+    interval = float(interval if interval is not None else CFG.get("metrics_snapshot_interval", 5))
+    stop_event = stop_event or threading.Event()
+
+    def _run():
+        while not stop_event.wait(interval):
+            write_snapshot(process, path)
+
+    thread = threading.Thread(target=_run, name="nova-metrics", daemon=True)
+    thread.start()
+    return thread
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels, extra=None):
+    items = list(labels.items()) + list((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def render_prometheus(snapshots):
+    """
+    Prometheus text exposition (format 0.0.4) of `snapshots`; each one's
+    series carry a `process` label.
+    """
+    counters = collections.defaultdict(list)
+    histograms = collections.defaultdict(list)
+    for snap in snapshots:
+        if not snap:
+            continue
+        process = {"process": snap.get("process", "nova")}
+        for c in snap.get("counters", []):
+            counters[c["name"]].append((dict(process, **c["labels"]), c["value"]))
+        for h in snap.get("histograms", []):
+            histograms[h["name"]].append((dict(process, **h["labels"]), Histogram.from_dict(h)))
+    lines = []
+    for name in sorted(histograms):
+        metric = f"nova_{name}"
+        lines.append(f"# HELP {metric} {DESCRIPTIONS.get(name, name)}")
+        lines.append(f"# TYPE {metric} histogram")
+        for labels, h in histograms[name]:
+            cumulative = 0
+            for bound, n in zip(list(BUCKETS) + ["+Inf"], h.counts):
+                cumulative += n
+                lines.append(f"{metric}_bucket{_labels(labels, {'le': bound})} {cumulative}")
+            lines.append(f"{metric}_sum{_labels(labels)} {h.sum:.6f}")
+            lines.append(f"{metric}_count{_labels(labels)} {h.count}")
+    for name in sorted(counters):
+        metric = f"nova_{name}_total"
+        lines.append(f"# HELP {metric} {DESCRIPTIONS.get(name, name)}")
+        lines.append(f"# TYPE {metric} counter")
+        for labels, value in counters[name]:
+            lines.append(f"{metric}{_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def span_summary(snapshots):
+    """{(process, span): {count, p50_ms, p95_ms, mean_ms}} estimated from the span histograms."""
+    summary = {}
+    for snap in snapshots:
+        if not snap:
+            continue
+        for h in snap.get("histograms", []):
+            if h["name"] != "span_seconds":
+                continue
+            hist = Histogram.from_dict(h)
+            if not hist.count:
+                continue
+            summary[(snap.get("process", "nova"), h["labels"].get("span", ""))] = {
+                "count": hist.count,
+                "p50_ms": round(hist.quantile(0.5) * 1000.0, 1),
+                "p95_ms": round(hist.quantile(0.95) * 1000.0, 1),
+                "mean_ms": round(hist.sum / hist.count * 1000.0, 1),
+            }
+    return summary
@@ -1,30 +1,223 @@
 """
 Example Calendar Plugin for Nova
+
+Events from the .ics file are kept in an index sorted by start time, which is
+rebuilt only when the file's mtime or size changes. Lookups bisect over the
+start times. Recurring events (RRULE) are expanded lazily: occurrences are
+added to the index only for the window a query needs, up to
+`calendar_horizon_days` ahead for "next event".
 """
+import bisect
 import os
-from datetime import datetime
+import threading
+from datetime import date, datetime, time, timedelta
 try:
     import icalendar
 except ImportError:
     icalendar = None
+try:
+    from dateutil.rrule import rrulestr, rruleset
+except ImportError:
+    rrulestr = rruleset = None
+
+MANIFEST = {
+    "name": "calendar",
+    "intents": [r"calendar", r"schedule", r"agenda", r"events?", r"appointments?", r"meetings?"],
+    "direct_answer": True,
+    "dependencies": ["icalendar", "python-dateutil"],
+    "config_keys": ["calendar_path", "calendar_horizon_days"],
+}
+
+DEFAULT_PATH = "~/calendar.ics"
+DEFAULT_HORIZON_DAYS = 366
+
+
+def _to_local(value):
+    """Naive local datetime for an ICS date, naive or timezone-aware datetime."""
+    if isinstance(value, datetime):
+        return value.astimezone().replace(tzinfo=None) if value.tzinfo else value
+    if isinstance(value, date):
+        return datetime.combine(value, time())
+    return None
+
+
+class CalendarIndex:
+    """
+    Sorted index of the events in one .ics file. Events are
+    (start, end, summary) tuples with naive local datetimes.
+    """
+
+    def __init__(self, path, horizon_days=DEFAULT_HORIZON_DAYS):
+        self.path = os.path.expanduser(path)
+        self.horizon = timedelta(days=horizon_days)
+        self._signature = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._events = []       # sorted (start, end, summary)
+        self._starts = []       # start times, parallel to _events
+        self._max_duration = timedelta(0)
+        self._recurring = []    # (rule set, duration, summary, timezone-aware)
+        self._expanded = None   # (from, until) window of expanded occurrences
+
+    def _load(self):
+        """Re-parse the file if its mtime or size changed since the last load."""
+        st = os.stat(self.path)
+        signature = (st.st_mtime_ns, st.st_size)
+        if signature == self._signature:
+            return
+        with open(self.path, "rb") as f:
+            cal = icalendar.Calendar.from_ical(f.read())
+        self._reset()
+        singles = []
+        overridden = {}  # UID -> RECURRENCE-IDs replaced by their own VEVENT
+        for component in cal.walk("VEVENT"):
+            if component.get("recurrence-id") is not None and component.get("uid"):
+                overridden.setdefault(str(component.get("uid")), []).append(component.get("recurrence-id").dt)
+        for component in cal.walk("VEVENT"):
+            raw_start = component.get("dtstart")
+            if raw_start is None:
+                continue
+            start = _to_local(raw_start.dt)
+            summary = str(component.get("summary") or "Untitled event")
+            if component.get("dtend") is not None:
+                duration = _to_local(component.get("dtend").dt) - start
+            elif component.get("duration") is not None:
+                duration = component.get("duration").dt
+            else:
+                duration = timedelta(days=1) if not isinstance(raw_start.dt, datetime) else timedelta(0)
+            self._max_duration = max(self._max_duration, duration)
+            rule = component.get("rrule")
+            if rule is not None and rrulestr is not None and component.get("recurrence-id") is None:
+                self._recurring.append(self._make_rule(component, raw_start.dt, duration, summary, overridden))
+            else:
+                singles.append((start, start + duration, summary))
+        singles.sort()
+        self._events = singles
+        self._starts = [event[0] for event in singles]
+        self._signature = signature
+
+    @staticmethod
+    def _make_rule(component, dtstart, duration, summary, overridden):
+        aware = isinstance(dtstart, datetime) and dtstart.tzinfo is not None
+        if not isinstance(dtstart, datetime):
+            dtstart = datetime.combine(dtstart, time())
+        rules = rruleset()
+        rules.rrule(rrulestr(component.get("rrule").to_ical().decode(), dtstart=dtstart))
+        exdates = component.get("exdate") or []
+        if not isinstance(exdates, list):
+            exdates = [exdates]
+        excluded = [d.dt for ex in exdates for d in ex.dts]
+        excluded += overridden.get(str(component.get("uid")), [])
+        for value in excluded:
+            if not isinstance(value, datetime):
+                value = datetime.combine(value, dtstart.time())
+            if aware and value.tzinfo is None:
+                value = value.replace(tzinfo=dtstart.tzinfo)
+            elif not aware and value.tzinfo is not None:
+                value = _to_local(value)
+            rules.exdate(value)
+        return rules, duration, summary, aware
+
+    def _expand(self, start, end):
+        """Add the occurrences of recurring events in [start, end) not expanded yet."""
+        if not self._recurring:
+            return
+        windows = []
+        if self._expanded is None:
+            windows.append((start, end))
+            self._expanded = (start, end)
+        else:
+            lo, hi = self._expanded
+            if start < lo:
+                windows.append((start, lo))
+            if end > hi:
+                windows.append((hi, end))
+            self._expanded = (min(start, lo), max(end, hi))
+        if not windows:
+            return
+        added = []
+        for rules, duration, summary, aware in self._recurring:
+            for lo, hi in windows:
+                query = (lo.astimezone(), hi.astimezone()) if aware else (lo, hi)
+                for occurrence in rules.between(*query, inc=True):
+                    occurrence = _to_local(occurrence)
+                    # `between` is inclusive at both ends; windows share their bounds
+                    if occurrence < hi:
+                        added.append((occurrence, occurrence + duration, summary))
+        if added:
+            self._events = sorted(self._events + added)
+            self._starts = [event[0] for event in self._events]
+
+    def events_between(self, start, end):
+        """Events overlapping [start, end), soonest first."""
+        with self._lock:
+            self._load()
+            self._expand(start - self._max_duration, end)
+            # Events that began up to the longest duration earlier may still be running
+            lo = bisect.bisect_left(self._starts, start - self._max_duration)
+            hi = bisect.bisect_left(self._starts, end)
+            return [event for event in self._events[lo:hi] if event[1] > start or event[0] >= start]
+
+    def events_on(self, day):
+        start = datetime.combine(day, time())
+        return self.events_between(start, start + timedelta(days=1))
+
+    def next_event(self, now=None):
+        """
+        The soonest event starting after `now`, or None. Recurring events are
+        only looked up to the horizon, in windows growing from a week.
+        """
+        now = now or datetime.now()
+        window = timedelta(days=7)
+        with self._lock:
+            self._load()
+            while True:
+                until = now + min(window, self.horizon)
+                self._expand(now, until)
+                i = bisect.bisect_right(self._starts, now)
+                if i < len(self._events) and (self._events[i][0] < until or not self._recurring):
+                    return self._events[i]
+                if window >= self.horizon:
+                    return self._events[i] if i < len(self._events) else None
+                window *= 4
+
+
+_INDEXES = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(path, horizon_days=DEFAULT_HORIZON_DAYS):
+    """The shared CalendarIndex for `path`."""
+    key = (os.path.expanduser(path), horizon_days)
+    with _indexes_lock:
+        if key not in _INDEXES:
+            _INDEXES[key] = CalendarIndex(path, horizon_days)
+        return _INDEXES[key]
+
+
+def _format(event, with_date=True):
+    start, _, summary = event
+    return f"{summary} at {start.strftime('%Y-%m-%d %H:%M' if with_date else '%H:%M')}"
+
 
 def run(context):
-    ics_path = os.path.expanduser("~/calendar.ics")
+    ics_path = os.path.expanduser(context.get("calendar_path") or DEFAULT_PATH)
     if icalendar and os.path.exists(ics_path):
         try:
-            with open(ics_path, "rb") as f:
-                cal = icalendar.Calendar.from_ical(f.read())
-            now = datetime.now()
-            next_event = None
-            for component in cal.walk():
-                if component.name == "VEVENT":
-                    dtstart = component.get("dtstart").dt
-                    if isinstance(dtstart, datetime) and dtstart > now:
-                        summary = component.get("summary")
-                        next_event = f"{summary} at {dtstart.strftime('%Y-%m-%d %H:%M')}"
-                        break
+            index = get_index(ics_path, int(context.get("calendar_horizon_days", DEFAULT_HORIZON_DAYS)))
+            transcript = (context.get("transcript") or "").lower()
+            today = date.today()
+            for word, day in (("today", today), ("tomorrow", today + timedelta(days=1))):
+                if word in transcript:
+                    events = index.events_on(day)
+                    if not events:
+                        return f"No events {word}."
+                    return f"Events {word}: " + "; ".join(_format(e, with_date=False) for e in events)
+            next_event = index.next_event()
             if next_event:
-                return f"Next event: {next_event}"
+                return f"Next event: {_format(next_event)}"
             else:
                 return "No upcoming events found."
         except Exception as e:
@@ -1,6 +1,11 @@
 """
 Health Plugin for Nova
 """
+MANIFEST = {
+    "name": "health",
+    "intents": [r"health", r"drink water", r"hydrat\w*", r"tired", r"take a break", r"posture"],
+}
+
 def run(context):
     # Stub: report health tips or stats
     return "Health: Remember to drink water and take breaks!"
@@ -4,6 +4,13 @@ Example Multi-modal Input Plugin for Nova (image/sensor)
 from PIL import Image
 import os
 
+MANIFEST = {
+    "name": "multimodal",
+    "intents": [r"image", r"photo", r"picture", r"camera", r"sensor"],
+    "dependencies": ["Pillow"],
+    "config_keys": ["image_path"],
+}
+
 def run(context):
     image_path = context.get("image_path")
     if image_path and os.path.exists(image_path):
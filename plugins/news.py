@@ -1,7 +1,16 @@
 """
 News Plugin for Nova
 """
-import requests
+from http_pool import get_session, get_timeout
+
+MANIFEST = {
+    "name": "news",
+    "intents": [r"news", r"headlines?"],
+    "direct_answer": True,
+    "cache_ttl": 900,
+    "dependencies": ["requests"],
+    "config_keys": ["news_api_key"],
+}
 
 def run(context):
     api_key = context.get("news_api_key")
@@ -9,7 +18,7 @@ def run(context):
         return "News API key not set. Add 'news_api_key' to plugins_config.yaml."
     try:
         url = f"https://newsapi.org/v2/top-headlines?country=us&apiKey={api_key}"
-        resp = requests.get(url, timeout=5)
+        resp = get_session("plugins").get(url, timeout=get_timeout("plugins"))
         data = resp.json()
         if resp.status_code == 200:
             headlines = [a['title'] for a in data['articles'][:3]]
@@ -1,47 +1,385 @@
 """
 Nova Plugin Manager: Loads and runs plugins for calendar, weather, smart home, etc.
+
+Plugins run concurrently on a shared thread pool. Each plugin has a deadline
+(`plugin_timeouts`, falling back to `plugin_default_timeout`) and the whole
+run has a turn budget (`plugin_turn_budget`); run_all() returns the results
+that are ready by then and leaves slow plugins out. A plugin still running
+from an earlier turn is not started again until it finishes. Per-plugin
+latency, error and timeout counts are available from stats().
+
+Intent routing: a plugin module may declare a MANIFEST dict with "intents",
+a list of regular expressions matched case-insensitively at word
+boundaries. All intents are compiled into one pattern, and for a transcript
+only the plugins whose intents match are run (plugins without intents always
+run). A plugin that also declares "direct_answer": True can answer a short
+query on its own, so the LLM is not called for e.g. "what's the weather".
+
+Result cache: a plugin whose result does not depend on the transcript can
+declare "cache_ttl" (seconds) in its MANIFEST. Its last result is returned
+from memory while fresh; once older than the TTL the stale result is still
+returned (for up to `plugin_cache_max_stale` more seconds) while a refresh
+runs on the pool in the background. refresh() forces a refresh.
+
+Lazy loading: discovery reads each module's MANIFEST (name, intents,
+dependencies, config keys, ...) with `ast` instead of importing it, and the
+scan is cached in `plugin_manifest_cache` keyed on file mtime and size.
+Plugins are LazyPlugin proxies that import their module on first run(), so
+heavy dependencies (PIL, icalendar) only load when a plugin is used.
+
+Process isolation: plugins listed in `plugin_isolation` (with optional
+"cpu_seconds" and "memory_mb" limits) run in long-lived worker processes
+instead of the assistant's process; see worker_pool.py.
 """
 
+import ast
 import importlib
+import json
 import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import yaml
+import metrics
+
+from .worker_pool import WorkerPool
 
 PLUGIN_DIR = os.path.dirname(__file__)
 CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config", "plugins_config.yaml")
+# Modules in plugins/ that are not plugins
+NON_PLUGINS = {"__init__", "plugin_manager", "worker_pool"}
+
+
+def read_manifest(path):
+    """The MANIFEST dict literal of the module at `path`, without importing it ({} if none)."""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "MANIFEST" for t in node.targets):
+            manifest = ast.literal_eval(node.value)
+            return manifest if isinstance(manifest, dict) else {}
+    return {}
+
+
+class LazyPlugin:
+    """A plugin module imported on first use; its MANIFEST is known up front."""
+
+    def __init__(self, module_name, manifest):
+        self.__name__ = module_name
+        self.MANIFEST = manifest
+        self._module = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self.__name__)
+        return self._module
+
+    def run(self, context):
+        return self.load().run(context)
+
+    def __repr__(self):
+        return f"<LazyPlugin {self.__name__} ({'loaded' if self.loaded else 'not loaded'})>"
 
 class NovaPluginManager:
     def __init__(self):
         self.plugins = []
         self.config = self.load_config()
         self.load_plugins()
+        self._executor = None
+        self._worker_pool = None
+        self._running = {}  # plugin name -> future still running from an earlier turn
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._matcher = None
+        self._matcher_for = None
+        self._cache = {}  # plugin name -> {"result", "time", "context"}
+        self._cache_stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0}
 
     def load_config(self):
         if os.path.exists(CONFIG_PATH):
             try:
                 with open(CONFIG_PATH, "r") as f:
-                    return yaml.safe_load(f)
+                    return yaml.safe_load(f) or {}
             except Exception as e:
                 print(f"Failed to load plugin config: {e}")
                 return {}
         return {}
 
     def load_plugins(self):
-        for fname in os.listdir(PLUGIN_DIR):
-            if fname.endswith(".py") and fname != "plugin_manager.py":
-                mod_name = fname[:-3]
-                try:
-                    mod = importlib.import_module(f"nova.plugins.{mod_name}")
-                    self.plugins.append(mod)
-                except Exception as e:
-                    print(f"Failed to load plugin {mod_name}: {e}")
+        """Discover the plugins in PLUGIN_DIR as LazyPlugin proxies (nothing is imported)."""
+        cache_path = self.config.get("plugin_manifest_cache", "logs/plugin_manifest_cache.json")
+        try:
+            with open(cache_path, "r") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+        scanned = {}
+        for fname in sorted(os.listdir(PLUGIN_DIR)):
+            mod_name = fname[:-3]
+            if not fname.endswith(".py") or mod_name in NON_PLUGINS:
+                continue
+            path = os.path.join(PLUGIN_DIR, fname)
+            try:
+                st = os.stat(path)
+                entry = cache.get(fname)
+                if not entry or entry.get("mtime_ns") != st.st_mtime_ns or entry.get("size") != st.st_size:
+                    entry = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "manifest": read_manifest(path)}
+                scanned[fname] = entry
+                self.plugins.append(LazyPlugin(f"{__package__}.{mod_name}", entry["manifest"]))
+            except Exception as e:
+                print(f"Failed to load plugin {mod_name}: {e}")
+        if scanned != cache:
+            try:
+                os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+                tmp_path = cache_path + ".tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(scanned, f)
+                os.replace(tmp_path, cache_path)
+            except Exception as e:
+                print(f"Failed to write plugin manifest cache: {e}")
+
+    @staticmethod
+    def manifest(plugin):
+        return getattr(plugin, "MANIFEST", None) or {}
+
+    def _get_matcher(self):
+        """One compiled pattern with a named group per plugin, rebuilt when the plugin list changes."""
+        names = [plugin.__name__ for plugin in self.plugins]
+        if self._matcher_for != names:
+            alternatives = []
+            for i, plugin in enumerate(self.plugins):
+                intents = self.manifest(plugin).get("intents")
+                if intents:
+                    alternatives.append(f"(?P<p{i}>" + "|".join(f"(?:{intent})" for intent in intents) + ")")
+            self._matcher = re.compile(r"\b(?:" + "|".join(alternatives) + r")\b", re.IGNORECASE) if alternatives else None
+            self._matcher_for = names
+        return self._matcher
+
+    def route(self, transcript):
+        """
+        The plugins to run for `transcript`: those whose intents match it,
+        plus every plugin that declares no intents. A word is credited to the
+        first plugin whose intents match it, so intents should not overlap.
+        """
+        matcher = self._get_matcher()
+        matched = set()
+        if matcher is not None:
+            matched = {int(m.lastgroup[1:]) for m in matcher.finditer(transcript or "")}
+        return [plugin for i, plugin in enumerate(self.plugins)
+                if i in matched or not self.manifest(plugin).get("intents")]
+
+    def direct_answer(self, transcript, results):
+        """
+        A reply built only from plugin `results`, or None if the LLM is needed:
+        direct answers must be enabled (`plugin_direct_answers`), the query
+        short (`plugin_direct_answer_max_words`), and every plugin routed to by
+        an intent must declare "direct_answer" and have produced a result.
+        """
+        if not self.config.get("plugin_direct_answers", True):
+            return None
+        if len((transcript or "").split()) > int(self.config.get("plugin_direct_answer_max_words", 8)):
+            return None
+        routed = [plugin for plugin in self.route(transcript) if self.manifest(plugin).get("intents")]
+        if not routed or not all(self.manifest(plugin).get("direct_answer") for plugin in routed):
+            return None
+        answers = [results.get(plugin.__name__) for plugin in routed]
+        if not all(isinstance(answer, str) and answer and not answer.startswith("Error:") for answer in answers):
+            return None
+        return " ".join(answers)
+
+    def cache_ttl(self, plugin):
+        """Seconds `plugin` results stay fresh, or 0 if they are not cached."""
+        if not self.config.get("plugin_cache_enabled", True):
+            return 0.0
+        return float(self.manifest(plugin).get("cache_ttl") or 0)
+
+    def _get_executor(self):
+        if self._executor is None:
+            workers = int(self.config.get("plugin_workers", 4))
+            self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="nova-plugin")
+        return self._executor
+
+    def plugin_timeout(self, name):
+        """Deadline in seconds for plugin `name` (module name without package)."""
+        short = name.rsplit(".", 1)[-1]
+        timeouts = self.config.get("plugin_timeouts") or {}
+        return float(timeouts.get(short, self.config.get("plugin_default_timeout", 2.0)))
+
+    def _record(self, name, elapsed, outcome):
+        if outcome not in ("timeout", "skipped"):
+            metrics.observe("plugin_seconds", elapsed, plugin=name, outcome=outcome)
+        with self._lock:
+            m = self._metrics.setdefault(name, {"calls": 0, "errors": 0, "timeouts": 0, "skipped": 0,
+                                                "last_ms": 0.0, "max_ms": 0.0, "total_ms": 0.0})
+            if outcome == "timeout":
+                m["timeouts"] += 1
+                return
+            if outcome == "skipped":
+                m["skipped"] += 1
+                return
+            ms = elapsed * 1000.0
+            m["calls"] += 1
+            m["errors"] += outcome == "error"
+            m["last_ms"] = ms
+            m["max_ms"] = max(m["max_ms"], ms)
+            m["total_ms"] += ms
+
+    def isolated(self, plugin):
+        """Whether `plugin` runs in a worker process (listed in `plugin_isolation`)."""
+        return plugin.__name__.rsplit(".", 1)[-1] in (self.config.get("plugin_isolation") or {})
+
+    def _get_worker_pool(self):
+        with self._lock:
+            if self._worker_pool is None:
+                self._worker_pool = WorkerPool(
+                    limits=self.config.get("plugin_isolation") or {},
+                    workers=self.config.get("plugin_process_workers", 1),
+                    timeout=float(self.config.get("plugin_process_timeout", 30.0)),
+                )
+            return self._worker_pool
+
+    def _run_plugin(self, plugin, context):
+        started = time.monotonic()
+        try:
+            if self.isolated(plugin):
+                result = self._get_worker_pool().run(plugin.__name__, context, self.manifest(plugin))
+            else:
+                result = plugin.run(context)
+            outcome = "ok"
+        except Exception as e:
+            result = f"Error: {e}"
+            outcome = "error"
+        finished = time.monotonic()
+        self._record(plugin.__name__, finished - started, outcome)
+        if outcome == "ok" and self.cache_ttl(plugin):
+            with self._lock:
+                self._cache[plugin.__name__] = {"result": result, "time": finished, "context": context}
+        return result
+
+    def _submit(self, plugin, context):
+        """Start `plugin` on the pool, or return None if it is still running from earlier."""
+        name = plugin.__name__
+        with self._lock:
+            previous = self._running.get(name)
+            if previous is not None and not previous.done():
+                return None
+            future = self._get_executor().submit(self._run_plugin, plugin, context)
+            self._running[name] = future
+            return future
+
+    def _cached(self, plugin, context, now):
+        """The cached result of `plugin` if usable, starting a background refresh when stale."""
+        ttl = self.cache_ttl(plugin)
+        if not ttl:
+            return None
+        with self._lock:
+            entry = self._cache.get(plugin.__name__)
+            age = now - entry["time"] if entry else None
+            if entry is None or age > ttl + float(self.config.get("plugin_cache_max_stale", 3600)):
+                self._cache_stats["misses"] += 1
+                metrics.inc("cache_misses", cache="plugin", plugin=plugin.__name__)
+                return None
+            self._cache_stats["hits" if age <= ttl else "stale_hits"] += 1
+        metrics.inc("cache_hits", cache="plugin", plugin=plugin.__name__, stale=age > ttl)
+        if age > ttl and self._submit(plugin, context) is not None:
+            with self._lock:
+                self._cache_stats["refreshes"] += 1
+        return entry["result"]
 
     def run_all(self, context):
+        """
+        Run the plugins routed to by context["transcript"] (every plugin when
+        there is no transcript) concurrently, and return {plugin name: result}
+        for those that finished within their deadline and the turn budget.
+        """
         # Merge config into context for plugins
         merged_context = {**self.config, **context}
+        budget = float(self.config.get("plugin_turn_budget", 3.0))
+        started = time.monotonic()
+        pending = {}
         results = {}
+        plugins = self.route(context["transcript"]) if "transcript" in context else self.plugins
+        for plugin in plugins:
+            name = plugin.__name__
+            cached = self._cached(plugin, merged_context, started)
+            if cached is not None:
+                results[name] = cached
+                continue
+            future = self._submit(plugin, merged_context)
+            if future is None:
+                self._record(name, 0.0, "skipped")
+                continue
+            pending[future] = (name, started + min(self.plugin_timeout(name), budget))
+
+        while pending:
+            now = time.monotonic()
+            for future, (name, deadline) in list(pending.items()):
+                if future.done():
+                    results[name] = future.result()
+                    del pending[future]
+                elif now >= deadline:
+                    # Left running in the background; its latency is still recorded when it ends
+                    self._record(name, now - started, "timeout")
+                    del pending[future]
+            if pending:
+                next_deadline = min(deadline for _, deadline in pending.values())
+                wait(list(pending), timeout=max(0.0, next_deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        # Keep the configured plugin order rather than completion order
+        order = {plugin.__name__: i for i, plugin in enumerate(self.plugins)}
+        return dict(sorted(results.items(), key=lambda item: order.get(item[0], 0)))
+
+    def stats(self):
+        """Per-plugin counters: calls, errors, timeouts, skipped, last/max/avg latency in ms."""
+        with self._lock:
+            stats = {}
+            for name, m in self._metrics.items():
+                stats[name] = dict(m, avg_ms=m["total_ms"] / m["calls"] if m["calls"] else 0.0)
+            return stats
+
+    def cache_stats(self):
+        """Result cache counters: hits, stale_hits, misses, refreshes and entries."""
+        with self._lock:
+            return dict(self._cache_stats, entries=len(self._cache))
+
+    def refresh(self, names=None, timeout=None):
+        """
+        Force a refresh of the cached plugins (or only those in `names`, short
+        or full module names) using the context they last ran with. With a
+        `timeout`, wait up to that many seconds for the refreshes to finish.
+        Returns the number of refreshes started.
+        """
+        with self._lock:
+            entries = dict(self._cache)
+        futures = []
         for plugin in self.plugins:
-            try:
-                results[plugin.__name__] = plugin.run(merged_context)
-            except Exception as e:
-                results[plugin.__name__] = f"Error: {e}"
-        return results
+            name = plugin.__name__
+            if name not in entries or (names is not None and name not in names and name.rsplit(".", 1)[-1] not in names):
+                continue
+            future = self._submit(plugin, entries[name]["context"])
+            if future is not None:
+                futures.append(future)
+        with self._lock:
+            self._cache_stats["refreshes"] += len(futures)
+        if futures and timeout is not None:
+            wait(futures, timeout=timeout)
+        return len(futures)
+
+    def worker_stats(self):
+        """Counters of the plugin worker processes (empty if no plugin is isolated)."""
+        return self._worker_pool.stats() if self._worker_pool is not None else {}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._worker_pool is not None:
+            self._worker_pool.close()
+            self._worker_pool = None
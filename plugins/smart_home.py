@@ -1,6 +1,13 @@
 """
 Smart Home Plugin for Nova
 """
+MANIFEST = {
+    "name": "smart_home",
+    "intents": [r"lights?", r"lamps?", r"thermostat", r"heating", r"smart home", r"devices?"],
+    "direct_answer": True,
+    "config_keys": ["smart_home_devices"],
+}
+
 def run(context):
     # Stub: report status of smart devices
     return "Smart Home: All lights are off. Thermostat set to 22°C."
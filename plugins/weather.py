@@ -2,7 +2,16 @@
 Example Weather Plugin for Nova
 """
 import os
-import requests
+from http_pool import get_session, get_timeout
+
+MANIFEST = {
+    "name": "weather",
+    "intents": [r"weather", r"forecast", r"rain\w*", r"sunny", r"snow\w*", r"umbrella", r"how (?:hot|cold|warm)"],
+    "direct_answer": True,
+    "cache_ttl": 600,
+    "dependencies": ["requests"],
+    "config_keys": ["OPENWEATHER_API_KEY", "NOVA_WEATHER_CITY"],
+}
 
 def run(context):
     api_key = os.environ.get("OPENWEATHER_API_KEY")
@@ -11,7 +20,7 @@ def run(context):
         return "Weather API key not set. Set OPENWEATHER_API_KEY env variable."
     try:
         url = f"https://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric"
-        resp = requests.get(url, timeout=5)
+        resp = get_session("plugins").get(url, timeout=get_timeout("plugins"))
         data = resp.json()
         if resp.status_code == 200:
             desc = data['weather'][0]['description']
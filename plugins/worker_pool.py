@@ -0,0 +1,241 @@
+"""
+Process-isolated plugin execution for Nova.
+
+Selected plugins run in long-lived worker processes instead of the assistant's
+own process, so a slow or memory-hungry plugin cannot stall or bloat the voice
+loop. Each worker imports one plugin module once and then serves calls over a
+Pipe; contexts and results travel as pickles (highest protocol), trimmed to
+the keys the plugin's MANIFEST lists in "config_keys".
+
+Limits apply per call: the CPU soft limit (RLIMIT_CPU) is moved to the
+worker's CPU time so far plus `cpu_seconds`, and the address space
+(RLIMIT_AS) is capped at `memory_mb`. A worker that exceeds its CPU limit,
+misses the call timeout or dies is replaced by a fresh process on the next
+call; a MemoryError is reported back as an error and the worker keeps
+running.
+"""
+
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+import time
+try:
+    import resource
+except ImportError:  # not available on Windows: workers run without limits
+    resource = None
+
+
+class PluginWorkerError(Exception):
+    """A plugin call in a worker process failed, timed out or crashed the worker."""
+
+
+def _apply_memory_limit(memory_mb):
+    if resource is not None and memory_mb:
+        limit = int(memory_mb * 1024 * 1024)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _set_cpu_budget(cpu_seconds):
+    if resource is None or not cpu_seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = usage.ru_utime + usage.ru_stime
+    hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+    soft = int(used + cpu_seconds + 0.999)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(conn, module_name, cpu_seconds, memory_mb):
+    """Entry point of a worker process: import the plugin, then serve calls until told to stop."""
+    import importlib
+    try:
+        module = importlib.import_module(module_name)
+        _apply_memory_limit(memory_mb)
+    except Exception as e:
+        conn.send_bytes(pickle.dumps(("error", f"Failed to load plugin {module_name}: {e}"), pickle.HIGHEST_PROTOCOL))
+        return
+    conn.send_bytes(pickle.dumps(("ready", os.getpid()), pickle.HIGHEST_PROTOCOL))
+    while True:
+        try:
+            context = pickle.loads(conn.recv_bytes())
+        except (EOFError, OSError):
+            return
+        if context is None:
+            return
+        _set_cpu_budget(cpu_seconds)
+        try:
+            reply = ("ok", module.run(context))
+        except MemoryError:
+            reply = ("error", "out of memory")
+        except Exception as e:
+            reply = ("error", str(e))
+        try:
+            payload = pickle.dumps(reply, pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            payload = pickle.dumps(("error", f"result not serializable: {e}"), pickle.HIGHEST_PROTOCOL)
+        conn.send_bytes(payload)
+
+
+class PluginProcess:
+    """One worker process for one plugin module."""
+
+    def __init__(self, module_name, cpu_seconds=None, memory_mb=None, start_timeout=30.0):
+        self.module_name = module_name
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.start_timeout = start_timeout
+        self.process = None
+        self.conn = None
+        self.pid = None
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def start(self):
+        # Spawned, not forked: the assistant's threads and locks are not copied
+        ctx = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.module_name, self.cpu_seconds, self.memory_mb),
+            name=f"nova-plugin-{self.module_name.rsplit('.', 1)[-1]}",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        try:
+            status, value = self._receive(self.start_timeout)
+        except (TimeoutError, EOFError, OSError):
+            status, value = "error", f"worker for {self.module_name} failed to start"
+        if status != "ready":
+            self.stop()
+            raise PluginWorkerError(value)
+        self.pid = value
+
+    def _receive(self, timeout):
+        if not self.conn.poll(timeout):
+            raise TimeoutError
+        return pickle.loads(self.conn.recv_bytes())
+
+    def call(self, context, timeout):
+        """Run the plugin on `context` in the worker; raises PluginWorkerError on failure."""
+        if not self.alive:
+            self.start()
+        try:
+            self.conn.send_bytes(pickle.dumps(context, pickle.HIGHEST_PROTOCOL))
+            status, value = self._receive(timeout)
+        except TimeoutError:
+            self.stop()
+            raise PluginWorkerError(f"timed out after {timeout:.1f}s")
+        except (EOFError, OSError):
+            self.process.join(0.5)
+            exitcode = self.process.exitcode
+            self.stop()
+            raise PluginWorkerError(f"worker crashed (exit code {exitcode})")
+        if status != "ok":
+            raise PluginWorkerError(value)
+        return value
+
+    def stop(self):
+        if self.process is None:
+            return
+        try:
+            if self.process.is_alive():
+                try:
+                    self.conn.send_bytes(pickle.dumps(None))
+                except (OSError, ValueError):
+                    pass
+                self.process.join(0.5)
+            if self.process.is_alive():
+                self.process.kill()
+            self.process.join(1.0)
+        finally:
+            self.conn.close()
+            self.process = None
+            self.conn = None
+
+
+class WorkerPool:
+    """
+    Long-lived worker processes per plugin module (up to `workers` each).
+    `limits` maps a module's short name to {"cpu_seconds", "memory_mb"}.
+    """
+
+    def __init__(self, limits=None, workers=1, timeout=30.0):
+        self.limits = limits or {}
+        self.workers = max(1, int(workers))
+        self.timeout = timeout
+        self._idle = {}      # module name -> Queue of idle PluginProcess
+        self._created = {}   # module name -> number of workers created
+        self._all = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {"calls": 0, "errors": 0, "restarts": 0}
+
+    def _acquire(self, module_name, timeout):
+        with self._lock:
+            if self._closed:
+                raise PluginWorkerError("worker pool is closed")
+            idle = self._idle.setdefault(module_name, queue.Queue())
+            if idle.empty() and self._created.get(module_name, 0) < self.workers:
+                self._created[module_name] = self._created.get(module_name, 0) + 1
+                limits = self.limits.get(module_name.rsplit(".", 1)[-1]) or {}
+                worker = PluginProcess(module_name, limits.get("cpu_seconds"), limits.get("memory_mb"))
+                self._all.append(worker)
+                return worker
+        try:
+            return idle.get(timeout=timeout)
+        except queue.Empty:
+            raise PluginWorkerError("no idle worker")
+
+    def run(self, module_name, context, manifest=None, timeout=None):
+        """Run plugin `module_name` on `context` in a worker process and return its result."""
+        timeout = self.timeout if timeout is None else timeout
+        keys = (manifest or {}).get("config_keys")
+        if keys:
+            context = {k: context[k] for k in list(keys) + ["transcript"] if k in context}
+        started = time.monotonic()
+        worker = self._acquire(module_name, timeout)
+        restarting = worker.pid is not None and not worker.alive
+        try:
+            return worker.call(context, max(0.0, timeout - (time.monotonic() - started)))
+        except PluginWorkerError:
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        finally:
+            self._release(module_name, worker, restarting)
+
+    def _release(self, module_name, worker, restarting):
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["restarts"] += restarting
+            if not self._closed:
+                self._idle[module_name].put(worker)
+                return
+        # close() ran during the call
+        worker.stop()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, workers=sum(1 for w in self._all if w.alive))
+
+    def close(self):
+        """Stop the idle workers; workers busy in run() are stopped when their call returns."""
+        workers = []
+        with self._lock:
+            self._closed = True
+            for idle in self._idle.values():
+                while not idle.empty():
+                    workers.append(idle.get_nowait())
+            self._all = []
+            self._idle.clear()
+            self._created.clear()
+        for worker in workers:
+            worker.stop()
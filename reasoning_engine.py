@@ -7,113 +7,525 @@ Open Web UI HTTP endpoint when enabled in `config/config.yaml`.
 Public API: query_ollama(prompt, endpoint=None, model=None)
   - For backwards compatibility this function name is kept, but it will
 	consult config to determine which backend to call.
+
+Streaming API: stream_ollama(prompt, endpoint=None, model=None)
+  - Yields text chunks as Ollama generates them (NDJSON `stream: true`).
+	Combine with iter_sentences() to hand complete sentences to TTS while
+	generation is still running.
+
+Both functions consult an optional response cache (`response_cache_enabled`
+in config) before calling a backend; see response_cache.py.
+
+Conversation context: recent turns from memory_manager are packed into the
+prompt within `prompt_token_budget` estimated tokens (build_prompt). Ollama
+returns a `context` array encoding the conversation so far; it is sent back
+with the next prompt, so the earlier turns are not prefilled again while the
+model stays loaded (`ollama_keep_alive`). Prompt-token and prefill-time
+stats of each Ollama call are reported by get_last_result_info().
 """
 
 import os
-import yaml
-import requests
-from typing import Optional
+import re
+import json
+import threading
+import time
+import config_loader
+import metrics
+from http_pool import get_session, get_timeout
+from response_cache import ResponseCache
+from typing import Iterable, Iterator, Optional
+
+
+CFG = config_loader.load()
+
+class _ThreadResult(threading.local):
+	"""Info about the last reasoning call of the current thread, so concurrent
+	callers (the dashboard's reasoning jobs) each see their own notices."""
+
+	def __init__(self):
+		self.values = {"backend": None, "fallback": False, "cache_hit": False}
+
+	def __getitem__(self, key):
+		return self.values[key]
+
+	def __setitem__(self, key, value):
+		self.values[key] = value
+
+	def pop(self, key, default=None):
+		return self.values.pop(key, default)
+
+	def keys(self):
+		return self.values.keys()
+
+
+# Store info about the last reasoning call so UI can display notices (non-persistent)
+LAST_RESULT = _ThreadResult()
+
+# Ollama's `context` array from the last reply, reused for the next prompt of
+# the same conversation. `last_prompt` is the user turn it ends with.
+_OLLAMA_CONTEXT = {"key": None, "context": None, "last_prompt": None}
+_context_lock = threading.Lock()
+
+# Approximate tokenizer: words are split into pieces of up to four characters
+# and punctuation counts as one token each, which is close to BPE counts for
+# English text and much cheaper than running the model's tokenizer.
+_TOKEN_RE = re.compile(r"\w{1,4}|[^\w\s]")
+
+# Created on first use when `response_cache_enabled` is set.
+RESPONSE_CACHE = None
+
+# A sentence ends at terminal punctuation (optionally followed by closing
+# quotes/brackets) that is followed by whitespace.
+_SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+")
+
+
+def _auth_headers(api_key: Optional[str], style: Optional[str]) -> dict:
+	headers = {}
+	if api_key:
+		if style and style.lower() == "x-api-key":
+			headers["X-API-Key"] = api_key
+		else:
+			headers["Authorization"] = f"Bearer {api_key}"
+	return headers
+
+
+def _backend_settings(endpoint: Optional[str], model: Optional[str], use_open_webui: Optional[bool]) -> dict:
+	# If caller provided explicit override, use it; otherwise fall back to config
+	use_ow = CFG.get("use_open_webui", False) if use_open_webui is None else bool(use_open_webui)
+	# Prefer explicit environment variables for secrets; fall back to config file
+	open_webui_api_key = os.environ.get("OPEN_WEBUI_API_KEY") or CFG.get("open_webui_api_key")
+	ollama_api_key = os.environ.get("OLLAMA_API_KEY") or CFG.get("ollama_api_key")
+	return {
+		"use_open_webui": use_ow,
+		# Allow override via kwargs, otherwise use config or defaults
+		"ollama_endpoint": endpoint or CFG.get("ollama_endpoint", "http://localhost:11434/api/generate"),
+		"ollama_model": model or CFG.get("ollama_model", "llama3"),
+		"open_webui_endpoint": CFG.get("open_webui_endpoint", f"http://localhost:{CFG.get('open_webui_port', 3000)}/api/generate"),
+		"open_webui_headers": _auth_headers(open_webui_api_key, CFG.get("open_webui_api_key_style", "bearer")),
+		"ollama_headers": _auth_headers(ollama_api_key, CFG.get("ollama_api_key_style", "bearer")),
+	}
+
+
+def _get_cache() -> Optional[ResponseCache]:
+	global RESPONSE_CACHE
+	if not CFG.get("response_cache_enabled", False):
+		return None
+	if RESPONSE_CACHE is None:
+		RESPONSE_CACHE = ResponseCache(
+			path=CFG.get("response_cache_path", "logs/response_cache.json"),
+			max_entries=int(CFG.get("response_cache_size", 256)),
+			ttl=float(CFG.get("response_cache_ttl", 3600)),
+		)
+	return RESPONSE_CACHE
+
+
+def _cache_lookup(prompt: str, settings: dict, cache_context):
+	"""Return (cache, cached_text). cache is None when caching is disabled."""
+	cache = _get_cache()
+	if cache is None:
+		return None, None
+	backend = "open_webui" if settings["use_open_webui"] else "ollama"
+	hit = cache.get(cache.make_key(prompt, settings["ollama_model"], backend, cache_context))
+	if hit is None:
+		metrics.inc("cache_misses", cache="response")
+		return cache, None
+	metrics.inc("cache_hits", cache="response")
+	LAST_RESULT["backend"] = hit[1]
+	LAST_RESULT["cache_hit"] = True
+	return cache, hit[0]
+
+
+def _cache_store(cache, prompt: str, settings: dict, cache_context, text: str, backend: str):
+	"""Cache a reply under the backend that actually produced it.
+
+	A reply Ollama gave after an Open Web UI failure is therefore never
+	served later as an Open Web UI hit.
+	"""
+	if cache is not None:
+		cache.put(cache.make_key(prompt, settings["ollama_model"], backend, cache_context), text, backend)
+
+
+def _reset_last_result():
+	LAST_RESULT["backend"] = None
+	LAST_RESULT["fallback"] = False
+	LAST_RESULT["cache_hit"] = False
+	for key in ("prompt_tokens", "prefill_ms", "eval_tokens", "estimated_prompt_tokens", "history_turns", "recalled_turns", "context_reused"):
+		LAST_RESULT.pop(key, None)
+
+
+def estimate_tokens(text: str) -> int:
+	"""Fast approximate token count of `text` (see _TOKEN_RE)."""
+	return len(_TOKEN_RE.findall(text or ""))
 
 
-def _load_cfg() -> dict:
+def _format_turn(user: str, nova: str) -> str:
+	return f"User: {user}\nNova: {nova}\n"
+
+
+def _turn_tokens(turn: dict) -> int:
+	return estimate_tokens(turn.get("user", "")) + estimate_tokens(turn.get("nova", "")) + 4
+
+
+def _format_recalled(turns) -> str:
+	if not turns:
+		return ""
+	body = "".join(_format_turn(t.get("user", ""), t.get("nova", "")) for t in turns)
+	return f"Earlier, related conversation:\n{body}\n"
+
+
+def build_prompt(prompt: str, history=None, budget: Optional[int] = None, system: Optional[str] = None, recalled=None):
+	"""Pack recent conversation turns and the new prompt into one prompt.
+
+	The most recent turns of `history` (a list of {"user", "nova"} dicts,
+	oldest first) are added newest-first while the estimated token count
+	stays within `budget` (default `prompt_token_budget`), then laid out in
+	chronological order. `recalled` turns (older, related turns from
+	semantic memory) fill what is left of the budget and are placed before
+	them. Without any turns or system prompt the prompt is returned unchanged.
+
+	Returns (text, turns) where `turns` are all turns included, recalled first.
+	"""
+	if budget is None:
+		budget = int(CFG.get("prompt_token_budget", 1024))
+	if system is None:
+		system = CFG.get("reasoning_system_prompt") or ""
+	used = estimate_tokens(system) + estimate_tokens(prompt) + 4
+	turns = []
+	for turn in reversed(history or []):
+		cost = _turn_tokens(turn)
+		if used + cost > budget:
+			break
+		used += cost
+		turns.append(turn)
+	turns.reverse()
+	related = []
+	for turn in recalled or []:
+		cost = _turn_tokens(turn)
+		if used + cost <= budget:
+			used += cost
+			related.append(turn)
+	if not turns and not related and not system:
+		return prompt, []
+	parts = [system + "\n\n"] if system else []
+	parts.append(_format_recalled(related))
+	parts.extend(_format_turn(t.get("user", ""), t.get("nova", "")) for t in turns)
+	parts.append(f"User: {prompt}\nNova:")
+	return "".join(parts), related + turns
+
+
+def _load_history(history):
+	"""The turns to pack into the prompt: `history` if given, else memory when enabled."""
+	if history is not None:
+		return history
+	if not CFG.get("prompt_history_enabled", False):
+		return []
 	try:
-		with open(os.path.join("config", "config.yaml"), "r") as f:
-			return yaml.safe_load(f) or {}
+		from memory_manager import load_memory
+		return load_memory(int(CFG.get("prompt_history_turns", 20)))
+	except Exception as e:
+		print("Error loading conversation history for prompt:", e)
+		return []
+
+
+def _recall(prompt: str, history) -> list:
+	"""Older turns related to `prompt` from semantic memory, when the history comes from memory."""
+	if not CFG.get("prompt_history_enabled", False):
+		return []
+	try:
+		from memory_manager import recall_turns
+		return recall_turns(prompt, exclude_recent=len(history))
+	except Exception as e:
+		print("Error recalling related conversation:", e)
+		return []
+
+
+def _prepare_prompt(prompt: str, settings: dict, history, cache_context) -> dict:
+	"""Decide what to send: the packed prompt, or only the new prompt plus the reusable Ollama context."""
+	recalled = []
+	if history is None:
+		history = _load_history(None)
+		recalled = _recall(prompt, history)
+	text, turns = build_prompt(prompt, history, recalled=recalled)
+	recalled = [t for t in turns if t in recalled]
+	prepared = {
+		"text": text,
+		"ollama_prompt": text,
+		"context": None,
+		"context_key": (settings["ollama_endpoint"], settings["ollama_model"]),
+		"prompt": prompt,
+		# Replies depend on the packed history, so it is part of the cache key
+		"cache_context": {"context": cache_context, "history": turns} if turns else cache_context,
+	}
+	LAST_RESULT["history_turns"] = len(turns) - len(recalled)
+	LAST_RESULT["recalled_turns"] = len(recalled)
+	LAST_RESULT["estimated_prompt_tokens"] = estimate_tokens(text)
+	LAST_RESULT["context_reused"] = False
+	if not CFG.get("ollama_reuse_context", True) or not history:
+		return prepared
+	budget = int(CFG.get("prompt_token_budget", 1024))
+	with _context_lock:
+		saved = dict(_OLLAMA_CONTEXT)
+	# Same framing as the turns already in the context
+	turn = f"User: {prompt}\nNova:"
+	# The saved context is only valid if it ends with the latest turn in memory
+	# and, with the new prompt, still fits the budget; otherwise re-prefill once.
+	if (saved["key"] == prepared["context_key"] and saved["context"]
+			and saved["last_prompt"] == history[-1].get("user")
+			and len(saved["context"]) + estimate_tokens(turn) <= budget):
+		# Recent turns are already in the context; related older ones are not
+		prepared["ollama_prompt"] = _format_recalled(recalled) + turn
+		prepared["context"] = saved["context"]
+		LAST_RESULT["context_reused"] = True
+		LAST_RESULT["estimated_prompt_tokens"] = estimate_tokens(prepared["ollama_prompt"])
+		metrics.inc("cache_hits", cache="ollama_context")
+	else:
+		metrics.inc("cache_misses", cache="ollama_context")
+	return prepared
+
+
+def _ollama_payload(settings: dict, prepared: dict, stream: bool) -> dict:
+	payload = {
+		"model": settings["ollama_model"],
+		"prompt": prepared["ollama_prompt"],
+		"stream": stream,
+		"keep_alive": CFG.get("ollama_keep_alive", "10m"),
+	}
+	if prepared["context"]:
+		payload["context"] = prepared["context"]
+	return payload
+
+
+def _record_ollama_result(data: dict, prepared: dict):
+	"""Save the returned context for the next turn and report prefill stats."""
+	if "prompt_eval_count" in data:
+		LAST_RESULT["prompt_tokens"] = data["prompt_eval_count"]
+	if "prompt_eval_duration" in data:
+		LAST_RESULT["prefill_ms"] = round(data["prompt_eval_duration"] / 1e6, 1)
+	if "eval_count" in data:
+		LAST_RESULT["eval_tokens"] = data["eval_count"]
+	context = data.get("context")
+	if isinstance(context, list) and context:
+		with _context_lock:
+			_OLLAMA_CONTEXT.update(key=prepared["context_key"], context=context, last_prompt=prepared["prompt"])
+
+
+
+def _parse_response_text(resp):
+	try:
+		data = resp.json()
+		return data.get("response") or data.get("output") or data.get("text") or str(data)
 	except Exception:
-		return {}
+		return resp.text
 
 
-CFG = _load_cfg()
+def _query_open_webui(prompt: str, settings: dict) -> Optional[str]:
+	"""Try Open Web UI with the configured retries.
 
-# Store info about the last reasoning call so UI can display notices (non-persistent)
-LAST_RESULT = {"backend": None, "fallback": False}
+	Returns the response text, or None when every attempt failed (in which
+	case LAST_RESULT is marked as a fallback).
+	"""
+	# configurable retries and delay
+	retries = int(CFG.get("open_webui_retries", 2))
+	delay = float(CFG.get("open_webui_retry_delay", 1.0))
+	ow_err = None
+	for attempt in range(1, retries + 1):
+		try:
+			with metrics.span("open_webui_request", attempt=attempt):
+				resp = get_session("open_webui").post(settings["open_webui_endpoint"], json={"prompt": prompt}, timeout=get_timeout("open_webui"), headers=settings["open_webui_headers"])
+				resp.raise_for_status()
+			LAST_RESULT["backend"] = "open_webui"
+			LAST_RESULT["fallback"] = False
+			return _parse_response_text(resp)
+		except Exception as e:
+			ow_err = e
+			# small backoff before retrying
+			if attempt < retries:
+				metrics.inc("retries", backend="open_webui")
+				try:
+					time.sleep(delay * attempt)
+				except Exception:
+					pass
+	# If we reach here, Open Web UI failed all attempts
+	print("Open Web UI call failed after retries, falling back to Ollama:", ow_err)
+	LAST_RESULT["fallback"] = True
+	metrics.inc("fallbacks", component="reasoning", to="ollama")
+	return None
 
 
-def query_ollama(prompt: str, endpoint: Optional[str] = None, model: Optional[str] = None, use_open_webui: Optional[bool] = None) -> str:
+def query_ollama(prompt: str, endpoint: Optional[str] = None, model: Optional[str] = None, use_open_webui: Optional[bool] = None, cache_context=None, history=None) -> str:
 	"""Send prompt to reasoning backend and return textual response.
 
 	If `use_open_webui` is true in config, this will POST {"prompt": prompt}
 	to the configured `open_webui_endpoint` and return a best-effort text
 	from the response. Otherwise it will send to Ollama using the standard
 	payload {"model": model, "prompt": prompt}.
-	"""
-	# If caller provided explicit override, use it; otherwise fall back to config
-	use_ow = CFG.get("use_open_webui", False) if use_open_webui is None else bool(use_open_webui)
 
-	# Allow override via kwargs, otherwise use config or defaults
-	ollama_endpoint = endpoint or CFG.get("ollama_endpoint", "http://localhost:11434/api/generate")
-	ollama_model = model or CFG.get("ollama_model", "llama3")
-	open_webui_endpoint = CFG.get("open_webui_endpoint", f"http://localhost:{CFG.get('open_webui_port', 3000)}/api/generate")
-	# Prefer explicit environment variables for secrets; fall back to config file
-	open_webui_api_key = os.environ.get("OPEN_WEBUI_API_KEY") or CFG.get("open_webui_api_key")
-	open_webui_api_key_style = CFG.get("open_webui_api_key_style", "bearer")
-	ollama_api_key = os.environ.get("OLLAMA_API_KEY") or CFG.get("ollama_api_key")
-	ollama_api_key_style = CFG.get("ollama_api_key_style", "bearer")
+	`cache_context` is any JSON-serializable data the reply depends on
+	besides the prompt (e.g. plugin results); it is part of the cache key.
 
-	def _parse_response_text(resp):
-		try:
-			data = resp.json()
-			return data.get("response") or data.get("output") or data.get("text") or str(data)
-		except Exception:
-			return resp.text
+	`history` is a list of earlier turns ({"user", "nova"}) to pack into the
+	prompt; by default the recent memory is used when `prompt_history_enabled`
+	is set (see build_prompt).
+	"""
+	settings = _backend_settings(endpoint, model, use_open_webui)
 
 	# Try Open Web UI first if requested, but fall back to Ollama on any failure.
 	try:
-		LAST_RESULT["backend"] = None
-		LAST_RESULT["fallback"] = False
-		if use_ow:
-			# configurable retries and delay
-			retries = int(CFG.get("open_webui_retries", 2))
-			delay = float(CFG.get("open_webui_retry_delay", 1.0))
-			ow_success = False
-			ow_err = None
-			for attempt in range(1, retries + 1):
-				try:
-					headers = {}
-					if open_webui_api_key:
-						if open_webui_api_key_style and open_webui_api_key_style.lower() == "x-api-key":
-							headers["X-API-Key"] = open_webui_api_key
-						else:
-							headers["Authorization"] = f"Bearer {open_webui_api_key}"
-					resp = requests.post(open_webui_endpoint, json={"prompt": prompt}, timeout=15, headers=headers)
-					resp.raise_for_status()
-					LAST_RESULT["backend"] = "open_webui"
-					LAST_RESULT["fallback"] = False
-					return _parse_response_text(resp)
-				except Exception as e:
-					ow_err = e
-					# small backoff before retrying
-					if attempt < retries:
-						try:
-							import time
-							time.sleep(delay * attempt)
-						except Exception:
-							pass
-			# If we reach here, Open Web UI failed all attempts
-			print("Open Web UI call failed after retries, falling back to Ollama:", ow_err)
-			LAST_RESULT["fallback"] = True
+		_reset_last_result()
+		with metrics.span("prompt_build"):
+			prepared = _prepare_prompt(prompt, settings, history, cache_context)
+		cache_context = prepared["cache_context"]
+		cache, cached = _cache_lookup(prompt, settings, cache_context)
+		if cached is not None:
+			return cached
+		if settings["use_open_webui"]:
+			text = _query_open_webui(prepared["text"], settings)
+			if text is not None:
+				_cache_store(cache, prompt, settings, cache_context, text, "open_webui")
+				return text
 
 		# Default / fallback: call Ollama
-		payload = {"model": ollama_model, "prompt": prompt}
-		headers = {}
-		if ollama_api_key:
-			if ollama_api_key_style and ollama_api_key_style.lower() == "x-api-key":
-				headers["X-API-Key"] = ollama_api_key
-			else:
-				headers["Authorization"] = f"Bearer {ollama_api_key}"
-		resp = requests.post(ollama_endpoint, json=payload, timeout=15, headers=headers)
-		resp.raise_for_status()
+		payload = _ollama_payload(settings, prepared, stream=False)
+		with metrics.span("llm_request"):
+			resp = get_session("ollama").post(settings["ollama_endpoint"], json=payload, timeout=get_timeout("ollama"), headers=settings["ollama_headers"])
+			resp.raise_for_status()
 		LAST_RESULT["backend"] = "ollama"
-		return _parse_response_text(resp)
+		try:
+			_record_ollama_result(resp.json(), prepared)
+		except (ValueError, AttributeError):
+			pass
+		text = _parse_response_text(resp)
+		_cache_store(cache, prompt, settings, cache_context, text, "ollama")
+		return text
 	except Exception as e:
 		print("Reasoning engine error:", e)
 		return ""
 
 
+def stream_ollama(prompt: str, endpoint: Optional[str] = None, model: Optional[str] = None, use_open_webui: Optional[bool] = None, cache_context=None, history=None, raise_errors: bool = False) -> Iterator[str]:
+	"""Stream the reasoning response as text chunks.
+
+	Ollama is called with `stream: true` and each NDJSON line's `response`
+	field is yielded as soon as it arrives. Open Web UI has no streaming
+	mode here, so when it is enabled its full reply is yielded as a single
+	chunk; on failure the call falls back to streaming Ollama, exactly like
+	query_ollama(). LAST_RESULT is updated the same way. Errors are printed
+	and end the stream early; with `raise_errors` they are also raised, so
+	the caller can tell a failed reply from an empty one. A cached reply is yielded
+	as a single chunk; a completed stream is stored in the cache. `history`
+	is handled as in query_ollama().
+	"""
+	settings = _backend_settings(endpoint, model, use_open_webui)
+	_reset_last_result()
+	try:
+		with metrics.span("prompt_build"):
+			prepared = _prepare_prompt(prompt, settings, history, cache_context)
+		cache_context = prepared["cache_context"]
+		cache, cached = _cache_lookup(prompt, settings, cache_context)
+		if cached is not None:
+			yield cached
+			return
+		if settings["use_open_webui"]:
+			text = _query_open_webui(prepared["text"], settings)
+			if text is not None:
+				_cache_store(cache, prompt, settings, cache_context, text, "open_webui")
+				if text:
+					yield text
+				return
+
+		payload = _ollama_payload(settings, prepared, stream=True)
+		started = time.perf_counter()
+		resp = get_session("ollama").post(settings["ollama_endpoint"], json=payload, timeout=get_timeout("ollama"), headers=settings["ollama_headers"], stream=True)
+		resp.raise_for_status()
+		LAST_RESULT["backend"] = "ollama"
+		parts = []
+		try:
+			for line in resp.iter_lines():
+				if not line:
+					continue
+				data = json.loads(line)
+				if data.get("error"):
+					raise RuntimeError(data["error"])
+				chunk = data.get("response")
+				if chunk:
+					if not parts:
+						metrics.record_span("llm_first_token", started, time.perf_counter() - started)
+					parts.append(chunk)
+					yield chunk
+				if data.get("done"):
+					metrics.record_span("llm_last_token", started, time.perf_counter() - started, tokens=data.get("eval_count"))
+					_record_ollama_result(data, prepared)
+					# Only complete replies are cached, never a stream cut short.
+					_cache_store(cache, prompt, settings, cache_context, "".join(parts), "ollama")
+					break
+		finally:
+			resp.close()
+	except Exception as e:
+		print("Reasoning engine error:", e)
+		if raise_errors:
+			raise
+
+
+def preload_model(endpoint: Optional[str] = None, model: Optional[str] = None) -> bool:
+	"""Ask Ollama to load the model now, so the first reply does not wait for it.
+
+	A generate request without a prompt only loads the model (and keeps it
+	loaded for `ollama_keep_alive`). Nothing is loaded when Open Web UI is
+	the configured backend. Returns True if Ollama confirmed the load.
+	"""
+	settings = _backend_settings(endpoint, model, None)
+	if settings["use_open_webui"]:
+		return False
+	try:
+		resp = get_session("ollama").post(
+			settings["ollama_endpoint"],
+			json={"model": settings["ollama_model"], "keep_alive": CFG.get("ollama_keep_alive", "10m")},
+			timeout=get_timeout("ollama"),
+			headers=settings["ollama_headers"],
+		)
+		resp.raise_for_status()
+		return bool(resp.json().get("done", True))
+	except Exception as e:
+		print("Ollama preload error:", e)
+		return False
+
+
+def iter_sentences(chunks: Iterable[str], min_chars: int = 20) -> Iterator[str]:
+	"""Regroup a stream of text chunks into complete sentences.
+
+	A sentence is emitted as soon as terminal punctuation followed by
+	whitespace is seen, so TTS can start on the first sentence while the
+	rest is still being generated. Fragments shorter than `min_chars` are
+	merged with the following sentence to avoid choppy playback of very
+	short utterances ("Sure. ..."). Any remaining text is flushed when the
+	stream ends.
+	"""
+	buf = ""
+	for chunk in chunks:
+		buf += chunk
+		start = 0
+		for match in _SENTENCE_END.finditer(buf):
+			if match.end() - start < min_chars:
+				continue
+			sentence = buf[start:match.end()].strip()
+			if sentence:
+				yield sentence
+			start = match.end()
+		buf = buf[start:]
+	tail = buf.strip()
+	if tail:
+		yield tail
+
+
 def get_last_result_info() -> dict:
 	"""Return information about the last reasoning call.
 
-	Returns a dict with keys: 'backend' ("open_webui" or "ollama" or None)
-	and 'fallback' (bool) indicating whether a fallback occurred.
+	Returns a dict with keys: 'backend' ("open_webui" or "ollama" or None),
+	'fallback' (bool) indicating whether a fallback occurred, 'cache_hit'
+	(bool) and, when the response cache is enabled, 'cache' with its
+	hit/miss counters and size.
 	"""
-	return dict(LAST_RESULT)
+	info = dict(LAST_RESULT)
+	if RESPONSE_CACHE is not None:
+		info["cache"] = RESPONSE_CACHE.stats()
+	return info
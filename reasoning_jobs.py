@@ -0,0 +1,178 @@
+"""
+Background reasoning jobs for the dashboard.
+
+A text prompt is submitted as a job and runs on a small, bounded thread pool
+instead of inside the Flask request. The caller gets a job id straight away;
+the reply's tokens are appended to the job as the backend streams them, and
+any number of readers can follow them with events() (the interface turns
+these into Server-Sent Events). Finished jobs are kept for `reasoning_job_ttl`
+seconds so a page reload can still fetch the reply.
+
+Settings in `config/config.yaml`:
+
+    reasoning_job_workers: 2      # jobs generating at the same time
+    reasoning_job_queue: 16       # jobs waiting or running before submit() refuses
+    reasoning_job_ttl: 300        # seconds a finished job is kept
+"""
+
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import config_loader
+import metrics
+
+
+CFG = config_loader.load()
+
+
+class JobQueueFull(Exception):
+    """Raised by submit() when `reasoning_job_queue` jobs are already pending."""
+
+
+class ReasoningJob:
+    """One prompt and the reply streamed for it so far."""
+
+    def __init__(self, job_id, prompt):
+        self.id = job_id
+        self.prompt = prompt
+        self.status = "queued"   # queued -> running -> done | error
+        self.chunks = []
+        self.info = {}
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self._cond = threading.Condition()
+
+    @property
+    def done(self):
+        return self.status in ("done", "error")
+
+    @property
+    def text(self):
+        return "".join(self.chunks)
+
+    def _update(self, **fields):
+        with self._cond:
+            chunk = fields.pop("chunk", None)
+            if chunk:
+                self.chunks.append(chunk)
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self._cond.notify_all()
+
+    def events(self, start=0, timeout=None):
+        """
+        Yield (index, chunk) for every chunk from `start` on, waiting for new
+        ones until the job is done. Stops early after `timeout` seconds
+        without progress, so a stalled reader does not hold a thread forever.
+        """
+        index = start
+        while True:
+            with self._cond:
+                deadline = None if timeout is None else time.monotonic() + timeout
+                while index >= len(self.chunks) and not self.done:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return
+                    self._cond.wait(remaining)
+                chunks = self.chunks[index:]
+                finished = self.done
+            for chunk in chunks:
+                yield index, chunk
+                index += 1
+            if finished and index >= len(self.chunks):
+                return
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "text": self.text,
+            "info": self.info,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """
+    Runs reasoning jobs on `workers` threads, refusing new jobs once
+    `max_pending` are queued or running. `stream` is the token stream
+    function (default: reasoning_engine.stream_ollama).
+    """
+
+    def __init__(self, workers=2, max_pending=16, ttl=300.0, stream=None):
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._stream = stream
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="nova-reasoning")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, prompt, **kwargs):
+        """Queue `prompt`; keyword arguments go to the stream function. Returns the job."""
+        with self._lock:
+            self._prune()
+            pending = sum(1 for job in self._jobs.values() if not job.done)
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"{pending} reasoning jobs pending")
+            job = ReasoningJob(secrets.token_hex(8), prompt)
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, kwargs)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, kwargs):
+        job._update(status="running")
+        trace = metrics.start_trace("text", job=job.id)
+        with metrics.activate(trace):
+            self._generate(job, kwargs)
+        metrics.finish_trace(trace, outcome="ok" if job.status == "done" else job.status)
+
+    def _generate(self, job, kwargs):
+        started = time.perf_counter()
+        try:
+            from reasoning_engine import get_last_result_info
+            stream = self._stream
+            if stream is None:
+                # Backend failures must fail the job, not finish it with no text
+                from reasoning_engine import stream_ollama as stream
+                kwargs = dict(kwargs, raise_errors=True)
+            for chunk in stream(job.prompt, **kwargs):
+                if not job.chunks:
+                    metrics.record_span("first_chunk", started, time.perf_counter() - started)
+                job._update(chunk=chunk)
+            # LAST_RESULT is per thread, so this is the info of this job's call
+            job._update(status="done", info=get_last_result_info(), finished=time.time())
+        except Exception as e:
+            print("Reasoning job error:", e)
+            job._update(status="error", error=str(e), finished=time.time())
+        metrics.record_span("job", started, time.perf_counter() - started)
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl
+        for job_id in [j.id for j in self._jobs.values() if j.done and j.finished < cutoff]:
+            del self._jobs[job_id]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+_MANAGER = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """The process-wide JobManager, configured from config.yaml."""
+    global _MANAGER
+    with _manager_lock:
+        if _MANAGER is None:
+            _MANAGER = JobManager(
+                workers=int(CFG.get("reasoning_job_workers", 2)),
+                max_pending=int(CFG.get("reasoning_job_queue", 16)),
+                ttl=float(CFG.get("reasoning_job_ttl", 300)),
+            )
+        return _MANAGER
@@ -0,0 +1,305 @@
+"""
+Reminder scheduler backed by a min-heap of next-fire timestamps.
+
+Reminders are rows in the conversation database (see conversation_store.py),
+each with a recurrence rule and its next fire time. The scheduler keeps a heap
+of (next_fire, id) so the next due reminder is always at the top; wait()
+sleeps on a condition variable until exactly that moment, or until a reminder
+is added. Firing a reminder updates only its own row. Reminders added by
+another process (the dashboard) are picked up through SQLite's
+`PRAGMA data_version`, which changes whenever another connection commits.
+
+Recurrence rules:
+	once            fire at the next occurrence of `time` only
+	daily           every day at `time` (the default when a time is given)
+	weekdays        Monday to Friday at `time`
+	weekly          every 7 days at `time`
+	hourly          every hour from the first fire
+	every:<N>       every N minutes from the first fire
+"""
+
+import heapq
+import datetime
+import threading
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reminders (
+	id INTEGER PRIMARY KEY AUTOINCREMENT,
+	routine TEXT NOT NULL,
+	time TEXT,
+	recurrence TEXT NOT NULL DEFAULT 'once',
+	next_fire REAL,
+	last_fired REAL,
+	active INTEGER NOT NULL DEFAULT 1
+)
+"""
+
+RECURRENCES = ("once", "daily", "weekdays", "weekly", "hourly")
+
+# Calendar-based rules keep the wall-clock time across DST changes.
+_DAY_STEPS = {"daily": 1, "weekdays": 1, "weekly": 7}
+
+
+def parse_time(time_str: str):
+	"""Parse "HH:MM" into (hour, minute); raises ValueError otherwise."""
+	hour, minute = (int(part) for part in time_str.strip().split(":"))
+	if not (0 <= hour < 24 and 0 <= minute < 60):
+		raise ValueError(f"Invalid reminder time: {time_str!r}")
+	return hour, minute
+
+
+def validate_recurrence(rule: str) -> str:
+	rule = (rule or "once").strip().lower()
+	if rule in RECURRENCES:
+		return rule
+	if rule.startswith("every:"):
+		try:
+			if float(rule[6:]) > 0:
+				return rule
+		except ValueError:
+			pass
+	raise ValueError(f"Unknown reminder recurrence: {rule!r}")
+
+
+def first_occurrence(time_str: str, rule: str, now: float) -> float:
+	"""The first fire time at or after `now` for a reminder at `time_str` ("HH:MM")."""
+	hour, minute = parse_time(time_str)
+	base = datetime.datetime.fromtimestamp(now)
+	candidate = base.replace(hour=hour, minute=minute, second=0, microsecond=0)
+	while candidate.timestamp() < now or (rule == "weekdays" and candidate.weekday() >= 5):
+		candidate += datetime.timedelta(days=1)
+	return candidate.timestamp()
+
+
+def next_occurrence(rule: str, fire_at: float, now: float):
+	"""
+	The next fire time strictly after `now` for a reminder that was due at
+	`fire_at`, or None if the rule does not repeat. Periods missed while Nova
+	was not running are skipped rather than fired one after another.
+	"""
+	if rule == "once":
+		return None
+	if rule in _DAY_STEPS:
+		step = _DAY_STEPS[rule]
+		candidate = datetime.datetime.fromtimestamp(fire_at)
+		# Jump close to `now` first instead of stepping through every missed day.
+		missed_days = int((now - fire_at) // 86400) - 1
+		if missed_days > 0:
+			candidate += datetime.timedelta(days=missed_days - missed_days % step)
+		while True:
+			candidate += datetime.timedelta(days=step)
+			if candidate.timestamp() > now and not (rule == "weekdays" and candidate.weekday() >= 5):
+				return candidate.timestamp()
+	period = 3600.0 if rule == "hourly" else float(rule[6:]) * 60.0
+	periods = int((now - fire_at) // period) + 1
+	return fire_at + max(periods, 1) * period
+
+
+def _row_to_reminder(row) -> dict:
+	reminder = {"id": row[0], "routine": row[1], "recurrence": row[3], "next_fire": row[4], "last_fired": row[5]}
+	if row[2]:
+		reminder["time"] = row[2]
+	return reminder
+
+
+class ReminderScheduler:
+	"""
+	Thread-safe reminder scheduler persisted in a ConversationStore's database.
+	`clock` returns the current Unix time; tests pass a simulated clock.
+	"""
+
+	def __init__(self, store, clock=time.time, poll_interval: float = 5.0):
+		self.store = store
+		self.clock = clock
+		self.poll_interval = poll_interval
+		self._cond = threading.Condition(threading.RLock())
+		self._reminders = {}   # id -> reminder dict
+		self._heap = []        # (next_fire, id); entries whose next_fire changed are skipped
+		# PRAGMA data_version last seen per thread; the value is per connection.
+		self._data_versions = {}
+		self._loaded = False
+
+	# -- persistence -----------------------------------------------------------
+
+	def _conn(self):
+		conn = self.store.connection()
+		if not self._loaded:
+			self.store.retry(lambda: conn.execute(_SCHEMA))
+		return conn
+
+	def _data_version(self, conn) -> int:
+		return conn.execute("PRAGMA data_version").fetchone()[0]
+
+	def reload(self):
+		"""Rebuild the heap from the database."""
+		with self._cond:
+			conn = self._conn()
+			rows = conn.execute(
+				"SELECT id, routine, time, recurrence, next_fire, last_fired FROM reminders WHERE active = 1"
+			).fetchall()
+			self._data_versions[threading.get_ident()] = self._data_version(conn)
+			self._reminders = {row[0]: _row_to_reminder(row) for row in rows}
+			self._heap = [(r["next_fire"], r["id"]) for r in self._reminders.values() if r["next_fire"] is not None]
+			heapq.heapify(self._heap)
+			self._loaded = True
+			self._cond.notify_all()
+
+	def _refresh(self):
+		"""Reload if another connection changed the database since the last look."""
+		seen = self._data_versions.get(threading.get_ident())
+		if not self._loaded or seen is None or self._data_version(self.store.connection()) != seen:
+			self.reload()
+
+	def import_json(self, reminders: list) -> int:
+		"""Import legacy reminders ({"routine", "time"?}) into an empty table."""
+		with self._cond:
+			conn = self._conn()
+			if conn.execute("SELECT COUNT(*) FROM reminders").fetchone()[0]:
+				return 0
+			imported = 0
+			for r in reminders:
+				if isinstance(r, dict) and r.get("routine"):
+					self.add(r["routine"], r.get("time"))
+					imported += 1
+			return imported
+
+	# -- public API --------------------------------------------------------------
+
+	def add(self, routine: str, time_str: str = None, recurrence: str = None) -> dict:
+		"""
+		Schedule a reminder. With `time_str` ("HH:MM") it fires at that time
+		(daily unless another recurrence is given); without a time, interval
+		rules ("hourly", "every:N") start one period from now and other
+		reminders are only listed. An identical active reminder is returned
+		instead of being added twice.
+		"""
+		if recurrence is None:
+			recurrence = "daily" if time_str else "once"
+		recurrence = validate_recurrence(recurrence)
+		now = self.clock()
+		if time_str:
+			parse_time(time_str)
+			next_fire = first_occurrence(time_str, recurrence, now)
+		elif recurrence == "hourly" or recurrence.startswith("every:"):
+			next_fire = next_occurrence(recurrence, now, now)
+		else:
+			next_fire = None
+		with self._cond:
+			self._refresh()
+			for r in self._reminders.values():
+				if (r["routine"], r.get("time"), r["recurrence"]) == (routine, time_str or None, recurrence):
+					return dict(r)
+			conn = self._conn()
+			cur = self.store.retry(lambda: conn.execute(
+				"INSERT INTO reminders (routine, time, recurrence, next_fire) VALUES (?, ?, ?, ?)",
+				(routine, time_str or None, recurrence, next_fire),
+			))
+			reminder = {"id": cur.lastrowid, "routine": routine, "recurrence": recurrence, "next_fire": next_fire, "last_fired": None}
+			if time_str:
+				reminder["time"] = time_str
+			self._reminders[reminder["id"]] = reminder
+			if next_fire is not None:
+				heapq.heappush(self._heap, (next_fire, reminder["id"]))
+			# Wake wait() in case this reminder is due before the one it sleeps for.
+			self._cond.notify_all()
+			return dict(reminder)
+
+	def remove(self, reminder_id: int):
+		with self._cond:
+			conn = self._conn()
+			self.store.retry(lambda: conn.execute("UPDATE reminders SET active = 0 WHERE id = ?", (reminder_id,)))
+			self._reminders.pop(reminder_id, None)
+			self._cond.notify_all()
+
+	def reminders(self) -> list:
+		"""Active reminders, soonest first (unscheduled ones last)."""
+		with self._cond:
+			self._refresh()
+			return sorted(
+				(dict(r) for r in self._reminders.values()),
+				key=lambda r: (r["next_fire"] is None, r["next_fire"] or 0, r["id"]),
+			)
+
+	def next_fire(self):
+		"""Timestamp of the next due reminder, or None."""
+		with self._cond:
+			self._refresh()
+			self._drop_stale()
+			return self._heap[0][0] if self._heap else None
+
+	def pop_due(self, now: float = None) -> list:
+		"""
+		Return the reminders due at `now` (default: the clock) and schedule
+		their next occurrence. Each occurrence is returned exactly once.
+		"""
+		with self._cond:
+			self._refresh()
+			if now is None:
+				now = self.clock()
+			due, updates = [], []
+			while self._heap:
+				self._drop_stale()
+				if not self._heap or self._heap[0][0] > now:
+					break
+				fire_at, reminder_id = heapq.heappop(self._heap)
+				reminder = self._reminders[reminder_id]
+				next_fire = next_occurrence(reminder["recurrence"], fire_at, now)
+				reminder["last_fired"] = now
+				reminder["next_fire"] = next_fire
+				if next_fire is None:
+					del self._reminders[reminder_id]
+				else:
+					heapq.heappush(self._heap, (next_fire, reminder_id))
+				due.append(dict(reminder))
+				updates.append((next_fire, now, 0 if next_fire is None else 1, reminder_id))
+			if updates:
+				conn = self._conn()
+				self.store.retry(lambda: conn.execute("BEGIN IMMEDIATE"))
+				try:
+					conn.executemany("UPDATE reminders SET next_fire = ?, last_fired = ?, active = ? WHERE id = ?", updates)
+					conn.execute("COMMIT")
+				except Exception:
+					conn.execute("ROLLBACK")
+					raise
+			return due
+
+	def wait(self, timeout: float = None, stop_event=None) -> list:
+		"""
+		Block until at least one reminder is due and return pop_due(), or
+		return [] after `timeout` seconds (or once `stop_event` is set).
+		Sleeps exactly until the next fire time, waking early when a reminder
+		is added, and every `poll_interval` seconds to notice changes made by
+		other processes.
+		"""
+		deadline = None if timeout is None else time.monotonic() + timeout
+		with self._cond:
+			while True:
+				due = self.pop_due()
+				if due:
+					return due
+				if stop_event is not None and stop_event.is_set():
+					return []
+				delay = self.poll_interval
+				upcoming = self.next_fire()
+				if upcoming is not None:
+					delay = min(delay, max(0.0, upcoming - self.clock()))
+				if deadline is not None:
+					remaining = deadline - time.monotonic()
+					if remaining <= 0:
+						return []
+					delay = min(delay, remaining)
+				self._cond.wait(delay)
+
+	def wake(self):
+		"""Wake a thread blocked in wait() (e.g. on shutdown)."""
+		with self._cond:
+			self._cond.notify_all()
+
+	def _drop_stale(self):
+		while self._heap:
+			fire_at, reminder_id = self._heap[0]
+			reminder = self._reminders.get(reminder_id)
+			if reminder is not None and reminder["next_fire"] == fire_at:
+				return
+			heapq.heappop(self._heap)
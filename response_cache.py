@@ -0,0 +1,127 @@
+"""
+Response cache for the reasoning engine.
+
+Replies are keyed on a normalized form of the prompt plus the model, the
+backend and a fingerprint of any context the reply depends on (conversation
+memory, plugin results), so "Hey Nova, turn off the lights please!" and
+"turn off the lights" share an entry while a changed context
+never gets a stale hit. Entries are evicted least-recently-used beyond
+`max_entries` and expire after `ttl` seconds. The cache is persisted to a
+JSON file under logs/ so it survives restarts.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+CACHE_FILE = "logs/response_cache.json"
+
+# Wake words and politeness tokens; they never change what is being asked.
+FILLER_WORDS = {"hey", "hi", "nova", "please", "um", "uh"}
+
+_PUNCTUATION = re.compile(r"[^\w\s']")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Case-fold, strip punctuation and filler words, and collapse whitespace."""
+    text = unicodedata.normalize("NFKC", prompt or "").casefold()
+    words = [w.strip("'") for w in _PUNCTUATION.sub(" ", text).split()]
+    kept = [w for w in words if w and w not in FILLER_WORDS]
+    # A prompt made only of filler words still needs a distinct key.
+    return " ".join(kept or words)
+
+
+def context_fingerprint(context) -> str:
+    """Stable short hash of any JSON-serializable context (None -> "")."""
+    if context is None:
+        return ""
+    blob = json.dumps(context, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU + TTL cache of reasoning replies, optionally persisted to disk.
+    """
+
+    def __init__(self, path: str = CACHE_FILE, max_entries: int = 256, ttl: float = 3600.0, clock=time.time):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> [created_at, value, backend]
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def make_key(prompt: str, model: str, backend: str, context=None) -> str:
+        parts = [normalize_prompt(prompt), model or "", backend or "", context_fingerprint(context)]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """Return (value, backend) for a live entry, or None. Counts hits and misses."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl and self.clock() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def put(self, key: str, value: str, backend: str = None):
+        if not value:
+            return
+        with self._lock:
+            self._entries[key] = [self.clock(), value, backend]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._save()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except Exception as e:
+            print("Failed to load response cache:", e)
+            return
+        now = self.clock()
+        # Stored oldest-first, so insertion order restores the LRU order.
+        for key, entry in data.get("entries", []):
+            if not self.ttl or now - entry[0] <= self.ttl:
+                self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"entries": list(self._entries.items())}, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print("Failed to save response cache:", e)
@@ -0,0 +1,151 @@
+"""
+Incremental routine detection over the conversation history.
+
+Every keyword or phrase in the configured set is matched by one compiled
+regular expression, and per-keyword counts and time-of-day histograms are kept
+in tables next to the turns in the conversation database. The index remembers
+the last turn it has seen, so each new turn is indexed once (also turns saved
+by another process) and queries read the counts instead of rescanning the
+history. Changing the keyword set rebuilds the index from the history.
+"""
+
+import re
+import time
+import hashlib
+
+DEFAULT_KEYWORDS = ["remind", "meeting", "drink water", "study", "exercise"]
+
+_SCHEMA = (
+	"CREATE TABLE IF NOT EXISTS routine_meta (key TEXT PRIMARY KEY, value TEXT)",
+	"CREATE TABLE IF NOT EXISTS routine_counts (keyword TEXT PRIMARY KEY, count INTEGER NOT NULL, last_time REAL)",
+	"CREATE TABLE IF NOT EXISTS routine_hours (keyword TEXT, hour INTEGER, count INTEGER NOT NULL, PRIMARY KEY (keyword, hour))",
+)
+
+
+def compile_keywords(keywords) -> re.Pattern:
+	"""
+	One case-insensitive pattern matching any keyword at the start of a word,
+	so "remind" also matches "reminder". Whitespace inside a phrase matches
+	any run of whitespace. Longer keywords are tried first, so at a given
+	position the longest keyword wins ("drink water" over "drink").
+	"""
+	ordered = sorted(enumerate(keywords), key=lambda item: -len(item[1]))
+	alternatives = []
+	for i, keyword in ordered:
+		phrase = r"\s+".join(re.escape(part) for part in keyword.split())
+		alternatives.append(f"(?P<k{i}>{phrase})")
+	return re.compile(r"\b(?:" + "|".join(alternatives) + ")", re.IGNORECASE)
+
+
+def normalize_keywords(keywords) -> list:
+	"""Lower-case, whitespace-collapsed, de-duplicated keywords in their original order."""
+	normalized = [" ".join(k.lower().split()) for k in (keywords or DEFAULT_KEYWORDS) if k and k.strip()]
+	return list(dict.fromkeys(normalized))
+
+
+def keyword_fingerprint(keywords) -> str:
+	return hashlib.sha256("\x1f".join(sorted(keywords)).encode("utf-8")).hexdigest()[:16]
+
+
+class RoutineIndex:
+	"""
+	Routine counts for a ConversationStore, maintained incrementally.
+	"""
+
+	def __init__(self, store, keywords=None):
+		self.store = store
+		self.keywords = normalize_keywords(keywords)
+		self.pattern = compile_keywords(self.keywords)
+		self.fingerprint = keyword_fingerprint(self.keywords)
+		self._ready = False
+
+	def match(self, text: str) -> set:
+		"""The keywords mentioned in `text` (each counted once per turn)."""
+		return {self.keywords[int(m.lastgroup[1:])] for m in self.pattern.finditer(text or "")}
+
+	def sync(self) -> int:
+		"""Index every turn saved since the last sync. Returns the number of turns indexed."""
+		conn = self.store.connection()
+		if not self._ready:
+			for statement in _SCHEMA:
+				self.store.retry(lambda: conn.execute(statement))
+			self._ready = True
+		self.store.retry(lambda: conn.execute("BEGIN IMMEDIATE"))
+		try:
+			meta = dict(conn.execute("SELECT key, value FROM routine_meta").fetchall())
+			last_id = int(meta.get("last_id", 0))
+			if meta.get("fingerprint") != self.fingerprint:
+				# New keyword set: recount the whole history
+				conn.execute("DELETE FROM routine_counts")
+				conn.execute("DELETE FROM routine_hours")
+				last_id = 0
+			indexed = 0
+			for turn_id, turn in self.store.iter_turns(after_id=last_id):
+				self._count(conn, turn)
+				last_id = turn_id
+				indexed += 1
+			conn.executemany(
+				"INSERT OR REPLACE INTO routine_meta (key, value) VALUES (?, ?)",
+				[("last_id", str(last_id)), ("fingerprint", self.fingerprint)],
+			)
+			conn.execute("COMMIT")
+			return indexed
+		except Exception:
+			conn.execute("ROLLBACK")
+			raise
+
+	def _count(self, conn, turn: dict):
+		matched = self.match(turn.get("user", ""))
+		if not matched:
+			return
+		hour = time.localtime(turn.get("time") or time.time()).tm_hour
+		for keyword in matched:
+			conn.execute(
+				"INSERT INTO routine_counts (keyword, count, last_time) VALUES (?, 1, ?) "
+				"ON CONFLICT(keyword) DO UPDATE SET count = count + 1, last_time = excluded.last_time",
+				(keyword, turn.get("time")),
+			)
+			conn.execute(
+				"INSERT INTO routine_hours (keyword, hour, count) VALUES (?, ?, 1) "
+				"ON CONFLICT(keyword, hour) DO UPDATE SET count = count + 1",
+				(keyword, hour),
+			)
+
+	def routines(self, min_count: int = 2) -> list:
+		"""
+		Keywords mentioned in at least `min_count` turns, most frequent first.
+		Returns a list of dicts: keyword, count, last_time, peak_hour and hours
+		(a 24-bucket time-of-day histogram).
+		"""
+		self.sync()
+		conn = self.store.connection()
+		rows = conn.execute(
+			"SELECT keyword, count, last_time FROM routine_counts WHERE count >= ? ORDER BY count DESC, keyword",
+			(min_count,),
+		).fetchall()
+		result = []
+		for keyword, count, last_time in rows:
+			hours = [0] * 24
+			for hour, n in conn.execute("SELECT hour, count FROM routine_hours WHERE keyword = ?", (keyword,)):
+				hours[hour] = n
+			result.append({
+				"keyword": keyword,
+				"count": count,
+				"last_time": last_time,
+				"peak_hour": max(range(24), key=lambda h: hours[h]),
+				"hours": hours,
+			})
+		return result
+
+	def clear(self):
+		"""Forget all counts (the history itself is cleared by the store)."""
+		self.sync()
+		conn = self.store.connection()
+		self.store.retry(lambda: conn.execute("BEGIN IMMEDIATE"))
+		try:
+			conn.execute("DELETE FROM routine_counts")
+			conn.execute("DELETE FROM routine_hours")
+			conn.execute("COMMIT")
+		except Exception:
+			conn.execute("ROLLBACK")
+			raise
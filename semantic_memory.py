@@ -0,0 +1,290 @@
+"""
+Long-term semantic memory over the full conversation history.
+
+Every saved turn is embedded with a hashed TF-IDF model that needs no
+download: words and word pairs are hashed (signed) into a fixed number of
+dimensions, weighted by sublinear term frequency and L2-normalized. Vectors
+live in a memory-mapped matrix under logs/ (int8 by default, quantized with
+a scale of 127; float32 optionally), next to the turn id of every vector,
+and are added incrementally as turns are saved, like the routine index.
+
+The matrix is stored dimension-major (one contiguous row per dimension), so
+scoring a query only reads the rows of the dimensions the query uses; a
+transcript touches a few dozen of them at most. Recall weights the query by
+inverse document frequency (per hashed dimension, kept alongside the matrix)
+and scores the turns with NumPy dot products over fixed-size chunks, keeping
+the top k per chunk with argpartition, so memory stays flat however long the
+history grows. No IVF/PQ index is needed at this cost.
+
+The voice loop (saving turns) and the dashboard (recalling them) share the
+files. Every sync and search holds an exclusive lock on `lock` in the
+directory and re-reads meta.json first, re-mapping the matrix when another
+process grew it, so neither works from stale counts. A clear is detected by
+the store's generation (ConversationStore.generation()), recorded in
+meta.json, not by comparing turn ids, which keep growing after a clear.
+"""
+
+import os
+import re
+import json
+import zlib
+import threading
+from contextlib import contextmanager
+import numpy as np
+try:
+	import fcntl
+except ImportError:  # not available on Windows: only threads are coordinated
+	fcntl = None
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+# Words that carry no topic; they would dominate the hashed vectors.
+STOP_WORDS = {
+	"a", "an", "the", "and", "or", "but", "is", "are", "was", "were", "be", "to", "of", "in", "on",
+	"at", "for", "with", "it", "its", "this", "that", "i", "you", "me", "my", "your", "we", "do",
+	"does", "did", "can", "could", "what", "how", "when", "so", "if", "please", "nova", "hey",
+}
+
+
+def tokenize(text: str) -> list:
+	"""Lower-cased words without stop words, plus adjacent word pairs."""
+	words = [w for w in _WORD_RE.findall((text or "").lower()) if w not in STOP_WORDS]
+	return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class HashingEmbedder:
+	"""Hashed term-frequency vectors; stable across processes (crc32, not hash())."""
+
+	def __init__(self, dim: int = 256):
+		self.dim = dim
+
+	def buckets(self, text: str) -> dict:
+		"""{dimension: signed weight} for `text`, before normalization."""
+		counts = {}
+		for token in tokenize(text):
+			h = zlib.crc32(token.encode("utf-8"))
+			bucket = h % self.dim
+			sign = 1.0 if (h >> 31) & 1 else -1.0
+			counts[bucket] = counts.get(bucket, 0.0) + sign
+		return counts
+
+	def vectorize(self, buckets: dict) -> np.ndarray:
+		"""L2-normalized vector with sublinear (1 + log tf) weights from buckets()."""
+		vector = np.zeros(self.dim, dtype=np.float32)
+		for bucket, count in buckets.items():
+			if count:
+				vector[bucket] = np.sign(count) * (1.0 + np.log(abs(count)))
+		norm = np.linalg.norm(vector)
+		return vector / norm if norm else vector
+
+	def embed(self, text: str) -> np.ndarray:
+		return self.vectorize(self.buckets(text))
+
+
+class SemanticMemory:
+	"""
+	Vector index of the turns in a ConversationStore, persisted in `directory`.
+	"""
+
+	CHUNK = 65536
+	GROWTH = 4096
+
+	def __init__(self, store, directory: str = "logs/conversation_history_vectors", dim: int = 256, dtype: str = "int8"):
+		self.store = store
+		self.directory = directory
+		self.embedder = HashingEmbedder(dim)
+		self.dtype = np.dtype(dtype)
+		if self.dtype not in (np.dtype("int8"), np.dtype("float32")):
+			raise ValueError(f"Unsupported semantic memory dtype: {dtype}")
+		self._lock = threading.Lock()
+		self._lock_fd = None
+		self._mapped = None  # (capacity, inode) of the current memory maps
+
+	# -- storage -------------------------------------------------------------
+
+	def _path(self, name: str) -> str:
+		return os.path.join(self.directory, name)
+
+	@contextmanager
+	def _locked(self):
+		"""Hold the thread and file locks, with the metadata freshly read from disk."""
+		with self._lock:
+			if self._lock_fd is None:
+				os.makedirs(self.directory, exist_ok=True)
+				self._lock_fd = os.open(self._path("lock"), os.O_RDWR | os.O_CREAT, 0o644)
+			if fcntl is not None:
+				fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+			try:
+				self._load()
+				yield
+			finally:
+				if fcntl is not None:
+					fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+	def _load(self):
+		meta = {}
+		try:
+			with open(self._path("meta.json"), "r") as f:
+				meta = json.load(f)
+		except (OSError, ValueError):
+			pass
+		if (meta.get("dim"), meta.get("dtype")) != (self.embedder.dim, self.dtype.name):
+			# Missing or built with other settings: start over from the history
+			meta = {"dim": self.embedder.dim, "dtype": self.dtype.name, "rows": 0, "capacity": 0, "last_id": 0, "turns": 0}
+		self._meta = meta
+		self._df = np.zeros(self.embedder.dim, dtype=np.float64)
+		if meta["rows"]:
+			self._df = np.fromfile(self._path("df.bin"), dtype=np.float64)
+		self._map(meta["capacity"])
+
+	def _map(self, capacity: int):
+		"""(Re)open the memory maps with room for `capacity` turns, unless they already are."""
+		inode = None
+		if capacity:
+			inode = os.stat(self._path("vectors.bin")).st_ino
+		if self._mapped == (capacity, inode):
+			return
+		self._vectors = self._ids = None
+		self._mapped = None
+		if not capacity:
+			return
+		self._vectors = np.memmap(self._path("vectors.bin"), dtype=self.dtype, mode="r+", shape=(self.embedder.dim, capacity))
+		self._ids = np.memmap(self._path("ids.bin"), dtype=np.int64, mode="r+", shape=(capacity,))
+		self._mapped = (capacity, inode)
+
+	def _grow(self, needed: int):
+		"""Make room for `needed` turns, doubling the capacity (each dimension's row is copied once)."""
+		capacity = self._meta["capacity"]
+		if needed <= capacity:
+			return
+		new_capacity = max(needed, capacity * 2, self.GROWTH)
+		rows = self._meta["rows"]
+		tmp = self._path("vectors.bin.tmp")
+		grown = np.memmap(tmp, dtype=self.dtype, mode="w+", shape=(self.embedder.dim, new_capacity))
+		if rows:
+			grown[:, :rows] = self._vectors[:, :rows]
+		grown.flush()
+		del grown
+		self._vectors = None
+		self._mapped = None
+		# Other processes re-map the new file (its inode changed) when they next take the lock
+		os.replace(tmp, self._path("vectors.bin"))
+		with open(self._path("ids.bin"), "ab") as f:
+			f.truncate(new_capacity * 8)
+		self._meta["capacity"] = new_capacity
+		self._map(new_capacity)
+
+	def _save_meta(self):
+		if self._vectors is not None:
+			self._vectors.flush()
+			self._ids.flush()
+		self._df.tofile(self._path("df.bin"))
+		tmp = self._path("meta.json.tmp")
+		with open(tmp, "w") as f:
+			json.dump(self._meta, f)
+		os.replace(tmp, self._path("meta.json"))
+
+	def _reset(self, generation: int):
+		self._meta.update(rows=0, last_id=0, turns=0, generation=generation)
+		self._df[:] = 0
+
+	# -- indexing ----------------------------------------------------------------
+
+	@staticmethod
+	def turn_text(turn: dict) -> str:
+		return f"{turn.get('user', '')} {turn.get('nova', '')}"
+
+	def _quantize(self, vector: np.ndarray) -> np.ndarray:
+		if self.dtype == np.int8:
+			return np.round(vector * 127.0).astype(np.int8)
+		return vector
+
+	def sync(self) -> int:
+		"""Embed every turn saved since the last sync. Returns the number of turns added."""
+		with self._locked():
+			return self._sync()
+
+	def _sync(self) -> int:
+		# Read before the turns: a clear racing with this sync leaves the old
+		# generation in meta.json, so the next sync starts over.
+		generation = self.store.generation()
+		cleared = self._meta.get("generation") != generation
+		if cleared:
+			# The history was cleared (possibly by another process)
+			self._reset(generation)
+		added = 0
+		batch_ids, batch_vectors = [], []
+		for turn_id, turn in self.store.iter_turns(after_id=self._meta["last_id"]):
+			buckets = self.embedder.buckets(self.turn_text(turn))
+			for bucket in buckets:
+				self._df[bucket] += 1
+			batch_ids.append(turn_id)
+			batch_vectors.append(self.embedder.vectorize(buckets))
+			self._meta["last_id"] = turn_id
+			added += 1
+		if added:
+			rows = self._meta["rows"]
+			self._grow(rows + added)
+			self._vectors[:, rows:rows + added] = self._quantize(np.stack(batch_vectors, axis=1))
+			self._ids[rows:rows + added] = batch_ids
+			self._meta["rows"] = rows + added
+			self._meta["turns"] += added
+		if added or cleared:
+			self._save_meta()
+		return added
+
+	def clear(self):
+		with self._locked():
+			self._reset(self.store.generation())
+			self._save_meta()
+
+	# -- retrieval -------------------------------------------------------------
+
+	def query_vector(self, text: str) -> np.ndarray:
+		"""Embedding of `text` with each dimension weighted by its inverse document frequency."""
+		vector = self.embedder.embed(text)
+		n = max(self._meta["turns"], 1)
+		idf = np.log((1.0 + n) / (1.0 + self._df)).astype(np.float32) + 1.0
+		return vector * idf
+
+	def search(self, text: str, k: int = 3, exclude_after: int = None, min_score: float = 0.0) -> list:
+		"""
+		The `k` most similar turns to `text` as (turn id, score), best first.
+		Turns with id > `exclude_after` (e.g. the ones already in the prompt's
+		recent window) and scores below `min_score` are left out.
+		"""
+		with self._locked():
+			self._sync()
+			rows = self._meta["rows"]
+			if not rows or k <= 0:
+				return []
+			query = self.query_vector(text)
+			if not query.any():
+				return []
+			if self.dtype == np.int8:
+				query = query / 127.0
+			dims = np.flatnonzero(query)
+			weights = query[dims].astype(np.float32)
+			best_scores, best_ids = [], []
+			for start in range(0, rows, self.CHUNK):
+				end = min(start + self.CHUNK, rows)
+				scores = weights @ self._vectors[dims, start:end].astype(np.float32, copy=False)
+				ids = self._ids[start:end]
+				if exclude_after is not None:
+					scores = np.where(ids > exclude_after, -np.inf, scores)
+				if end - start > k:
+					top = np.argpartition(scores, -k)[-k:]
+					scores, ids = scores[top], ids[top]
+				best_scores.append(np.asarray(scores))
+				best_ids.append(np.asarray(ids))
+			scores = np.concatenate(best_scores)
+			ids = np.concatenate(best_ids)
+			order = np.argsort(-scores)[:k]
+			return [(int(ids[i]), float(scores[i])) for i in order if np.isfinite(scores[i]) and scores[i] >= min_score and scores[i] > 0]
+
+	def recall(self, text: str, k: int = 3, exclude_after: int = None, min_score: float = 0.0) -> list:
+		"""The turns found by search(), oldest first, each with "id" and "score" added."""
+		hits = self.search(text, k, exclude_after, min_score)
+		turns = self.store.get_turns([turn_id for turn_id, _ in hits])
+		found = [dict(turns[turn_id], id=turn_id, score=score) for turn_id, score in hits if turn_id in turns]
+		return sorted(found, key=lambda turn: turn["id"])
@@ -1,25 +1,92 @@
 """
 Integrates Whisper.cpp for offline speech-to-text transcription.
+
+By default audio is sent to a long-lived whisper.cpp server (the `whisper`
+service in docker-compose, port 9000), which keeps the model loaded between
+utterances. If the server is disabled or unreachable, the one-shot
+`whisper.cpp/main` subprocess is used as a fallback.
+
+StreamingTranscriber transcribes a live capture incrementally, emitting
+partial hypotheses while the user is still speaking.
 """
 
+import os
+import re
+import json
+import time
+import queue
+import threading
 import subprocess
+import tempfile
+import config_loader
+import numpy as np
+from audio_buffer import AudioBuffer
+from http_pool import get_session, get_timeout
+import metrics
+
+
+CFG = config_loader.load()
+
+# Latest partial transcript, shared with the dashboard through the logs/ volume.
+PARTIAL_FILE = "logs/stt_partial.json"
 
-def transcribe_audio(audio_path: str, whisper_path: str = "./whisper.cpp/main") -> str:
+# Monotonic time before which the server is not retried after a failure, so an
+# unreachable server costs one connection attempt per cooldown, not per utterance.
+_SERVER_DOWN_UNTIL = 0.0
+
+
+def pcm_to_wav_bytes(pcm, sample_rate: int = 16000) -> bytes:
 	"""
-	Transcribes audio using Whisper.cpp executable.
-	Args:
-		audio_path (str): Path to .wav file.
-		whisper_path (str): Path to Whisper.cpp executable.
-	Returns:
-		str: Transcribed text.
+	Wraps mono 16-bit PCM samples (numpy int16 array, bytes or memoryview) in a WAV container.
 	"""
-	print(f"Transcribing {audio_path} with Whisper.cpp...")
-	result = subprocess.run([
-		whisper_path,
-		"-f", audio_path,
-		"-m", "models/ggml-base.en.bin",
-		"-otxt"
-	], capture_output=True, text=True)
+	return AudioBuffer(pcm, sample_rate).to_wav_bytes()
+
+
+def _server_url():
+	if CFG.get("whisper_backend", "server") != "server":
+		return None
+	return CFG.get("whisper_server_url", "http://localhost:9000/inference")
+
+
+def server_available() -> bool:
+	"""True if the whisper.cpp server is configured and not in its failure cooldown."""
+	return bool(_server_url()) and time.monotonic() >= _SERVER_DOWN_UNTIL
+
+
+def _transcribe_server(wav_bytes: bytes):
+	"""
+	Posts WAV bytes to the whisper.cpp server. Returns the transcript, or None
+	if the server is disabled or failed (the caller then falls back).
+	"""
+	global _SERVER_DOWN_UNTIL
+	url = _server_url()
+	if not url or time.monotonic() < _SERVER_DOWN_UNTIL:
+		return None
+	try:
+		with metrics.span("stt_server"):
+			response = get_session("whisper").post(
+				url,
+				files={"file": ("audio.wav", wav_bytes, "audio/wav")},
+				data={"response_format": "json", "temperature": "0.0"},
+				timeout=get_timeout("whisper"),
+			)
+			response.raise_for_status()
+			return response.json().get("text", "").strip()
+	except Exception as e:
+		print("Whisper.cpp server error, falling back to subprocess:", e)
+		metrics.inc("fallbacks", component="stt", to="subprocess")
+		_SERVER_DOWN_UNTIL = time.monotonic() + float(CFG.get("whisper_server_retry_after", 30))
+		return None
+
+
+def _transcribe_subprocess(audio_path: str, whisper_path: str) -> str:
+	with metrics.span("stt_subprocess"):
+		result = subprocess.run([
+			whisper_path,
+			"-f", audio_path,
+			"-m", CFG.get("whisper_model", "models/ggml-base.en.bin"),
+			"-otxt"
+		], capture_output=True, text=True)
 	if result.returncode != 0:
 		print("Whisper.cpp error:", result.stderr)
 		return ""
@@ -33,3 +100,254 @@ def transcribe_audio(audio_path: str, whisper_path: str = "./whisper.cpp/main")
 	except Exception as e:
 		print("Error reading transcript:", e)
 		return ""
+
+
+def transcribe_pcm(pcm, sample_rate: int = 16000, whisper_path: str = "./whisper.cpp/main") -> str:
+	"""
+	Transcribes an in-memory buffer of mono 16-bit PCM samples.
+	Args:
+		pcm: numpy int16 array, bytes or memoryview of samples.
+		sample_rate (int): Sample rate of the buffer.
+		whisper_path (str): Path to Whisper.cpp executable (fallback only).
+	Returns:
+		str: Transcribed text.
+	"""
+	wav_bytes = pcm_to_wav_bytes(pcm, sample_rate)
+	transcript = _transcribe_server(wav_bytes)
+	if transcript is not None:
+		return transcript
+	# The subprocess fallback needs a file on disk.
+	fd, tmp_path = tempfile.mkstemp(suffix=".wav")
+	try:
+		with os.fdopen(fd, "wb") as f:
+			f.write(wav_bytes)
+		return _transcribe_subprocess(tmp_path, whisper_path)
+	finally:
+		for path in (tmp_path, tmp_path.replace(".wav", ".txt")):
+			if os.path.exists(path):
+				os.remove(path)
+
+
+def transcribe_audio(audio_path, whisper_path: str = "./whisper.cpp/main") -> str:
+	"""
+	Transcribes audio using the whisper.cpp server, or the Whisper.cpp executable as a fallback.
+	Args:
+		audio_path (str or AudioBuffer): Path to .wav file, or an in-memory buffer.
+		whisper_path (str): Path to Whisper.cpp executable.
+	Returns:
+		str: Transcribed text.
+	"""
+	if isinstance(audio_path, AudioBuffer):
+		print(f"Transcribing {audio_path.duration:.1f}s of audio with Whisper.cpp...")
+		buffer = audio_path.mono()
+		return transcribe_pcm(buffer.samples, buffer.sample_rate, whisper_path)
+	print(f"Transcribing {audio_path} with Whisper.cpp...")
+	if _server_url():
+		with open(audio_path, "rb") as f:
+			transcript = _transcribe_server(f.read())
+		if transcript is not None:
+			print("Transcription complete.")
+			return transcript
+	return _transcribe_subprocess(audio_path, whisper_path)
+
+
+def warm_up(seconds: float = 0.5, sample_rate: int = 16000) -> bool:
+	"""
+	Sends a short stretch of silence to the whisper.cpp server, so its
+	first-inference setup (and the HTTP connection) is done before the user
+	speaks. Does nothing when the server is disabled: the subprocess fallback
+	loads the model on every call anyway. Returns True if the server answered.
+	"""
+	if not server_available():
+		return False
+	silence = np.zeros(int(seconds * sample_rate), dtype=np.int16)
+	return _transcribe_server(pcm_to_wav_bytes(silence, sample_rate)) is not None
+
+
+def publish_partial(text: str, final: bool = False, path: str = PARTIAL_FILE):
+	"""Atomically record the latest partial transcript for other processes (e.g. the dashboard)."""
+	tmp_path = f"{path}.tmp"
+	try:
+		with open(tmp_path, "w") as f:
+			json.dump({"text": text, "final": final, "time": time.time()}, f)
+		os.replace(tmp_path, path)
+	except Exception as e:
+		print("Error publishing partial transcript:", e)
+
+
+def read_partial(path: str = PARTIAL_FILE) -> dict:
+	"""Return the last published partial transcript ({} if none)."""
+	try:
+		with open(path, "r") as f:
+			return json.load(f)
+	except Exception:
+		return {}
+
+
+def _words(text: str) -> list:
+	return [re.sub(r"[^\w']", "", w).lower() for w in text.split()]
+
+
+def merge_hypotheses(prev: str, new: str) -> str:
+	"""
+	Joins two transcripts of overlapping audio windows.
+	The longest run of words ending `prev` that also starts `new` is treated
+	as the overlap and kept once. The first word of `new` may be a fragment of
+	a word cut at the window edge, so an overlap starting at its second word
+	is accepted too. Without any overlap `new` is appended.
+	"""
+	if not prev:
+		return new
+	if not new:
+		return prev
+	prev_words, new_words = prev.split(), new.split()
+	prev_norm, new_norm = _words(prev), _words(new)
+	for k in range(min(len(prev_norm), len(new_norm)), 0, -1):
+		for skip in (0, 1):
+			if prev_norm[-k:] == new_norm[skip:skip + k]:
+				return " ".join(prev_words + new_words[skip + k:])
+	return " ".join(prev_words + new_words)
+
+
+class StreamingTranscriber:
+	"""
+	Transcribes a capture while it is still being recorded.
+
+	feed() appends audio as it arrives. Every `interval` seconds of new audio,
+	a background thread transcribes the most recent `window` seconds and
+	reports the partial hypothesis through `on_partial(text, final)` and
+	partials(). Consecutive windows overlap, so once an utterance outgrows the
+	window each new window's text is merged onto the previous hypothesis.
+	finalize() returns the final transcript, reusing the last partial without
+	another Whisper pass when it already covered the whole utterance.
+
+	Partials need the whisper.cpp server: while it is disabled or unreachable,
+	decoding would start a subprocess (and reload the model) every interval,
+	so only finalize() transcribes.
+	"""
+
+	def __init__(self, sample_rate: int = 16000, on_partial=None, window: float = None, interval: float = None,
+				whisper_path: str = "./whisper.cpp/main", transcribe=None):
+		self.sample_rate = sample_rate
+		self.on_partial = on_partial
+		self.window = int(sample_rate * float(window if window is not None else CFG.get("stt_partial_window", 8.0)))
+		self.interval = int(sample_rate * float(interval if interval is not None else CFG.get("stt_partial_interval", 1.0)))
+		self.whisper_path = whisper_path
+		self._transcribe = transcribe or (lambda pcm: transcribe_pcm(pcm, self.sample_rate, self.whisper_path))
+		# An injected transcribe function is assumed to be cheap enough for partials.
+		self._partials_enabled = (lambda: True) if transcribe else server_available
+		self._chunks = []
+		self._length = 0
+		self._lock = threading.Lock()
+		self._wake = threading.Event()
+		self._closed = False
+		self._last_request = 0
+		# Latest hypothesis and the number of samples it covers.
+		self._partial = ""
+		self._partial_upto = 0
+		self._partials = queue.Queue()
+		# Partial decodes belong to the turn being captured
+		self._trace = metrics.current_trace()
+		self._worker = threading.Thread(target=self._run, name="nova-stt-partial", daemon=True)
+		self._worker.start()
+
+	def feed(self, chunk):
+		"""Append int16 samples from the live capture."""
+		chunk = np.reshape(np.asarray(chunk, dtype=np.int16), -1)
+		with self._lock:
+			self._chunks.append(chunk)
+			self._length += len(chunk)
+			due = self._length - self._last_request >= self.interval
+		if due:
+			self._wake.set()
+
+	def partials(self):
+		"""Iterate over partial hypotheses until finalize() has been called."""
+		while True:
+			text = self._partials.get()
+			if text is None:
+				return
+			yield text
+
+	def finalize(self, audio: AudioBuffer = None) -> str:
+		"""
+		Stops partial decoding and returns the final transcript.
+		Args:
+			audio (AudioBuffer): Optional endpointed utterance; when given it
+				replaces the fed audio (e.g. with trailing silence trimmed).
+		"""
+		with self._lock:
+			self._closed = True
+			if audio is not None:
+				self._chunks = [np.reshape(audio.mono().samples, -1)]
+				self._length = len(self._chunks[0])
+		self._wake.set()
+		self._worker.join()
+		with self._lock:
+			length = self._length
+			partial, partial_upto = self._partial, self._partial_upto
+		if length == 0:
+			text = ""
+		elif partial and partial_upto >= length:
+			text = partial
+			metrics.inc("cache_hits", cache="stt_partial")
+		elif not partial:
+			# No partials were decoded: transcribe the whole utterance in one pass.
+			text = self._transcribe(self._snapshot(0, length)).strip()
+			metrics.inc("cache_misses", cache="stt_partial")
+		else:
+			text = self._decode(partial, length)
+			metrics.inc("cache_misses", cache="stt_partial")
+		self._emit(text, final=True)
+		self._partials.put(None)
+		return text
+
+	def _snapshot(self, start: int, end: int) -> np.ndarray:
+		with self._lock:
+			if len(self._chunks) > 1:
+				self._chunks = [np.concatenate(self._chunks)]
+			samples = self._chunks[0] if self._chunks else np.zeros(0, dtype=np.int16)
+		return samples[start:end]
+
+	def _emit(self, text: str, final: bool = False):
+		if self.on_partial is not None:
+			try:
+				self.on_partial(text, final)
+			except Exception as e:
+				print("Partial transcript callback error:", e)
+
+	def _decode(self, previous: str, end: int) -> str:
+		start = max(0, end - self.window)
+		text = self._transcribe(self._snapshot(start, end)).strip()
+		# A window starting at 0 covers everything; later windows extend the previous text.
+		return merge_hypotheses(previous, text) if start > 0 else text
+
+	def _run(self):
+		with metrics.activate(self._trace):
+			self._decode_partials()
+
+	def _decode_partials(self):
+		while True:
+			self._wake.wait()
+			self._wake.clear()
+			with self._lock:
+				if self._closed:
+					return
+				end = self._length
+				self._last_request = end
+				previous = self._partial
+			if not self._partials_enabled():
+				continue
+			try:
+				with metrics.span("stt_partial"):
+					text = self._decode(previous, end)
+			except Exception as e:
+				print("Partial transcription error:", e)
+				continue
+			with self._lock:
+				# Keep the result even if finalize() started meanwhile; it may reuse it.
+				self._partial, self._partial_upto = text, end
+				if self._closed:
+					return
+			self._partials.put(text)
+			self._emit(text)
@@ -0,0 +1,61 @@
+"""
+Unit tests for the in-memory AudioBuffer.
+"""
+import io
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from scipy.io import wavfile
+
+import audio_buffer
+from audio_buffer import AudioBuffer
+
+
+class TestAudioBuffer(unittest.TestCase):
+    def test_wav_round_trip_is_zero_copy(self):
+        samples = (np.sin(np.linspace(0, 100, 1600)) * 8000).astype(np.int16)
+        wav_bytes = AudioBuffer(samples, 16000).to_wav_bytes()
+        # scipy agrees with our encoder
+        rate, decoded = wavfile.read(io.BytesIO(wav_bytes))
+        self.assertEqual(rate, 16000)
+        np.testing.assert_array_equal(decoded, samples)
+
+        buffer = AudioBuffer.from_wav_bytes(wav_bytes)
+        np.testing.assert_array_equal(buffer.samples, samples)
+        self.assertEqual(buffer.sample_rate, 16000)
+        self.assertAlmostEqual(buffer.duration, 0.1)
+        # samples are a view over the WAV bytes, not a copy
+        self.assertTrue(np.shares_memory(buffer.samples, np.frombuffer(wav_bytes, dtype=np.uint8)))
+
+    def test_stereo_and_raw_bytes(self):
+        stereo = np.arange(20, dtype=np.int16).reshape(10, 2)
+        buffer = AudioBuffer.from_wav_bytes(AudioBuffer(stereo, 22050).to_wav_bytes())
+        self.assertEqual(buffer.channels, 2)
+        np.testing.assert_array_equal(buffer.mono().samples, stereo[:, 0])
+        raw = AudioBuffer(b"\x01\x00\xff\xff", 8000)
+        np.testing.assert_array_equal(raw.samples, [1, -1])
+        self.assertEqual(raw.memoryview().nbytes, 4)
+
+    def test_other_encodings_fall_back_to_scipy(self):
+        buf = io.BytesIO()
+        wavfile.write(buf, 8000, np.array([0, 128, 255], dtype=np.uint8))
+        buffer = AudioBuffer.from_wav_bytes(buf.getvalue())
+        np.testing.assert_array_equal(buffer.samples, [0, 128, 255])
+
+    def test_debug_dump_is_opt_in(self):
+        buffer = AudioBuffer(np.zeros(10, dtype=np.int16))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "dump.wav")
+            audio_buffer.CFG = {"audio_debug_dump": False}
+            audio_buffer.debug_dump(buffer, path)
+            self.assertFalse(os.path.exists(path))
+            audio_buffer.CFG = {"audio_debug_dump": True}
+            audio_buffer.debug_dump(buffer, path)
+            self.assertTrue(os.path.exists(path))
+        audio_buffer.CFG = {}
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+"""
+Unit tests for the benchmark harness: stand-in backends, synthetic audio and
+baseline comparison (the full benchmark is run with python -m benchmarks.turn_latency).
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import requests
+
+from audio_buffer import AudioBuffer
+from benchmarks import import_time
+from benchmarks.fakes import FakeCoqui, FakeOllama, FakeWhisper, make_utterances
+from benchmarks.turn_latency import compare, summarize
+from vad import Endpointer
+
+
+class TestFakeBackends(unittest.TestCase):
+    def test_fake_ollama_streams_at_configured_rate(self):
+        ollama = FakeOllama(tokens_per_second=200, prefill_ms=50, reply_tokens=20)
+        self.addCleanup(ollama.close)
+        resp = requests.post(ollama.url("/api/generate"), json={"prompt": "hi there", "stream": True}, stream=True)
+        lines = [json.loads(line) for line in resp.iter_lines() if line]
+        self.assertEqual(len(lines), 21)
+        self.assertTrue(lines[-1]["done"])
+        self.assertEqual(lines[-1]["eval_count"], 20)
+        self.assertEqual("".join(l["response"] for l in lines).count("."), 2)
+        # 50 ms prefill + 19 tokens at 200/s
+        self.assertGreater(ollama.generation_seconds, 0.14)
+        # Same request number, same reply
+        self.assertEqual(ollama.reply(1), FakeOllama(reply_tokens=20).reply(1))
+
+    def test_fake_ollama_request_without_prompt_only_loads(self):
+        ollama = FakeOllama()
+        self.addCleanup(ollama.close)
+        resp = requests.post(ollama.url("/api/generate"), json={"model": "llama3"})
+        self.assertEqual(resp.json()["done_reason"], "load")
+        self.assertEqual((ollama.loads, ollama.tokens), (1, 0))
+
+    def test_fake_coqui_returns_wav_sized_to_text(self):
+        coqui = FakeCoqui(realtime_factor=0.0, base_ms=0, seconds_per_char=0.05)
+        self.addCleanup(coqui.close)
+        resp = requests.post(coqui.url("/api/tts"), json={"text": "x" * 40})
+        audio = AudioBuffer.from_wav_bytes(resp.content)
+        self.assertAlmostEqual(audio.duration, 2.0, places=2)
+        self.assertEqual(requests.get(coqui.url("/api/voices")).json()["voices"][0]["name"], "en_US")
+
+    def test_fake_whisper_returns_current_transcript(self):
+        whisper = FakeWhisper(lambda: "hello nova", base_ms=0, ms_per_second=0)
+        self.addCleanup(whisper.close)
+        resp = requests.post(whisper.url("/inference"), files={"file": ("a.wav", b"\0" * 100)})
+        self.assertEqual(resp.json()["text"], "hello nova")
+
+
+class TestSyntheticAudio(unittest.TestCase):
+    def test_utterances_are_endpointed_after_speech(self):
+        for samples, speech_end, transcript in make_utterances(3, seed=1):
+            endpointer = Endpointer(sample_rate=16000)
+            finished_at = None
+            for start in range(0, len(samples), 960):
+                if endpointer.feed(samples[start:start + 960]):
+                    finished_at = (start + 960) / 16000
+                    break
+            self.assertIsNotNone(finished_at, transcript)
+            # Ends after the trailing silence, not in the middle of the speech
+            self.assertGreater(finished_at, speech_end + 0.5)
+            self.assertLess(finished_at, speech_end + 1.0)
+
+
+class TestBaselineComparison(unittest.TestCase):
+    def result(self, first_audio):
+        return {"metrics": {"time_to_first_audio_ms": summarize(first_audio), "stages": {"stt": summarize([10.0, 12.0])}}}
+
+    def test_summarize(self):
+        s = summarize(list(np.arange(1, 101, dtype=float)))
+        self.assertEqual((s["count"], s["p50"], s["max"]), (100, 50.5, 100.0))
+        self.assertGreater(s["p99"], s["p95"])
+        self.assertEqual(summarize([]), {"count": 0})
+
+    def test_flags_only_real_slowdowns(self):
+        baseline = self.result([900.0, 1000.0, 1100.0])
+        self.assertEqual(compare(self.result([910.0, 1010.0, 1120.0]), baseline), [])
+        regressions = compare(self.result([1200.0, 1300.0, 1400.0]), baseline)
+        self.assertEqual({(name, p) for name, p, _, _ in regressions},
+                         {("time_to_first_audio_ms", "p50"), ("time_to_first_audio_ms", "p95"), ("time_to_first_audio_ms", "p99")})
+        # A tiny stage doubling by a couple of milliseconds is noise
+        noisy = self.result([900.0, 1000.0, 1100.0])
+        noisy["metrics"]["stages"]["stt"] = summarize([20.0, 24.0])
+        self.assertEqual(compare(noisy, baseline, min_delta_ms=15.0), [])
+
+
+
+class TestImportTime(unittest.TestCase):
+    def test_parse_importtime_skips_interpreter_startup(self):
+        stderr = "\n".join([
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 | encodings",
+            import_time.MARKER,
+            "import time:       300 |        300 |   yaml.reader",
+            "import time:      1500 |       1800 | yaml",
+            "import time:       400 |       2200 | interface",
+        ])
+        self.assertEqual(import_time.parse_importtime(stderr),
+                         {"yaml.reader": (0.3, 0.3), "yaml": (1.5, 1.8), "interface": (0.4, 2.2)})
+
+    def test_flags_lazy_modules_and_new_imports(self):
+        before = import_time.profile("main", [{"nova.main": (1.0, 100.0), "nova.metrics": (1.0, 2.0), "yaml": (5.0, 20.0), "json": (1.0, 1.0)}])
+        self.assertEqual(before["packages"], ["yaml"])  # not the stdlib or the repo's own modules
+        baseline = import_time.baseline_of({"targets": {"main": before}})
+        self.assertEqual(baseline, {"targets": {"main": {"packages": ["yaml"]}}})
+        # Timings are machine-dependent and never fail the run
+        slower = {"nova.main": (1.0, 400.0), "yaml": (5.0, 90.0)}
+        self.assertEqual(import_time.compare({"targets": {"main": import_time.profile("main", [slower])}}, baseline), [])
+        run = {"nova.main": (1.0, 200.0), "yaml": (5.0, 20.0), "requests": (10.0, 90.0), "requests.adapters": (5.0, 40.0), "tomli": (0.5, 0.5)}
+        result = {"targets": {"main": import_time.profile("main", [run])}}
+        self.assertEqual(import_time.compare(result, baseline), [
+            "main: requests is imported at startup (it should load on first use)",
+            "main: new import requests (90.0 ms)",
+            "main: new import tomli (0.5 ms)",
+        ])
+
+    def test_entry_points_do_not_import_lazy_modules(self):
+        for target in import_time.TARGETS:
+            with tempfile.TemporaryDirectory() as cwd:
+                shutil.copytree("config", os.path.join(cwd, "config"))
+                imported = import_time.measure(target, cwd)
+            self.assertEqual([name for name in import_time.LAZY[target] if name in imported], [], target)
+
+
+if __name__ == "__main__":
+    unittest.main()
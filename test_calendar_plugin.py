@@ -0,0 +1,91 @@
+"""
+Unit tests for the indexed calendar plugin.
+"""
+import os
+import tempfile
+import unittest
+from datetime import date, datetime
+
+from plugins import calendar as calendar_plugin
+
+ICS = """BEGIN:VCALENDAR
+VERSION:2.0
+PRODID:-//nova//test//EN
+BEGIN:VEVENT
+UID:late
+SUMMARY:Dentist
+DTSTART:20300310T150000
+DTEND:20300310T160000
+END:VEVENT
+BEGIN:VEVENT
+UID:early
+SUMMARY:Flight
+DTSTART:20300302T090000
+DTEND:20300302T120000
+END:VEVENT
+BEGIN:VEVENT
+UID:standup
+SUMMARY:Standup
+DTSTART:20300101T093000
+DTEND:20300101T094500
+RRULE:FREQ=WEEKLY;BYDAY=MO,WE,FR
+EXDATE:20300304T093000
+END:VEVENT
+BEGIN:VEVENT
+UID:standup
+RECURRENCE-ID:20300306T093000
+SUMMARY:Standup (moved)
+DTSTART:20300306T113000
+DTEND:20300306T114500
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+class TestCalendarIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "calendar.ics")
+        self.write(ICS)
+        self.index = calendar_plugin.CalendarIndex(self.path, horizon_days=60)
+
+    def write(self, text):
+        with open(self.path, "w") as f:
+            f.write(text.replace("\n", "\r\n"))
+
+    def test_next_event_is_the_soonest_not_the_first_in_file(self):
+        start, _, summary = self.index.next_event(datetime(2030, 3, 1, 12, 0))
+        self.assertEqual((summary, start), ("Flight", datetime(2030, 3, 2, 9, 0)))
+        # Recurring events are expanded lazily
+        start, _, summary = self.index.next_event(datetime(2030, 3, 2, 10, 0))
+        # Monday 4th is excluded and Wednesday 6th was moved
+        self.assertEqual((summary, start), ("Standup (moved)", datetime(2030, 3, 6, 11, 30)))
+
+    def test_events_on_a_day_and_ranges(self):
+        events = self.index.events_on(date(2030, 3, 2))
+        self.assertEqual([e[2] for e in events], ["Flight"])
+        events = self.index.events_between(datetime(2030, 3, 8), datetime(2030, 3, 12))
+        self.assertEqual([e[2] for e in events], ["Standup", "Dentist", "Standup"])
+        # Ongoing at the start of the range
+        self.assertEqual([e[2] for e in self.index.events_between(datetime(2030, 3, 2, 11), datetime(2030, 3, 2, 13))], ["Flight"])
+
+    def test_reloads_only_when_the_file_changes(self):
+        self.index.next_event(datetime(2030, 3, 1))
+        signature = self.index._signature
+        self.index.next_event(datetime(2030, 3, 1))
+        self.assertEqual(self.index._signature, signature)
+        self.write(ICS.replace("SUMMARY:Flight", "SUMMARY:Train"))
+        os.utime(self.path, ns=(signature[0] + 10**9, signature[0] + 10**9))
+        self.assertEqual(self.index.next_event(datetime(2030, 3, 1, 12))[2], "Train")
+
+    def test_run_answers_today_queries(self):
+        today = date.today()
+        self.write(ICS.replace("20300310T150000", today.strftime("%Y%m%dT150000"))
+                      .replace("20300310T160000", today.strftime("%Y%m%dT160000")))
+        context = {"calendar_path": self.path, "transcript": "what's on my calendar today"}
+        self.assertEqual(calendar_plugin.run(context), "Events today: Dentist at 15:00")
+
+
+if __name__ == "__main__":
+    unittest.main()
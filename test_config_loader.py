@@ -0,0 +1,43 @@
+"""
+Unit tests for the shared config/config.yaml loader.
+"""
+import os
+import tempfile
+import unittest
+
+import config_loader
+
+
+class TestConfigLoader(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "config.yaml")
+
+    def write(self, text, mtime_ns):
+        with open(self.path, "w") as f:
+            f.write(text)
+        os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def test_each_caller_gets_its_own_copy(self):
+        self.write("http_backends:\n  ollama: {timeout: 60}\n", 1_000_000_000)
+        first = config_loader.load(self.path)
+        first["http_backends"]["ollama"]["timeout"] = 1
+        self.assertEqual(config_loader.load(self.path), {"http_backends": {"ollama": {"timeout": 60}}})
+
+    def test_changed_file_is_parsed_again(self):
+        self.write("ollama_model: llama3\n", 1_000_000_000)
+        self.assertEqual(config_loader.load(self.path)["ollama_model"], "llama3")
+        self.write("ollama_model: mistral\n", 2_000_000_000)
+        self.assertEqual(config_loader.load(self.path)["ollama_model"], "mistral")
+
+    def test_missing_or_invalid_file_is_empty(self):
+        self.assertEqual(config_loader.load(os.path.join(self.tmp.name, "missing.yaml")), {})
+        self.write("- just\n- a list\n", 1_000_000_000)
+        self.assertEqual(config_loader.load(self.path), {})
+        self.write("key: [unclosed\n", 2_000_000_000)
+        self.assertEqual(config_loader.load(self.path), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
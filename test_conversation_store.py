@@ -0,0 +1,90 @@
+"""
+Unit tests for the SQLite conversation store and memory_manager on top of it.
+"""
+import json
+import os
+import multiprocessing
+import tempfile
+import threading
+import unittest
+
+import memory_manager
+from conversation_store import ConversationStore
+
+
+def _append_many(path, name, n):
+    store = ConversationStore(path)
+    for i in range(n):
+        store.append(f"{name} {i}", "ok")
+
+
+class TestConversationStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "history.db")
+
+    def test_append_and_recent(self):
+        store = ConversationStore(self.path)
+        for i in range(50):
+            store.append(f"q{i}", f"a{i}", timestamp=i)
+        self.assertEqual(store.count(), 50)
+        recent = store.recent(3)
+        self.assertEqual([t["user"] for t in recent], ["q47", "q48", "q49"])
+        self.assertEqual(recent[-1], {"user": "q49", "nova": "a49", "time": 49})
+        ids = [turn_id for turn_id, _ in store.iter_turns(after_id=45, batch=2)]
+        self.assertEqual(ids, [46, 47, 48, 49, 50])
+        self.assertEqual(store.generation(), 0)
+        store.clear()
+        self.assertEqual(store.recent(3), [])
+        self.assertEqual(store.generation(), 1)
+
+    def test_concurrent_threads_and_processes(self):
+        # Spawned (not forked) and started before any writer thread exists
+        ctx = multiprocessing.get_context("spawn")
+        procs = [ctx.Process(target=_append_many, args=(self.path, f"p{i}", 50)) for i in range(2)]
+        for proc in procs:
+            proc.start()
+        threads = [threading.Thread(target=_append_many, args=(self.path, f"t{i}", 50)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for worker in threads + procs:
+            worker.join(timeout=60)
+        self.assertEqual([proc.exitcode for proc in procs], [0, 0])
+        self.assertEqual(ConversationStore(self.path).count(), 300)
+
+    def test_import_legacy_json_once(self):
+        legacy = os.path.join(self.tmp.name, "history.json")
+        with open(legacy, "w") as f:
+            json.dump([{"user": "Hello", "nova": "Hi"}, {"user": "Bye", "nova": "See you"}], f)
+        store = ConversationStore(self.path)
+        self.assertEqual(store.import_json(legacy), 2)
+        self.assertFalse(os.path.exists(legacy))
+        self.assertEqual([t["user"] for t in store.recent(5)], ["Hello", "Bye"])
+        self.assertEqual(store.import_json(legacy), 0)
+
+
+class TestMemoryManagerStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.saved = (memory_manager.MEMORY_DB, memory_manager.MEMORY_FILE)
+        memory_manager.MEMORY_DB = os.path.join(self.tmp.name, "history.db")
+        memory_manager.MEMORY_FILE = os.path.join(self.tmp.name, "history.json")
+
+    def tearDown(self):
+        memory_manager.MEMORY_DB, memory_manager.MEMORY_FILE = self.saved
+
+    def test_history_is_unbounded_but_context_window_is_limited(self):
+        for i in range(memory_manager.MEMORY_LIMIT + 5):
+            memory_manager.save_turn(f"q{i}", f"a{i}")
+        memory = memory_manager.load_memory()
+        self.assertEqual(len(memory), memory_manager.MEMORY_LIMIT)
+        self.assertEqual(memory[-1]["user"], f"q{memory_manager.MEMORY_LIMIT + 4}")
+        self.assertEqual(memory_manager.get_store().count(), memory_manager.MEMORY_LIMIT + 5)
+        memory_manager.clear_memory()
+        self.assertEqual(memory_manager.load_memory(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
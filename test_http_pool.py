@@ -0,0 +1,73 @@
+"""
+Unit tests for the pooled HTTP sessions in http_pool.
+"""
+import http.server
+import socketserver
+import threading
+import unittest
+
+import http_pool
+
+
+class KeepAliveHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    peers = set()
+
+    def do_GET(self):
+        KeepAliveHandler.peers.add(self.client_address)
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        return
+
+
+class TestHttpPool(unittest.TestCase):
+    def setUp(self):
+        http_pool.close_all()
+        http_pool.CFG = {
+            "http_timeout": 7,
+            "http_retries": 1,
+            "http_backends": {"ollama": {"timeout": 60, "retries": 0}},
+        }
+
+    def tearDown(self):
+        http_pool.close_all()
+        http_pool.CFG = {}
+
+    def test_settings_overrides(self):
+        self.assertEqual(http_pool.get_timeout("ollama"), 60)
+        self.assertEqual(http_pool.get_timeout("coqui"), 7)
+        self.assertEqual(http_pool.backend_settings("ollama")["retries"], 0)
+        self.assertEqual(http_pool.backend_settings("coqui")["retries"], 1)
+        http_pool.CFG = {}
+        self.assertEqual(http_pool.get_timeout("plugins"), http_pool.DEFAULT_TIMEOUTS["plugins"])
+
+    def test_session_is_shared_per_backend(self):
+        self.assertIs(http_pool.get_session("coqui"), http_pool.get_session("coqui"))
+        self.assertIsNot(http_pool.get_session("coqui"), http_pool.get_session("ollama"))
+        adapter = http_pool.get_session("ollama").get_adapter("http://localhost")
+        self.assertEqual(adapter.max_retries.total, 0)
+
+    def test_connections_are_reused(self):
+        KeepAliveHandler.peers = set()
+        httpd = socketserver.ThreadingTCPServer(("127.0.0.1", 0), KeepAliveHandler)
+        httpd.daemon_threads = True
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        try:
+            url = f"http://127.0.0.1:{httpd.server_address[1]}/"
+            session = http_pool.get_session("coqui")
+            for _ in range(5):
+                self.assertEqual(session.get(url, timeout=5).text, "ok")
+            # All five requests travelled over a single kept-alive connection.
+            self.assertEqual(len(KeepAliveHandler.peers), 1)
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
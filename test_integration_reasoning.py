@@ -100,6 +100,25 @@ class TestIntegrationReasoning(unittest.TestCase):
             httpd2.shutdown()
             httpd2.server_close()
 
+    def test_ollama_streaming(self):
+        class StreamHandler(SimpleHandler):
+            response_text = ''.join(
+                json.dumps({'response': tok, 'done': False}) + '\n'
+                for tok in ['One. ', 'Two', ' three.']
+            ) + json.dumps({'response': '', 'done': True}) + '\n'
+
+        httpd, port = start_server(StreamHandler)
+        try:
+            reasoning_engine.CFG.update({
+                'ollama_endpoint': f'http://127.0.0.1:{port}/api',
+                'use_open_webui': False,
+            })
+            chunks = reasoning_engine.stream_ollama('count', use_open_webui=False)
+            self.assertEqual(list(reasoning_engine.iter_sentences(chunks, min_chars=1)), ['One.', 'Two three.'])
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
 
 if __name__ == '__main__':
     unittest.main()
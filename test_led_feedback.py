@@ -1,9 +1,11 @@
 """
 Unit tests for led_feedback.py
 """
+import time
 import unittest
 from unittest.mock import patch, MagicMock
 import led_feedback
+from led_feedback import FakePixelStrip, LedController, pack_rgb
 
 class TestLedFeedback(unittest.TestCase):
     @patch('led_feedback.PixelStrip', autospec=True)
@@ -22,6 +24,7 @@ class TestLedFeedback(unittest.TestCase):
     @patch('led_feedback.Color', autospec=True)
     def test_set_led_state(self, mock_color, mock_strip):
         strip = MagicMock()
+        self.addCleanup(led_feedback.stop_led, strip)
         led_feedback.set_led_state(strip, 'listening')
         led_feedback.set_led_state(strip, 'thinking')
         led_feedback.set_led_state(strip, 'speaking')
@@ -32,5 +35,73 @@ class TestLedFeedback(unittest.TestCase):
         # Should do nothing if strip is None
         led_feedback.set_led_state(None, 'listening')
 
+
+class TestLedController(unittest.TestCase):
+    def setUp(self):
+        self.strip = FakePixelStrip(led_feedback.LED_COUNT)
+        self.controller = LedController(self.strip, fps=50)
+        self.addCleanup(self.controller.stop)
+
+    def wait_for(self, predicate, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if predicate():
+                return True
+            time.sleep(0.01)
+        return False
+
+    def test_post_returns_immediately(self):
+        started = time.monotonic()
+        for state in ("listening", "thinking", "speaking", "idle"):
+            self.controller.post(state)
+        self.assertLess(time.monotonic() - started, 0.02)
+
+    def test_animation_runs_at_fixed_frame_rate(self):
+        self.controller.post("thinking")
+        time.sleep(0.6)
+        self.controller.post("idle")
+        shows = [s for s in self.strip.snapshot() if s[1][0] == pack_rgb(255, 255, 255)]
+        self.assertGreater(len(shows), 10)
+        times = [t for t, _, _ in shows]
+        # 50 fps: frames are never drawn early (no bunching up); the upper
+        # bound only catches a loop that stalls, as a loaded host runs late
+        average = (times[-1] - times[0]) / (len(times) - 1)
+        self.assertGreaterEqual(average, 0.018)
+        self.assertLess(average, 0.05)
+        self.assertGreater(len(set(b for _, _, b in shows)), 5)  # the pulse changes brightness
+
+    def test_state_change_interrupts_animation(self):
+        self.controller.post("listening")
+        time.sleep(0.1)
+        posted = time.monotonic()
+        self.controller.post("speaking")
+        self.assertTrue(self.wait_for(lambda: self.strip.getPixelColor(1) != pack_rgb(0, 0, 255)))
+        first = next(t for t, pixels, _ in self.strip.snapshot() if pixels[0] != pack_rgb(0, 0, 255) and t >= posted)
+        self.assertLess(first - posted, 0.05)
+
+    def test_static_state_is_drawn_once(self):
+        self.controller.post("idle")
+        time.sleep(0.2)
+        drawn = self.controller.frames_drawn
+        time.sleep(0.2)
+        self.assertEqual(self.controller.frames_drawn, drawn)
+        self.assertEqual(self.strip.getPixelColor(0), 0)
+
+    def test_unknown_state_turns_ring_off_and_stop_clears(self):
+        self.controller.post("speaking")
+        self.assertTrue(self.wait_for(lambda: self.strip.getPixelColor(1) != 0))
+        self.controller.post("dancing")
+        self.assertTrue(self.wait_for(lambda: all(self.strip.getPixelColor(i) == 0 for i in range(led_feedback.LED_COUNT))))
+        self.controller.post("speaking")
+        self.assertTrue(self.wait_for(lambda: self.strip.getPixelColor(1) != 0))
+        self.controller.stop()
+        self.assertEqual(self.strip.getPixelColor(1), 0)
+
+    def test_rainbow_frames_rotate(self):
+        frames = led_feedback.build_frames(count=12, fps=30)["speaking"]
+        steps = len(frames) // 12
+        self.assertEqual(list(frames.colors[steps]), list(frames.colors[0][[-1] + list(range(11))]))
+
+
 if __name__ == '__main__':
     unittest.main()
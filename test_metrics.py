@@ -0,0 +1,164 @@
+"""
+Unit tests for Nova's metrics: histograms, traces, Prometheus export and the
+dashboard routes that serve them.
+"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import metrics
+from test_voice_pipeline import FakeStages
+from voice_pipeline import VoicePipeline
+
+
+class MetricsTestCase(unittest.TestCase):
+    def setUp(self):
+        metrics.REGISTRY.reset()
+        self.addCleanup(metrics.REGISTRY.reset)
+
+
+class TestHistogram(MetricsTestCase):
+    def test_observations_land_in_their_bucket(self):
+        for seconds in (0.004, 0.02, 0.02, 0.3, 120.0):
+            metrics.observe("span_seconds", seconds, span="stt")
+        h = metrics.REGISTRY.histogram("span_seconds", span="stt")
+        self.assertEqual(h.count, 5)
+        self.assertAlmostEqual(h.sum, 120.344)
+        self.assertEqual(h.counts[metrics.BUCKETS.index(0.005)], 1)
+        self.assertEqual(h.counts[metrics.BUCKETS.index(0.025)], 2)
+        self.assertEqual(h.counts[-1], 1)  # beyond the last bucket
+        self.assertIsNone(metrics.REGISTRY.histogram("span_seconds", span="tts"))
+
+    def test_quantile_is_interpolated_within_the_bucket(self):
+        for _ in range(100):
+            metrics.observe("span_seconds", 0.3, span="llm")
+        h = metrics.REGISTRY.histogram("span_seconds", span="llm")
+        self.assertGreater(h.quantile(0.5), 0.25)
+        self.assertLessEqual(h.quantile(0.95), 0.5)
+
+
+class TestTraces(MetricsTestCase):
+    def test_spans_join_the_active_trace_across_threads(self):
+        trace = metrics.start_trace("turn")
+        with metrics.activate(trace):
+            with metrics.span("stt", backend="server"):
+                time.sleep(0.01)
+
+        def worker():
+            with metrics.activate(trace):
+                metrics.record_span("tts_first_byte", time.perf_counter(), 0.02)
+
+        t = threading.Thread(target=worker)
+        t.start()
+        t.join()
+        # Outside activate() spans only feed the histograms
+        metrics.record_span("stt", time.perf_counter(), 0.01)
+        self.assertIsNone(metrics.current_trace())
+        metrics.finish_trace(trace, outcome="ok")
+        data = metrics.snapshot()["traces"][0]
+        self.assertEqual([s["name"] for s in data["spans"]], ["stt", "tts_first_byte"])
+        self.assertEqual(data["spans"][0]["attrs"], {"backend": "server"})
+        self.assertGreaterEqual(data["spans"][0]["duration_ms"], 10.0)
+        self.assertEqual(metrics.REGISTRY.histogram("span_seconds", span="stt").count, 2)
+        self.assertEqual(metrics.REGISTRY.counter("turns", kind="turn", outcome="ok"), 1)
+
+    def test_only_recent_traces_are_kept(self):
+        registry = metrics.Registry(trace_history=3)
+        for _ in range(5):
+            registry.add_trace(metrics.Trace())
+        self.assertEqual(len(registry.snapshot()["traces"]), 3)
+
+    def test_disabled_metrics_record_nothing(self):
+        with patch.object(metrics, "ENABLED", False):
+            self.assertIsNone(metrics.start_trace())
+            metrics.inc("fallbacks", component="stt")
+            with metrics.span("stt"):
+                pass
+            metrics.finish_trace(None)
+        snap = metrics.snapshot()
+        self.assertEqual((snap["counters"], snap["histograms"], snap["traces"]), ([], [], []))
+
+    def test_pipeline_turn_is_traced(self):
+        fakes = FakeStages(["hello"])
+        pipeline = VoicePipeline(fakes.capture, fakes.transcribe, fakes.plugins, fakes.reason, fakes.speak, fakes.persist).start()
+        try:
+            self.assertTrue(fakes.saved_event.wait(2.0))
+            deadline = time.time() + 2.0
+            while not metrics.snapshot()["traces"] and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            pipeline.stop()
+        trace = metrics.snapshot()["traces"][0]
+        self.assertEqual(trace["attrs"]["outcome"], "ok")
+        names = [s["name"] for s in trace["spans"]]
+        for stage in ("capture", "stt", "plugins", "first_sentence", "first_audio", "tts", "memory", "turn"):
+            self.assertIn(stage, names)
+        # Offsets are relative to the start of the capture
+        self.assertEqual(names[0], "capture")
+        self.assertLess(trace["spans"][0]["start_ms"], 5.0)
+
+
+class TestExport(MetricsTestCase):
+    def test_prometheus_text(self):
+        metrics.observe("span_seconds", 0.02, span="stt")
+        metrics.observe("span_seconds", 0.2, span="stt")
+        metrics.inc("fallbacks", component="stt", to="subprocess")
+        text = metrics.render_prometheus([metrics.snapshot("voice"), None])
+        self.assertIn("# TYPE nova_span_seconds histogram", text)
+        self.assertIn('nova_span_seconds_bucket{process="voice",span="stt",le="0.01"} 0', text)
+        self.assertIn('nova_span_seconds_bucket{process="voice",span="stt",le="0.025"} 1', text)
+        self.assertIn('nova_span_seconds_bucket{process="voice",span="stt",le="+Inf"} 2', text)
+        self.assertIn('nova_span_seconds_count{process="voice",span="stt"} 2', text)
+        self.assertIn("# TYPE nova_fallbacks_total counter", text)
+        self.assertIn('nova_fallbacks_total{process="voice",component="stt",to="subprocess"} 1', text)
+
+    def test_snapshot_file_round_trip(self):
+        metrics.inc("cache_hits", cache="tts")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "logs", "metrics.json")
+            self.assertIsNone(metrics.read_snapshot(path))
+            metrics.write_snapshot("voice", path)
+            snap = metrics.read_snapshot(path)
+        self.assertEqual(snap["process"], "voice")
+        self.assertEqual(snap["counters"], [{"name": "cache_hits", "labels": {"cache": "tts"}, "value": 1}])
+
+
+class TestDashboardRoutes(MetricsTestCase):
+    def setUp(self):
+        super().setUp()
+        from interface import app
+        self.client = app.test_client()
+        self.voice = metrics.Registry()
+        trace = metrics.Trace("turn")
+        trace.add("stt", trace.start, 0.1)
+        trace.add("llm_first_token", trace.start + 0.1, 0.3)
+        trace.end = trace.start + 0.5
+        self.voice.add_trace(trace)
+        self.voice.observe("span_seconds", 0.1, span="stt")
+        patcher = patch.object(metrics, "read_snapshot", return_value=self.voice.snapshot("voice"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_metrics_route_merges_processes(self):
+        metrics.inc("cache_hits", cache="response")
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain"))
+        text = response.get_data(as_text=True)
+        self.assertIn('nova_span_seconds_count{process="voice",span="stt"} 1', text)
+        self.assertIn('nova_cache_hits_total{process="dashboard",cache="response"} 1', text)
+
+    def test_traces_waterfall(self):
+        response = self.client.get("/traces")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"llm_first_token", response.data)
+        self.assertIn(b"left:20.0%;width:60.0%", response.data)
+        spans = self.client.get("/traces.json").get_json()["traces"][0]["spans"]
+        self.assertEqual([s["name"] for s in spans], ["stt", "llm_first_token"])
+
+
+if __name__ == "__main__":
+    unittest.main()
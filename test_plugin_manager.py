@@ -0,0 +1,179 @@
+"""
+Unit tests for concurrent, deadline-bounded plugin execution.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import types
+import unittest
+from unittest.mock import patch
+
+from plugins import plugin_manager
+from plugins.plugin_manager import NovaPluginManager
+
+
+def make_plugin(name, delay=0.0, result=None, error=None, manifest=None):
+    def run(context):
+        time.sleep(delay)
+        if error:
+            raise error
+        return result if result is not None else f"{name} for {context['transcript']}"
+    plugin = types.SimpleNamespace(__name__=f"nova.plugins.{name}", run=run)
+    if manifest is not None:
+        plugin.MANIFEST = manifest
+    return plugin
+
+
+class TestPluginManager(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.object(NovaPluginManager, "load_plugins")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.manager = NovaPluginManager()
+        self.manager.config = {
+            "plugin_workers": 4,
+            "plugin_turn_budget": 1.0,
+            "plugin_default_timeout": 0.5,
+            "plugin_timeouts": {"news": 0.2},
+        }
+        self.addCleanup(self.manager.shutdown)
+
+    def test_plugins_run_concurrently(self):
+        self.manager.plugins = [make_plugin(n, delay=0.15) for n in ("weather", "calendar", "health")]
+        started = time.monotonic()
+        results = self.manager.run_all({"transcript": "hi"})
+        self.assertLess(time.monotonic() - started, 0.4)
+        self.assertEqual(list(results), ["nova.plugins.weather", "nova.plugins.calendar", "nova.plugins.health"])
+        self.assertEqual(results["nova.plugins.weather"], "weather for hi")
+
+    def test_slow_plugin_is_left_out_and_not_restarted_while_running(self):
+        self.manager.plugins = [make_plugin("news", delay=0.6), make_plugin("health"),
+                                make_plugin("calendar", error=ValueError("bad ics"))]
+        started = time.monotonic()
+        results = self.manager.run_all({"transcript": "hi"})
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(results, {"nova.plugins.health": "health for hi", "nova.plugins.calendar": "Error: bad ics"})
+        # Still running from the first turn: skipped instead of queued again
+        self.assertNotIn("nova.plugins.news", self.manager.run_all({"transcript": "again"}))
+        stats = self.manager.stats()
+        self.assertEqual(stats["nova.plugins.news"]["timeouts"], 1)
+        self.assertEqual(stats["nova.plugins.news"]["skipped"], 1)
+        self.assertEqual(stats["nova.plugins.calendar"]["errors"], 2)
+        self.assertEqual(stats["nova.plugins.health"]["calls"], 2)
+
+    def test_turn_budget_caps_all_deadlines(self):
+        self.manager.config["plugin_turn_budget"] = 0.1
+        self.manager.plugins = [make_plugin("weather", delay=0.3), make_plugin("health")]
+        started = time.monotonic()
+        self.assertEqual(list(self.manager.run_all({"transcript": "hi"})), ["nova.plugins.health"])
+        self.assertLess(time.monotonic() - started, 0.25)
+
+
+    def test_only_plugins_with_matching_intents_run(self):
+        self.manager.plugins = [
+            make_plugin("weather", result="Sunny, 21°C.", manifest={"intents": [r"weather", r"rain\w*"], "direct_answer": True}),
+            make_plugin("news", result="News: ...", manifest={"intents": [r"news", r"headlines?"], "direct_answer": True}),
+            make_plugin("health", manifest={"intents": [r"drink water"]}),
+            make_plugin("clock"),  # no intents: always runs
+        ]
+        names = lambda plugins: [p.__name__.rsplit(".", 1)[-1] for p in plugins]
+        self.assertEqual(names(self.manager.route("Will it be RAINING later?")), ["weather", "clock"])
+        self.assertEqual(names(self.manager.route("weather and headlines")), ["weather", "news", "clock"])
+        self.assertEqual(names(self.manager.route("tell me a joke")), ["clock"])
+        self.assertEqual(names(self.manager.route("newsletter")), ["clock"])
+        results = self.manager.run_all({"transcript": "what's the weather"})
+        self.assertEqual(list(results), ["nova.plugins.weather", "nova.plugins.clock"])
+
+    def test_direct_answer_only_for_short_direct_queries(self):
+        self.manager.plugins = [
+            make_plugin("weather", result="Sunny, 21°C.", manifest={"intents": [r"weather"], "direct_answer": True}),
+            make_plugin("health", result="Drink water!", manifest={"intents": [r"drink water"]}),
+        ]
+        results = {"nova.plugins.weather": "Sunny, 21°C.", "nova.plugins.health": "Drink water!"}
+        self.assertEqual(self.manager.direct_answer("what's the weather", results), "Sunny, 21°C.")
+        self.assertIsNone(self.manager.direct_answer("weather, and should I drink water", results))
+        self.assertIsNone(self.manager.direct_answer("tell me about the weather on mars and why it is so cold there", results))
+        self.assertIsNone(self.manager.direct_answer("what's the weather", {}))  # timed out
+        self.assertIsNone(self.manager.direct_answer("hello there", results))
+
+
+    def test_cached_results_are_refreshed_in_the_background_when_stale(self):
+        calls = []
+
+        def run(context):
+            calls.append(context["transcript"])
+            time.sleep(0.05)
+            return f"Sunny ({len(calls)})"
+
+        weather = types.SimpleNamespace(__name__="nova.plugins.weather", run=run,
+                                        MANIFEST={"intents": [r"weather"], "cache_ttl": 60})
+        self.manager.plugins = [weather]
+        self.assertEqual(self.manager.run_all({"transcript": "weather"}), {"nova.plugins.weather": "Sunny (1)"})
+        self.assertEqual(self.manager.run_all({"transcript": "weather?"}), {"nova.plugins.weather": "Sunny (1)"})
+        self.assertEqual(len(calls), 1)
+
+        # Stale: served immediately while a refresh runs
+        self.manager._cache["nova.plugins.weather"]["time"] -= 61
+        started = time.monotonic()
+        self.assertEqual(self.manager.run_all({"transcript": "weather"}), {"nova.plugins.weather": "Sunny (1)"})
+        self.assertLess(time.monotonic() - started, 0.04)
+        self.manager._running["nova.plugins.weather"].result(timeout=1.0)
+        self.assertEqual(self.manager.run_all({"transcript": "weather"}), {"nova.plugins.weather": "Sunny (2)"})
+
+        # Too old to serve at all
+        self.manager._cache["nova.plugins.weather"]["time"] -= 60 + 3601
+        self.assertEqual(self.manager.run_all({"transcript": "weather"}), {"nova.plugins.weather": "Sunny (3)"})
+
+        self.assertEqual(self.manager.refresh(["weather"], timeout=1.0), 1)
+        self.assertEqual(self.manager.run_all({"transcript": "weather"}), {"nova.plugins.weather": "Sunny (4)"})
+        self.assertEqual(self.manager.cache_stats(),
+                         {"hits": 3, "stale_hits": 1, "misses": 2, "refreshes": 2, "entries": 1})
+
+
+class TestPluginDiscovery(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache_path = os.path.join(self.tmp.name, "manifests.json")
+        patcher = patch.object(NovaPluginManager, "load_config", return_value={"plugin_manifest_cache": self.cache_path})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_plugins_are_discovered_without_importing_them(self):
+        sys.modules.pop("plugins.multimodal", None)
+        manager = NovaPluginManager()
+        self.addCleanup(manager.shutdown)
+        by_name = {p.__name__: p for p in manager.plugins}
+        self.assertNotIn("plugins.plugin_manager", by_name)
+        self.assertNotIn("plugins.__init__", by_name)
+        multimodal = by_name["plugins.multimodal"]
+        self.assertIn("Pillow", multimodal.MANIFEST["dependencies"])
+        self.assertNotIn("plugins.multimodal", sys.modules)
+
+        self.assertEqual(manager.run_all({"transcript": "what's the weather"}).keys(), {"plugins.weather"})
+        self.assertFalse(multimodal.loaded)
+        manager.run_all({"transcript": "look at this picture"})
+        self.assertTrue(multimodal.loaded)
+
+    def test_manifest_scan_is_cached_by_mtime(self):
+        NovaPluginManager().shutdown()
+        with open(self.cache_path) as f:
+            cache = json.load(f)
+        self.assertEqual(cache["weather.py"]["manifest"]["name"], "weather")
+        cache["weather.py"]["manifest"]["name"] = "cached"
+        cache["news.py"]["mtime_ns"] = 0  # stale entry: re-read
+        cache["news.py"]["manifest"]["name"] = "stale"
+        with open(self.cache_path, "w") as f:
+            json.dump(cache, f)
+        with patch.object(plugin_manager, "read_manifest", wraps=plugin_manager.read_manifest) as read:
+            manager = NovaPluginManager()
+        by_name = {p.__name__.rsplit(".", 1)[-1]: p.MANIFEST for p in manager.plugins}
+        self.assertEqual(by_name["weather"]["name"], "cached")
+        self.assertEqual(by_name["news"]["name"], "news")
+        self.assertEqual(read.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
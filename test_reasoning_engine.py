@@ -34,7 +34,7 @@ class TestReasoningEngine(unittest.TestCase):
         resp.raise_for_status.return_value = None
         return resp
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_open_webui_success(self, mock_post):
         # Open Web UI returns a JSON response -> should be used
         ow_resp = self.make_resp(json_data={"response": "ow reply"})
@@ -46,7 +46,7 @@ class TestReasoningEngine(unittest.TestCase):
         self.assertEqual(info["backend"], "open_webui")
         self.assertFalse(info["fallback"])
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_open_webui_failure_fallback_to_ollama(self, mock_post):
         # First call to Open Web UI raises, second call (Ollama) returns text
         def side_effect(url, *args, **kwargs):
@@ -64,7 +64,7 @@ class TestReasoningEngine(unittest.TestCase):
         self.assertEqual(info["backend"], "ollama")
         self.assertTrue(info["fallback"])
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_override_use_open_webui_false(self, mock_post):
         # Config enables OW, but explicit override disables it -> Ollama used
         def side_effect(url, *args, **kwargs):
@@ -80,7 +80,7 @@ class TestReasoningEngine(unittest.TestCase):
         self.assertEqual(info["backend"], "ollama")
         self.assertFalse(info["fallback"])
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_open_webui_api_key_from_env(self, mock_post):
         # Ensure that when OPEN_WEBUI_API_KEY env var is set, it's sent as a Bearer header
         ow_resp = self.make_resp(json_data={"response": "ow reply"})
@@ -99,7 +99,7 @@ class TestReasoningEngine(unittest.TestCase):
         out = reasoning_engine.query_ollama("hello", use_open_webui=True)
         self.assertEqual(out, "ow reply")
 
-        # Ensure requests.post was called with headers containing Authorization: Bearer env-secret
+        # Ensure the pooled session's post was called with headers containing Authorization: Bearer env-secret
         called_args, called_kwargs = mock_post.call_args
         headers = called_kwargs.get("headers", {})
         self.assertIn("Authorization", headers)
@@ -108,6 +108,162 @@ class TestReasoningEngine(unittest.TestCase):
         # Cleanup
         del os.environ["OPEN_WEBUI_API_KEY"]
 
+    @patch("requests.Session.post")
+    def test_stream_ollama_yields_ndjson_chunks(self, mock_post):
+        lines = [
+            b'{"response": "Hello", "done": false}',
+            b'',
+            b'{"response": " there.", "done": false}',
+            b'{"response": "", "done": true}',
+        ]
+        resp = self.make_resp()
+        resp.iter_lines.return_value = iter(lines)
+        mock_post.return_value = resp
+
+        chunks = list(reasoning_engine.stream_ollama("hi", use_open_webui=False))
+        self.assertEqual(chunks, ["Hello", " there."])
+        called_args, called_kwargs = mock_post.call_args
+        self.assertTrue(called_kwargs["json"]["stream"])
+        self.assertEqual(reasoning_engine.get_last_result_info()["backend"], "ollama")
+
+    @patch("requests.Session.post")
+    def test_preload_model_sends_no_prompt(self, mock_post):
+        mock_post.return_value = self.make_resp(json_data={"model": "llama3", "response": "", "done": True})
+        # Open Web UI is configured: its model is not Ollama's to load
+        self.assertFalse(reasoning_engine.preload_model())
+        mock_post.assert_not_called()
+        reasoning_engine.CFG["use_open_webui"] = False
+        self.assertTrue(reasoning_engine.preload_model(model="llama3"))
+        called_args, called_kwargs = mock_post.call_args
+        self.assertEqual(called_args[0], "http://ollama.local/api/generate")
+        self.assertEqual(called_kwargs["json"], {"model": "llama3", "keep_alive": "10m"})
+
+    @patch("requests.Session.post")
+    def test_stream_open_webui_failure_falls_back(self, mock_post):
+        def side_effect(url, *args, **kwargs):
+            if url == reasoning_engine.CFG["open_webui_endpoint"]:
+                raise requests.exceptions.ConnectionError("ow down")
+            resp = self.make_resp()
+            resp.iter_lines.return_value = iter([b'{"response": "streamed", "done": true}'])
+            return resp
+
+        mock_post.side_effect = side_effect
+
+        self.assertEqual("".join(reasoning_engine.stream_ollama("x", use_open_webui=True)), "streamed")
+        info = reasoning_engine.get_last_result_info()
+        self.assertEqual(info["backend"], "ollama")
+        self.assertTrue(info["fallback"])
+
+    def test_iter_sentences_splits_on_boundaries(self):
+        chunks = ["Sure. The weather to", "day is sunny! Do you need an umbre", "lla? Have a", " nice day"]
+        sentences = list(reasoning_engine.iter_sentences(chunks, min_chars=10))
+        self.assertEqual(sentences, [
+            "Sure. The weather today is sunny!",
+            "Do you need an umbrella?",
+            "Have a nice day",
+        ])
+
+    def test_build_prompt_keeps_newest_turns_within_budget(self):
+        history = [{"user": f"question {i} " + "word " * 20, "nova": f"answer {i}"} for i in range(10)]
+        text, turns = reasoning_engine.build_prompt("and now?", history, budget=100, system="")
+        self.assertEqual(turns, history[-len(turns):])
+        self.assertTrue(0 < len(turns) < 10)
+        self.assertLessEqual(reasoning_engine.estimate_tokens(text), 100)
+        self.assertTrue(text.endswith("User: and now?\nNova:"))
+        self.assertLess(text.index("question 8"), text.index("question 9"))
+        # Nothing to add: the prompt is sent as is
+        self.assertEqual(reasoning_engine.build_prompt("hi", [], budget=100, system=""), ("hi", []))
+
+    @patch("requests.Session.post")
+    def test_ollama_context_is_reused_for_the_next_turn(self, mock_post):
+        reasoning_engine.CFG.update({"use_open_webui": False, "ollama_model": "llama3"})
+        reasoning_engine._OLLAMA_CONTEXT.update(key=None, context=None, last_prompt=None)
+        mock_post.return_value = self.make_resp(json_data={
+            "response": "It is noon.", "context": [1, 2, 3, 4],
+            "prompt_eval_count": 42, "prompt_eval_duration": 12_500_000, "eval_count": 5,
+        })
+        history = [{"user": "hello", "nova": "Hi!"}]
+        self.assertEqual(reasoning_engine.query_ollama("what time is it", history=history), "It is noon.")
+        payload = mock_post.call_args[1]["json"]
+        self.assertEqual(payload["prompt"], "User: hello\nNova: Hi!\nUser: what time is it\nNova:")
+        self.assertNotIn("context", payload)
+        self.assertFalse(payload["stream"])
+        info = reasoning_engine.get_last_result_info()
+        self.assertEqual((info["prompt_tokens"], info["prefill_ms"], info["history_turns"]), (42, 12.5, 1))
+        self.assertFalse(info["context_reused"])
+
+        history.append({"user": "what time is it", "nova": "It is noon."})
+        reasoning_engine.query_ollama("thanks", history=history)
+        payload = mock_post.call_args[1]["json"]
+        self.assertEqual((payload["prompt"], payload["context"]), ("User: thanks\nNova:", [1, 2, 3, 4]))
+        self.assertTrue(reasoning_engine.get_last_result_info()["context_reused"])
+
+        # A turn the context does not end with (e.g. memory cleared) is prefilled again
+        reasoning_engine.query_ollama("hello again", history=[{"user": "other", "nova": "..."}])
+        self.assertNotIn("context", mock_post.call_args[1]["json"])
+        reasoning_engine._OLLAMA_CONTEXT.update(key=None, context=None, last_prompt=None)
+
+    @patch("requests.Session.post")
+    def test_response_cache_hit_skips_backend(self, mock_post):
+        import tempfile
+        mock_post.return_value = self.make_resp(json_data={"response": "lights off"})
+        with tempfile.TemporaryDirectory() as tmp:
+            reasoning_engine.RESPONSE_CACHE = None
+            reasoning_engine.CFG.update({
+                "use_open_webui": False,
+                "response_cache_enabled": True,
+                "response_cache_path": tmp + "/cache.json",
+            })
+            try:
+                self.assertEqual(reasoning_engine.query_ollama("Turn off the lights"), "lights off")
+                self.assertFalse(reasoning_engine.get_last_result_info()["cache_hit"])
+                self.assertEqual(reasoning_engine.query_ollama("turn off the lights!"), "lights off")
+                info = reasoning_engine.get_last_result_info()
+                self.assertTrue(info["cache_hit"])
+                self.assertEqual(info["backend"], "ollama")
+                self.assertEqual(info["cache"]["hits"], 1)
+                self.assertEqual(mock_post.call_count, 1)
+                # A different context must not reuse the cached reply.
+                reasoning_engine.query_ollama("turn off the lights", cache_context={"smart_home": "changed"})
+                self.assertEqual(mock_post.call_count, 2)
+            finally:
+                reasoning_engine.RESPONSE_CACHE = None
+
+    @patch("requests.Session.post")
+    def test_fallback_reply_is_cached_under_ollama(self, mock_post):
+        import tempfile
+
+        def post(url, **kwargs):
+            if url == "http://webui.local/api":
+                raise Exception("Open Web UI down")
+            return self.make_resp(json_data={"response": "lights off"})
+
+        mock_post.side_effect = post
+        with tempfile.TemporaryDirectory() as tmp, patch.dict(reasoning_engine.CFG, {
+            "use_open_webui": True,
+            "open_webui_endpoint": "http://webui.local/api",
+            "open_webui_retries": 1,
+            "response_cache_enabled": True,
+            "response_cache_path": tmp + "/cache.json",
+        }):
+            reasoning_engine.RESPONSE_CACHE = None
+            try:
+                self.assertEqual(reasoning_engine.query_ollama("turn off the lights"), "lights off")
+                # Open Web UI is still preferred: the Ollama fallback reply is not an Open Web UI hit
+                self.assertEqual(reasoning_engine.query_ollama("turn off the lights"), "lights off")
+                info = reasoning_engine.get_last_result_info()
+                self.assertFalse(info["cache_hit"])
+                self.assertTrue(info["fallback"])
+                self.assertEqual(info["backend"], "ollama")
+                # Asking Ollama directly reuses it
+                self.assertEqual(reasoning_engine.query_ollama("turn off the lights", use_open_webui=False), "lights off")
+                info = reasoning_engine.get_last_result_info()
+                self.assertTrue(info["cache_hit"])
+                self.assertEqual(info["backend"], "ollama")
+                self.assertFalse(info["fallback"])
+            finally:
+                reasoning_engine.RESPONSE_CACHE = None
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,121 @@
+"""
+Unit tests for background reasoning jobs and their Server-Sent Events route.
+"""
+import json
+import threading
+import unittest
+from unittest.mock import patch
+
+import interface
+import reasoning_engine
+from reasoning_jobs import JobManager, JobQueueFull
+
+
+class GatedStream:
+    """A token stream that only continues once released."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.release = threading.Event()
+
+    def __call__(self, prompt, **kwargs):
+        reasoning_engine.LAST_RESULT["backend"] = kwargs.get("backend", "ollama")
+        yield self.tokens[0]
+        self.release.wait(5.0)
+        yield from self.tokens[1:]
+
+
+class TestReasoningJobs(unittest.TestCase):
+    def test_tokens_stream_to_readers_while_generating(self):
+        stream = GatedStream(["Hello", " there", "."])
+        manager = JobManager(workers=1, stream=stream)
+        self.addCleanup(manager.shutdown)
+        job = manager.submit("hi")
+        events = job.events()
+        self.assertEqual(next(events), (0, "Hello"))
+        self.assertFalse(job.done)
+        stream.release.set()
+        self.assertEqual(list(events), [(1, " there"), (2, ".")])
+        self.assertEqual(manager.get(job.id).to_dict()["text"], "Hello there.")
+        self.assertEqual(job.info["backend"], "ollama")
+        # A late reader can resume from any token
+        self.assertEqual(list(job.events(start=2)), [(2, ".")])
+
+    def test_queue_is_bounded(self):
+        stream = GatedStream(["a", "b"])
+        manager = JobManager(workers=1, max_pending=2, stream=stream)
+        self.addCleanup(manager.shutdown)
+        first, second = manager.submit("1"), manager.submit("2")
+        with self.assertRaises(JobQueueFull):
+            manager.submit("3")
+        stream.release.set()
+        list(first.events())
+        list(second.events())
+        self.assertEqual(second.status, "done")
+        manager.submit("4")
+
+    def test_concurrent_jobs_keep_their_own_result_info(self):
+        both_running = threading.Barrier(2, timeout=5.0)
+
+        def stream(prompt, backend):
+            reasoning_engine.LAST_RESULT["backend"] = backend
+            both_running.wait()
+            yield prompt
+
+        manager = JobManager(workers=2, stream=stream)
+        self.addCleanup(manager.shutdown)
+        jobs = [manager.submit("x", backend=name) for name in ("ollama", "open_webui")]
+        for job in jobs:
+            list(job.events(timeout=5.0))
+        self.assertEqual([job.info["backend"] for job in jobs], ["ollama", "open_webui"])
+
+    def test_errors_end_the_job(self):
+        def failing(prompt, **kwargs):
+            yield "partial"
+            raise RuntimeError("backend gone")
+
+        manager = JobManager(stream=failing)
+        self.addCleanup(manager.shutdown)
+        job = manager.submit("hi")
+        self.assertEqual(list(job.events(timeout=5.0)), [(0, "partial")])
+        self.assertEqual((job.status, job.error), ("error", "backend gone"))
+
+    @patch("requests.Session.post", side_effect=ConnectionError("connection refused"))
+    def test_backend_failure_of_the_real_stream_fails_the_job(self, mock_post):
+        cfg = {"ollama_endpoint": "http://ollama.local/api/generate", "use_open_webui": False}
+        with patch.object(reasoning_engine, "CFG", cfg):
+            manager = JobManager()
+            self.addCleanup(manager.shutdown)
+            job = manager.submit("hi", history=[])
+            self.assertEqual(list(job.events(timeout=5.0)), [])
+        self.assertTrue(mock_post.called)
+        self.assertEqual((job.status, job.error), ("error", "connection refused"))
+
+
+class TestJobRoutes(unittest.TestCase):
+    def setUp(self):
+        self.manager = JobManager(workers=1, stream=lambda prompt, **kwargs: iter(["Sun", "ny."]))
+        self.addCleanup(self.manager.shutdown)
+        patcher = patch.object(interface, "get_job_manager", return_value=self.manager)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = interface.app.test_client()
+
+    def test_text_input_returns_a_job_and_streams_events(self):
+        rv = self.client.post("/text_input", data={"user_text": "weather?"}, headers={"Accept": "application/json"})
+        self.assertEqual(rv.status_code, 202)
+        job_id = rv.get_json()["job_id"]
+        body = self.client.get(f"/jobs/{job_id}/events").get_data(as_text=True)
+        self.assertIn('id: 0\ndata: {"token": "Sun"}\n\n', body)
+        self.assertIn('id: 1\ndata: {"token": "ny."}\n\n', body)
+        done = body.split("event: done\ndata: ")[1]
+        self.assertEqual(json.loads(done)["text"], "Sunny.")
+        # Resuming after the last received token only sends the rest
+        body = self.client.get(f"/jobs/{job_id}/events", headers={"Last-Event-ID": "0"}).get_data(as_text=True)
+        self.assertNotIn('"Sun"', body)
+        self.assertEqual(self.client.get(f"/jobs/{job_id}").get_json()["status"], "done")
+        self.assertEqual(self.client.get("/jobs/unknown/events").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
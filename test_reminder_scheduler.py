@@ -0,0 +1,113 @@
+"""
+Unit tests for the heap-based reminder scheduler, on a simulated clock.
+"""
+import datetime
+import os
+import random
+import tempfile
+import threading
+import time
+import unittest
+
+from conversation_store import ConversationStore
+from reminder_scheduler import ReminderScheduler, next_occurrence
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def local(y, mo, d, h, mi):
+    return datetime.datetime(y, mo, d, h, mi).timestamp()
+
+
+class TestReminderScheduler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = ConversationStore(os.path.join(self.tmp.name, "nova.db"))
+        self.clock = FakeClock(local(2024, 5, 6, 8, 0))  # a Monday
+
+    def test_recurrence_rules(self):
+        friday = local(2024, 5, 10, 9, 0)
+        self.assertEqual(next_occurrence("daily", friday, friday), local(2024, 5, 11, 9, 0))
+        self.assertEqual(next_occurrence("weekdays", friday, friday), local(2024, 5, 13, 9, 0))
+        self.assertEqual(next_occurrence("weekly", friday, friday), local(2024, 5, 17, 9, 0))
+        self.assertEqual(next_occurrence("every:15", friday, friday + 3600), friday + 3600 + 15 * 60)
+        self.assertIsNone(next_occurrence("once", friday, friday))
+        # Missed days are skipped, not replayed
+        self.assertEqual(next_occurrence("daily", friday, local(2024, 6, 20, 12, 0)), local(2024, 6, 21, 9, 0))
+
+    def test_fires_once_per_occurrence_and_persists(self):
+        scheduler = ReminderScheduler(self.store, clock=self.clock)
+        scheduler.add("stretch", "08:30")
+        scheduler.add("call mom", "09:00", "once")
+        scheduler.add("study")  # no time: listed, never fired
+        self.assertEqual(scheduler.add("stretch", "08:30")["routine"], "stretch")  # not duplicated
+        self.assertEqual(len(scheduler.reminders()), 3)
+        self.assertEqual(scheduler.next_fire(), local(2024, 5, 6, 8, 30))
+        self.assertEqual(scheduler.pop_due(local(2024, 5, 6, 8, 29)), [])
+        self.assertEqual([r["routine"] for r in scheduler.pop_due(local(2024, 5, 6, 8, 30))], ["stretch"])
+        self.assertEqual(scheduler.pop_due(local(2024, 5, 6, 8, 31)), [])
+        self.assertEqual([r["routine"] for r in scheduler.pop_due(local(2024, 5, 6, 9, 5))], ["call mom"])
+
+        # A new instance (e.g. after a restart) continues from the stored state
+        restarted = ReminderScheduler(self.store, clock=self.clock)
+        self.assertEqual(sorted(r["routine"] for r in restarted.reminders()), ["stretch", "study"])
+        self.assertEqual(restarted.next_fire(), local(2024, 5, 7, 8, 30))
+
+    def test_thousands_of_reminders_on_simulated_clock(self):
+        rng = random.Random(7)
+        scheduler = ReminderScheduler(self.store, clock=self.clock)
+        expected = {}
+        start = self.clock.now
+        end = start + 2 * 86400
+        for i in range(2000):
+            routine = f"r{i}"
+            if i % 2:
+                minutes = rng.choice([7, 30, 45, 90])
+                scheduler.add(routine, recurrence=f"every:{minutes}")
+                expected[routine] = int((end - start) // (minutes * 60))
+            else:
+                hh, mm = rng.randrange(24), rng.randrange(60)
+                r = scheduler.add(routine, f"{hh:02d}:{mm:02d}")
+                expected[routine] = sum(1 for day in range(3) if start <= r["next_fire"] + day * 86400 <= end)
+        fired = {}
+        now = start
+        while now < end:
+            now = min(now + 60, end)
+            for r in scheduler.pop_due(now):
+                self.assertLessEqual(r["last_fired"] - now, 0)
+                fired[r["routine"]] = fired.get(r["routine"], 0) + 1
+        self.assertEqual({k: v for k, v in expected.items() if v}, fired)
+
+    def test_wait_wakes_when_due_and_on_add(self):
+        scheduler = ReminderScheduler(self.store, poll_interval=5.0)
+        result = []
+        waiter = threading.Thread(target=lambda: result.extend(scheduler.wait(timeout=5.0)))
+        started = time.monotonic()
+        waiter.start()
+        time.sleep(0.1)
+        # Added while the waiter is asleep with nothing scheduled
+        scheduler.add("blink", recurrence="every:0.005")  # 0.3 s
+        waiter.join(5.0)
+        elapsed = time.monotonic() - started
+        self.assertEqual([r["routine"] for r in result], ["blink"])
+        self.assertLess(elapsed, 1.0)
+
+    def test_reminders_added_by_another_process_are_seen(self):
+        scheduler = ReminderScheduler(self.store, clock=self.clock)
+        self.assertEqual(scheduler.reminders(), [])
+        other = ReminderScheduler(ConversationStore(self.store.path), clock=self.clock)
+        done = threading.Thread(target=lambda: other.add("water plants", "08:10"))
+        done.start()
+        done.join()
+        self.assertEqual([r["routine"] for r in scheduler.pop_due(local(2024, 5, 6, 8, 10))], ["water plants"])
+
+
+if __name__ == "__main__":
+    unittest.main()
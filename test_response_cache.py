@@ -0,0 +1,63 @@
+"""
+Unit tests for the reasoning response cache.
+"""
+import os
+import tempfile
+import unittest
+
+from response_cache import ResponseCache, normalize_prompt
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_normalize_prompt(self):
+        self.assertEqual(normalize_prompt("Hey Nova, turn off the lights!"), "turn off the lights")
+        self.assertEqual(normalize_prompt("  TURN off   the lights? "), "turn off the lights")
+        self.assertEqual(normalize_prompt("What's my meeting?"), "what's my meeting")
+        self.assertEqual(normalize_prompt("Hi Nova"), "hi nova")
+        # Words that carry meaning are kept
+        self.assertNotEqual(normalize_prompt("Are you ok?"), normalize_prompt("Are you?"))
+        self.assertEqual(normalize_prompt("So can you stop?"), "so can you stop")
+
+    def test_key_includes_model_backend_and_context(self):
+        key = ResponseCache.make_key("turn off the lights", "llama3", "ollama", {"weather": "sunny"})
+        self.assertEqual(key, ResponseCache.make_key("Please turn off the lights.", "llama3", "ollama", {"weather": "sunny"}))
+        self.assertNotEqual(key, ResponseCache.make_key("turn off the lights", "mistral", "ollama", {"weather": "sunny"}))
+        self.assertNotEqual(key, ResponseCache.make_key("turn off the lights", "llama3", "open_webui", {"weather": "sunny"}))
+        self.assertNotEqual(key, ResponseCache.make_key("turn off the lights", "llama3", "ollama", {"weather": "rain"}))
+
+    def test_lru_ttl_and_counters(self):
+        clock = FakeClock()
+        cache = ResponseCache(path=None, max_entries=2, ttl=60, clock=clock)
+        cache.put("a", "A", "ollama")
+        cache.put("b", "B", "ollama")
+        self.assertEqual(cache.get("a"), ("A", "ollama"))  # a is now most recent
+        cache.put("c", "C", "ollama")                       # evicts b
+        self.assertIsNone(cache.get("b"))
+        clock.now += 61
+        self.assertIsNone(cache.get("a"))                   # expired
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 2, "size": 1})
+
+    def test_persists_across_instances(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.json")
+            clock = FakeClock()
+            cache = ResponseCache(path=path, ttl=60, clock=clock)
+            cache.put("old", "stale", "ollama")
+            clock.now += 50
+            cache.put("new", "fresh", "ollama")
+            clock.now += 20
+            reloaded = ResponseCache(path=path, ttl=60, clock=clock)
+            self.assertIsNone(reloaded.get("old"))
+            self.assertEqual(reloaded.get("new"), ("fresh", "ollama"))
+
+
+if __name__ == "__main__":
+    unittest.main()
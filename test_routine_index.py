@@ -0,0 +1,73 @@
+"""
+Unit tests for the incremental routine index.
+"""
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import memory_manager
+from conversation_store import ConversationStore
+from routine_index import RoutineIndex
+
+
+def at_hour(hour):
+    return time.mktime((2024, 5, 1, hour, 15, 0, 0, 0, -1))
+
+
+class TestRoutineIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = ConversationStore(os.path.join(self.tmp.name, "history.db"))
+
+    def test_match_uses_word_prefixes_and_phrases(self):
+        index = RoutineIndex(self.store, ["remind", "drink water", "drink", "study"])
+        self.assertEqual(index.match("Remind me to DRINK   water"), {"remind", "drink water"})
+        self.assertEqual(index.match("Set a reminder, I'm studying"), {"remind", "study"})
+        self.assertEqual(index.match("a drink please"), {"drink"})
+        self.assertEqual(index.match("understudy"), set())
+
+    def test_counts_and_hours_are_incremental(self):
+        index = RoutineIndex(self.store, ["study", "exercise"])
+        self.store.append("time to study", "ok", timestamp=at_hour(19))
+        self.store.append("study study study", "ok", timestamp=at_hour(19))
+        self.store.append("exercise", "ok", timestamp=at_hour(7))
+        self.assertEqual(index.sync(), 3)
+        self.assertEqual(index.sync(), 0)
+        self.store.append("more study", "ok", timestamp=at_hour(8))
+        routines = index.routines(min_count=2)
+        self.assertEqual([r["keyword"] for r in routines], ["study"])
+        self.assertEqual(routines[0]["count"], 3)  # once per turn
+        self.assertEqual(routines[0]["peak_hour"], 19)
+        self.assertEqual(routines[0]["hours"][8], 1)
+
+    def test_changed_keywords_rebuild_from_history(self):
+        for _ in range(2):
+            self.store.append("meeting then exercise", "ok")
+        self.assertEqual([r["keyword"] for r in RoutineIndex(self.store, ["meeting"]).routines()], ["meeting"])
+        self.assertEqual([r["keyword"] for r in RoutineIndex(self.store, ["exercise"]).routines()], ["exercise"])
+
+
+class TestMemoryManagerRoutines(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = patch.multiple(memory_manager, MEMORY_DB=os.path.join(self.tmp.name, "history.db"),
+                                 MEMORY_FILE=os.path.join(self.tmp.name, "history.json"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_save_turn_updates_routines(self):
+        self.assertEqual(memory_manager.get_routines(), [])
+        memory_manager.save_turn("Remind me to drink water", "Sure")
+        memory_manager.save_turn("Did I drink water today?", "Not yet")
+        self.assertEqual(memory_manager.get_routines(), ["drink water"])
+        self.assertIn("drink water (usually around", memory_manager.suggest_routine())
+        memory_manager.clear_memory()
+        self.assertEqual(memory_manager.get_routines(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
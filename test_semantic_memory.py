@@ -0,0 +1,122 @@
+"""
+Unit tests for the long-term semantic memory index.
+"""
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import memory_manager
+import reasoning_engine
+from conversation_store import ConversationStore
+from semantic_memory import SemanticMemory
+
+TURNS = [
+    ("My sister's birthday is on the 12th of June", "I'll remember that."),
+    ("What's a good recipe for banana bread?", "Mash three ripe bananas with flour, sugar and butter."),
+    ("Turn on the living room lights", "Done."),
+    ("I parked the car on level 3 of the garage", "Got it, level 3."),
+    ("Tell me a joke", "Why did the scarecrow win an award?"),
+]
+
+
+class TestSemanticMemory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = ConversationStore(os.path.join(self.tmp.name, "history.db"))
+        for user, nova in TURNS:
+            self.store.append(user, nova)
+
+    def memory(self, **kwargs):
+        return SemanticMemory(self.store, os.path.join(self.tmp.name, "vectors"), **kwargs)
+
+    def test_recalls_related_turns(self):
+        for dtype in ("int8", "float32"):
+            memory = self.memory(dtype=dtype)
+            self.assertEqual(memory.recall("where did I park my car?", k=1)[0]["user"], TURNS[3][0])
+            self.assertEqual(memory.recall("when is my sister's birthday", k=1)[0]["user"], TURNS[0][0])
+            self.assertEqual(memory.recall("quantum chromodynamics"), [])
+            memory.clear()
+
+    def test_incremental_growth_and_persistence(self):
+        memory = self.memory()
+        memory.GROWTH = 4
+        self.assertEqual(memory.sync(), 5)
+        self.assertEqual(memory.sync(), 0)
+        for i in range(10):
+            self.store.append(f"filler turn number {i}", "ok")
+        self.store.append("The wifi password is on the fridge", "Noted.")
+        hits = memory.search("what's the wifi password", k=2)
+        self.assertEqual(hits[0][0], self.store.last_id())
+        # Reopened from disk: nothing to re-embed, same answers
+        reopened = self.memory()
+        self.assertEqual(reopened.sync(), 0)
+        self.assertEqual(reopened.search("what's the wifi password", k=2), hits)
+
+    def test_excludes_recent_turns_and_follows_clear(self):
+        memory = self.memory()
+        self.assertEqual(memory.recall("banana bread", exclude_after=1), [])
+        self.assertEqual([t["id"] for t in memory.recall("banana bread", exclude_after=2)], [2])
+        self.assertEqual(memory.recall("banana bread", min_score=10.0), [])
+        self.store.clear()  # e.g. from the dashboard process
+        self.assertEqual(memory.recall("banana bread"), [])
+
+    def test_two_processes_share_one_index(self):
+        # Two instances over their own store connections stand in for the
+        # voice loop (writer) and the dashboard (reader)
+        writer = self.memory()
+        writer.GROWTH = 4
+        reader = SemanticMemory(ConversationStore(self.store.path), writer.directory)
+        self.assertEqual(writer.sync(), 5)
+        self.assertEqual(reader.search("banana bread", k=1)[0][0], 2)
+        # The writer grows (replaces) the matrix; the reader re-maps it
+        self.store.append("The wifi password is on the fridge", "Noted.")
+        self.assertEqual(writer.sync(), 1)
+        self.assertEqual(reader.search("wifi password", k=1)[0][0], 6)
+        # A clear by the writer, then a new turn: ids keep growing, but the
+        # reader must neither return nor write back the deleted turns
+        self.store.clear()
+        writer.clear()
+        self.store.append("Banana bread is in the oven", "Enjoy.")
+        self.assertEqual([i for i, _ in reader.search("banana bread")], [7])
+        self.assertEqual(reader.search("tell me a joke"), [])
+        self.assertEqual(writer.sync(), 0)
+        fresh = self.memory()
+        self.assertEqual([i for i, _ in fresh.search("banana bread")], [7])
+        self.assertEqual(fresh.search("where did I park the car"), [])
+        with fresh._locked():
+            self.assertEqual((fresh._meta["rows"], fresh._meta["turns"]), (1, 1))
+            self.assertEqual(fresh._df.sum(), len(fresh.embedder.buckets("Banana bread is in the oven Enjoy.")))
+
+
+class TestPromptRecall(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patchers = [
+            patch.multiple(memory_manager, MEMORY_DB=os.path.join(self.tmp.name, "history.db"),
+                           MEMORY_FILE=os.path.join(self.tmp.name, "history.json")),
+            patch.dict(memory_manager.CFG, {"semantic_memory_enabled": True}),
+            patch.object(reasoning_engine, "CFG", {"prompt_history_enabled": True, "prompt_history_turns": 2}),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_prompt_includes_related_older_turns(self):
+        for user, nova in TURNS:
+            memory_manager.save_turn(user, nova)
+        prepared = reasoning_engine._prepare_prompt(
+            "when is my sister's birthday?", {"ollama_endpoint": "e", "ollama_model": "m"}, None, None)
+        text = prepared["text"]
+        self.assertTrue(text.startswith("Earlier, related conversation:\nUser: My sister's birthday is on the 12th of June"))
+        # The two most recent turns are the window
+        self.assertIn("User: I parked the car on level 3 of the garage\nNova: Got it, level 3.\nUser: Tell me a joke", text)
+        self.assertNotIn("banana", text)
+        self.assertTrue(text.endswith("User: when is my sister's birthday?\nNova:"))
+        self.assertEqual(reasoning_engine.get_last_result_info()["recalled_turns"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
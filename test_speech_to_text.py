@@ -0,0 +1,141 @@
+"""
+Unit tests for speech_to_text server backend and subprocess fallback.
+"""
+import io
+import os
+import tempfile
+import threading
+import time
+import unittest
+import wave
+from unittest.mock import patch, MagicMock
+
+import numpy as np
+
+import speech_to_text
+
+
+class TestSpeechToText(unittest.TestCase):
+    def setUp(self):
+        speech_to_text.CFG = {
+            "whisper_backend": "server",
+            "whisper_server_url": "http://whisper.local/inference",
+            "whisper_server_retry_after": 30,
+        }
+        speech_to_text._SERVER_DOWN_UNTIL = 0.0
+
+    def test_pcm_to_wav_bytes(self):
+        wav_bytes = speech_to_text.pcm_to_wav_bytes(b"\x01\x00\x02\x00", 16000)
+        with wave.open(io.BytesIO(wav_bytes)) as w:
+            self.assertEqual(w.getframerate(), 16000)
+            self.assertEqual(w.getnframes(), 2)
+
+    @patch("subprocess.run")
+    @patch("requests.Session.post")
+    def test_transcribe_pcm_uses_server(self, mock_post, mock_run):
+        resp = MagicMock()
+        resp.json.return_value = {"text": " turn off the lights \n"}
+        mock_post.return_value = resp
+
+        self.assertEqual(speech_to_text.transcribe_pcm(b"\x00\x00" * 160), "turn off the lights")
+        called_args, called_kwargs = mock_post.call_args
+        self.assertEqual(called_args[0], "http://whisper.local/inference")
+        self.assertIn("file", called_kwargs["files"])
+        mock_run.assert_not_called()
+
+    @patch("subprocess.run")
+    @patch("requests.Session.post")
+    def test_server_failure_falls_back_to_subprocess(self, mock_post, mock_run):
+        mock_post.side_effect = ConnectionError("server down")
+
+        def fake_whisper(cmd, **kwargs):
+            audio_path = cmd[cmd.index("-f") + 1]
+            with open(audio_path.replace(".wav", ".txt"), "w") as f:
+                f.write("hello nova\n")
+            return MagicMock(returncode=0)
+
+        mock_run.side_effect = fake_whisper
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "utt.wav")
+            with open(path, "wb") as f:
+                f.write(speech_to_text.pcm_to_wav_bytes(b"\x00\x00" * 160))
+            self.assertEqual(speech_to_text.transcribe_audio(path), "hello nova")
+            # The server is not retried during the cooldown window.
+            self.assertEqual(speech_to_text.transcribe_audio(path), "hello nova")
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertEqual(mock_run.call_count, 2)
+
+    def test_merge_hypotheses(self):
+        merge = speech_to_text.merge_hypotheses
+        self.assertEqual(merge("turn off the", "the lights"), "turn off the lights")
+        self.assertEqual(merge("what is the weather", "ther weather in London"), "what is the weather in London")
+        self.assertEqual(merge("hello", "world"), "hello world")
+        self.assertEqual(merge("", "hi"), "hi")
+
+    def test_streaming_transcriber_partials_and_final(self):
+        calls = []
+        words = ["turn", "off", "the", "lights"]
+
+        def fake_transcribe(pcm):
+            # one word per 100 samples of audio
+            calls.append(len(pcm))
+            return " ".join(words[:len(pcm) // 100])
+
+        partials = []
+        got_partial = threading.Event()
+
+        def on_partial(text, final):
+            partials.append((text, final))
+            got_partial.set()
+
+        st = speech_to_text.StreamingTranscriber(sample_rate=100, on_partial=on_partial, window=10, interval=2,
+                                                 transcribe=fake_transcribe)
+        st.feed(np.zeros(200, dtype=np.int16))
+        self.assertTrue(got_partial.wait(2.0))
+        st.feed(np.zeros(200, dtype=np.int16))
+        self.assertEqual(st.finalize(), "turn off the lights")
+        self.assertEqual(partials[0], ("turn off", False))
+        self.assertEqual(partials[-1], ("turn off the lights", True))
+
+    def test_streaming_transcriber_reuses_covering_partial(self):
+        calls = []
+
+        def fake_transcribe(pcm):
+            calls.append(len(pcm))
+            return "hello nova"
+
+        done = threading.Event()
+        st = speech_to_text.StreamingTranscriber(sample_rate=100, window=10, interval=1, transcribe=fake_transcribe,
+                                                 on_partial=lambda text, final: done.set())
+        st.feed(np.zeros(150, dtype=np.int16))
+        self.assertTrue(done.wait(2.0))
+        # The endpointed utterance is shorter than what the partial already covered.
+        trimmed = speech_to_text.AudioBuffer(np.zeros(120, dtype=np.int16), 100)
+        self.assertEqual(st.finalize(trimmed), "hello nova")
+        self.assertEqual(calls, [150])
+
+    def test_streaming_transcriber_skips_partials_without_server(self):
+        # Server in its failure cooldown: partials would each start a whisper subprocess
+        speech_to_text._SERVER_DOWN_UNTIL = float("inf")
+        with patch.object(speech_to_text, "transcribe_pcm", return_value="what time is it") as mock_transcribe:
+            st = speech_to_text.StreamingTranscriber(sample_rate=100, window=2, interval=1)
+            for _ in range(5):
+                st.feed(np.zeros(100, dtype=np.int16))
+            time.sleep(0.2)
+            self.assertEqual(mock_transcribe.call_count, 0)
+            self.assertEqual(st.finalize(), "what time is it")
+        # One pass over the whole utterance, not just the last window
+        self.assertEqual(mock_transcribe.call_count, 1)
+        self.assertEqual(len(mock_transcribe.call_args[0][0]), 500)
+
+    def test_publish_and_read_partial(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "partial.json")
+            speech_to_text.publish_partial("hel", path=path)
+            self.assertEqual(speech_to_text.read_partial(path)["text"], "hel")
+            self.assertFalse(speech_to_text.read_partial(path)["final"])
+        self.assertEqual(speech_to_text.read_partial(os.path.join(tmp, "missing.json")), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Unit tests for the synthesized speech cache.
+"""
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+import numpy as np
+
+import text_to_speech
+from audio_buffer import AudioBuffer
+from tts_cache import TTSCache
+
+
+def wav(n, value=1000):
+    return AudioBuffer(np.full(n, value, dtype=np.int16), 16000).to_wav_bytes()
+
+
+class TestTTSCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_key_depends_on_all_parameters(self):
+        key = TTSCache.make_key("Reminder: stretch.", "en_US", "default", "neutral")
+        self.assertEqual(key, TTSCache.make_key("Reminder:  stretch. ", "en_US", "default", "neutral"))
+        self.assertNotEqual(key, TTSCache.make_key("Reminder: stretch!", "en_US", "default", "neutral"))
+        self.assertNotEqual(key, TTSCache.make_key("Reminder: stretch.", "en_GB", "default", "neutral"))
+        self.assertNotEqual(key, TTSCache.make_key("Reminder: stretch.", "en_US", "p225", "neutral"))
+        self.assertNotEqual(key, TTSCache.make_key("Reminder: stretch.", "en_US", "default", "happy"))
+
+    def test_put_get_is_memory_mapped(self):
+        cache = TTSCache(self.tmp.name)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", wav(800, 1234))
+        buffer = cache.get("a")
+        np.testing.assert_array_equal(buffer.samples, np.full(800, 1234, dtype=np.int16))
+        self.assertFalse(buffer.samples.flags.writeable)
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1, "entries": 1, "bytes": len(wav(800))})
+
+    def test_lru_eviction_by_size_survives_restart(self):
+        size = len(wav(1000))
+        cache = TTSCache(self.tmp.name, max_bytes=2 * size)
+        cache.put("a", wav(1000))
+        cache.put("b", wav(1000))
+        # Touch "a" so "b" is least recently used
+        os.utime(os.path.join(self.tmp.name, "b.wav"), (1, 1))
+        self.assertIsNotNone(cache.get("a"))
+        cache.put("c", wav(1000))
+        self.assertNotIn("b", cache)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "b.wav")))
+        self.assertEqual(cache.stats()["bytes"], 2 * size)
+
+        reopened = TTSCache(self.tmp.name, max_bytes=2 * size)
+        self.assertIn("a", reopened)
+        self.assertIn("c", reopened)
+        self.assertEqual(reopened.stats()["bytes"], 2 * size)
+
+    def test_startup_scan_removes_partial_writes_and_enforces_size(self):
+        size = len(wav(1000))
+        cache = TTSCache(self.tmp.name, max_bytes=3 * size)
+        for i, key in enumerate("abc"):
+            cache.put(key, wav(1000))
+            os.utime(os.path.join(self.tmp.name, f"{key}.wav"), (i + 1, i + 1))
+        with open(os.path.join(self.tmp.name, "d.wav.tmp"), "wb") as f:
+            f.write(b"RIFF")
+        reopened = TTSCache(self.tmp.name, max_bytes=2 * size)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["b.wav", "c.wav"])
+        self.assertEqual(reopened.stats()["bytes"], 2 * size)
+
+
+class TestTextToSpeechCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = patch.object(text_to_speech, "TTS_CACHE", TTSCache(self.tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        cfg = patch.dict(text_to_speech.CFG, {"tts_cache_enabled": True})
+        cfg.start()
+        self.addCleanup(cfg.stop)
+
+    @patch("requests.Session.post")
+    def test_reply_sentence_is_cached_once_repeated(self, mock_post):
+        mock_post.return_value = MagicMock(content=wav(1600))
+        first = text_to_speech._fetch_speech("It is sunny.", "http://tts", "en_US", "default", "neutral")
+        self.assertEqual(os.listdir(self.tmp.name), [])  # seen once: nothing written
+        text_to_speech._fetch_speech("It is sunny.", "http://tts", "en_US", "default", "neutral")
+        third = text_to_speech._fetch_speech("It is sunny.", "http://tts", "en_US", "default", "neutral")
+        self.assertEqual(mock_post.call_count, 2)
+        np.testing.assert_array_equal(first.samples, third.samples)
+
+    @patch("requests.Session.post")
+    def test_pinned_phrase_is_cached_on_first_use(self, mock_post):
+        mock_post.return_value = MagicMock(content=wav(1600))
+        text_to_speech.pin_phrases(["Reminder: stretch."])
+        text_to_speech._fetch_speech("Reminder: stretch.", "http://tts", "en_US", "default", "neutral")
+        text_to_speech._fetch_speech("Reminder: stretch.", "http://tts", "en_US", "default", "neutral")
+        self.assertEqual(mock_post.call_count, 1)
+
+    @patch("requests.Session.post")
+    def test_prewarm_skips_cached_phrases(self, mock_post):
+        mock_post.return_value = MagicMock(content=wav(1600))
+        self.assertEqual(text_to_speech.prewarm_cache(["Reminder: stretch.", "Good morning!", "Reminder: stretch."]), 2)
+        self.assertEqual(text_to_speech.prewarm_cache(["Reminder: stretch."]), 0)
+        self.assertEqual(mock_post.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
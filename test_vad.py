@@ -0,0 +1,68 @@
+"""
+Unit tests for vad.py (energy/ZCR voice activity detection and endpointing).
+"""
+import unittest
+
+import numpy as np
+
+from vad import Endpointer, VoiceActivityDetector, frame_features
+
+FS = 16000
+
+
+def tone(seconds, amplitude=0.3, freq=220.0):
+    t = np.arange(int(seconds * FS)) / FS
+    return (np.sin(2 * np.pi * freq * t) * amplitude * 32767).astype(np.int16)
+
+
+def silence(seconds, noise=0.001, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(int(seconds * FS)) * noise * 32767).astype(np.int16)
+
+
+def feed_in_chunks(endpointer, samples, chunk=480):
+    for start in range(0, len(samples), chunk):
+        if endpointer.feed(samples[start:start + chunk]):
+            return True
+    return False
+
+
+class TestVad(unittest.TestCase):
+    def test_frame_features(self):
+        samples = np.concatenate([np.zeros(480, dtype=np.int16), tone(0.03)])
+        rms, zcr = frame_features(samples, 480)
+        self.assertEqual(len(rms), 2)
+        self.assertLess(rms[0], 1e-6)
+        self.assertAlmostEqual(rms[1], 0.3 / np.sqrt(2), places=2)
+        # 220 Hz crosses zero ~440 times a second -> ~0.0275 per sample
+        self.assertAlmostEqual(zcr[1], 440 / FS, places=2)
+
+    def test_detector_classifies_tone_and_silence(self):
+        detector = VoiceActivityDetector(energy_threshold=0.02)
+        rms, zcr = frame_features(np.concatenate([silence(0.3), tone(0.3)]), 480)
+        speech = detector.classify(rms, zcr)
+        self.assertFalse(speech[:10].any())
+        self.assertTrue(speech[-10:].all())
+
+    def test_endpointer_trims_leading_and_trailing_silence(self):
+        ep = Endpointer(sample_rate=FS, trailing_silence_ms=300, pre_roll_ms=90, keep_silence_ms=60)
+        audio = np.concatenate([silence(1.0), tone(0.6), silence(1.0, seed=1)])
+        self.assertTrue(feed_in_chunks(ep, audio, chunk=333))
+        captured = ep.audio()
+        # speech + pre-roll + kept silence, within a couple of frames
+        self.assertAlmostEqual(len(captured) / FS, 0.6 + 0.09 + 0.06, delta=0.07)
+
+    def test_endpointer_waits_for_onset(self):
+        ep = Endpointer(sample_rate=FS)
+        self.assertFalse(feed_in_chunks(ep, silence(2.0)))
+        self.assertFalse(ep.started)
+        self.assertEqual(len(ep.audio()), 0)
+
+    def test_endpointer_caps_duration(self):
+        ep = Endpointer(sample_rate=FS, max_duration=1.0, pre_roll_ms=0)
+        self.assertTrue(feed_in_chunks(ep, tone(3.0)))
+        self.assertLessEqual(len(ep.audio()) / FS, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+Unit tests for the staged voice pipeline, using in-memory fake stages.
+"""
+import queue
+import threading
+import time
+import unittest
+
+from voice_pipeline import VoicePipeline, StageStats, format_timings, is_echo
+
+
+class FakeStages:
+    def __init__(self, utterances, speak_seconds=0.0):
+        self.utterances = queue.Queue()
+        for u in utterances:
+            self.utterances.put(u)
+        self.speak_seconds = speak_seconds
+        self.spoken = []
+        self.cancelled = []
+        self.saved = []
+        self.states = []
+        self.saved_event = threading.Event()
+
+    def capture(self):
+        try:
+            return self.utterances.get(timeout=0.05)
+        except queue.Empty:
+            return None
+
+    def transcribe(self, audio):
+        return audio
+
+    def plugins(self, transcript):
+        return {"health": "ok"}
+
+    def reason(self, transcript, plugin_results):
+        yield f"You said {transcript}."
+        yield "Anything else?"
+
+    def speak(self, sentences, cancel, on_play):
+        for sentence in sentences:
+            if cancel.is_set():
+                self.cancelled.append(sentence)
+                continue
+            on_play(sentence)
+            if cancel.wait(self.speak_seconds):
+                self.cancelled.append(sentence)
+                continue
+            self.spoken.append(sentence)
+
+    def persist(self, transcript, response):
+        self.saved.append((transcript, response))
+        self.saved_event.set()
+
+
+class TestVoicePipeline(unittest.TestCase):
+    def make_pipeline(self, fakes, **kwargs):
+        return VoicePipeline(
+            capture=fakes.capture,
+            transcribe=fakes.transcribe,
+            plugins=fakes.plugins,
+            reason=fakes.reason,
+            speak=fakes.speak,
+            persist=fakes.persist,
+            set_state=fakes.states.append,
+            **kwargs
+        )
+
+    def test_turn_flows_through_all_stages(self):
+        fakes = FakeStages(["hello"])
+        pipeline = self.make_pipeline(fakes).start()
+        try:
+            self.assertTrue(fakes.saved_event.wait(2.0))
+        finally:
+            pipeline.stop()
+        self.assertEqual(fakes.spoken, ["You said hello.", "Anything else?"])
+        self.assertEqual(fakes.saved, [("hello", "You said hello.\nAnything else?")])
+        self.assertIn("speaking", fakes.states)
+        stats = pipeline.stats.snapshot()
+        for stage in ("capture", "stt", "plugins", "first_sentence", "first_audio", "tts", "memory", "turn"):
+            self.assertEqual(stats[stage]["count"], 1, stage)
+
+    def test_barge_in_cancels_current_reply(self):
+        fakes = FakeStages(["first"], speak_seconds=5.0)
+        pipeline = self.make_pipeline(fakes, barge_in=True).start()
+        try:
+            deadline = time.time() + 2.0
+            while "speaking" not in fakes.states and time.time() < deadline:
+                time.sleep(0.01)
+            fakes.utterances.put("second")
+            deadline = time.time() + 3.0
+            while pipeline.stats.snapshot().get("first_audio", {}).get("count") != 2 and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            pipeline.stop()
+        # The first reply was interrupted and the second one started playing.
+        self.assertIn("You said first.", fakes.cancelled)
+        self.assertEqual(pipeline.stats.snapshot()["first_audio"]["count"], 2)
+        self.assertEqual([t for t, _ in fakes.saved][:1], ["first"])
+
+    def test_reply_picked_up_by_microphone_is_not_a_barge_in(self):
+        fakes = FakeStages(["first"], speak_seconds=0.5)
+        pipeline = self.make_pipeline(fakes, barge_in=True).start()
+        try:
+            deadline = time.time() + 2.0
+            while "speaking" not in fakes.states and time.time() < deadline:
+                time.sleep(0.01)
+            # The microphone hears the reply that is playing
+            fakes.utterances.put("you said first")
+            self.assertTrue(fakes.saved_event.wait(3.0))
+            time.sleep(0.3)
+        finally:
+            pipeline.stop()
+        self.assertEqual(fakes.cancelled, [])
+        self.assertEqual(fakes.spoken, ["You said first.", "Anything else?"])
+        self.assertEqual([t for t, _ in fakes.saved], ["first"])
+
+    def test_echo_detection(self):
+        self.assertTrue(is_echo("you said first", "You said first. Anything else?"))
+        self.assertTrue(is_echo("said first anything", "You said first. Anything else?"))
+        self.assertFalse(is_echo("stop, what's the weather", "You said first. Anything else?"))
+        self.assertFalse(is_echo("", "You said first."))
+
+    def test_announce_is_spoken_but_not_saved(self):
+        fakes = FakeStages([])
+        pipeline = self.make_pipeline(fakes).start()
+        try:
+            pipeline.announce("Reminder: study.")
+            deadline = time.time() + 2.0
+            while not fakes.spoken and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            pipeline.stop()
+        self.assertEqual(fakes.spoken, ["Reminder: study."])
+        self.assertEqual(fakes.saved, [])
+
+    def test_stage_stats_and_format(self):
+        stats = StageStats()
+        stats.record("stt", 0.2)
+        stats.record("stt", 0.4)
+        snap = stats.snapshot()["stt"]
+        self.assertEqual(snap["count"], 2)
+        self.assertAlmostEqual(snap["mean_ms"], 300.0)
+        self.assertAlmostEqual(snap["max_ms"], 400.0)
+        self.assertEqual(format_timings({"stt": 0.25, "capture": 1.0}), "capture=1000ms, stt=250ms")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Unit tests for process-isolated plugin workers.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from plugins import worker_pool
+from plugins.worker_pool import WorkerPool, PluginWorkerError
+
+PROBE_PLUGIN = '''
+import os
+import time
+
+def run(context):
+    action = context.get("action")
+    if action == "alloc":
+        return len(bytearray(context["mb"] * 1024 * 1024))
+    if action == "crash":
+        os._exit(3)
+    if action == "spin":
+        while True:
+            pass
+    if action == "sleep":
+        time.sleep(context["seconds"])
+    return {"pid": os.getpid(), "keys": sorted(context)}
+'''
+
+
+class TestWorkerPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        with open(os.path.join(cls.tmp.name, "nova_probe_plugin.py"), "w") as f:
+            f.write(PROBE_PLUGIN)
+        # Spawned workers inherit sys.path
+        sys.path.insert(0, cls.tmp.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        sys.path.remove(cls.tmp.name)
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        self.pool = WorkerPool({"nova_probe_plugin": {"cpu_seconds": 1, "memory_mb": 256}}, timeout=10.0)
+        self.addCleanup(self.pool.close)
+
+    def run_probe(self, context, **kwargs):
+        return self.pool.run("nova_probe_plugin", context, **kwargs)
+
+    def test_runs_in_a_long_lived_worker_with_trimmed_context(self):
+        first = self.run_probe({"transcript": "hi", "image_path": "x.png", "news_api_key": "secret"},
+                               manifest={"config_keys": ["image_path"]})
+        self.assertNotEqual(first["pid"], os.getpid())
+        self.assertEqual(first["keys"], ["image_path", "transcript"])
+        self.assertEqual(self.run_probe({})["pid"], first["pid"])
+
+    def test_crashed_worker_is_restarted(self):
+        pid = self.run_probe({})["pid"]
+        with self.assertRaisesRegex(PluginWorkerError, "exit code 3"):
+            self.run_probe({"action": "crash"})
+        self.assertNotEqual(self.run_probe({})["pid"], pid)
+        self.assertEqual(self.pool.stats()["restarts"], 1)
+
+    @unittest.skipIf(worker_pool.resource is None, "resource limits not supported")
+    def test_memory_limit_fails_the_call_not_the_worker(self):
+        pid = self.run_probe({})["pid"]
+        with self.assertRaisesRegex(PluginWorkerError, "out of memory"):
+            self.run_probe({"action": "alloc", "mb": 512})
+        self.assertEqual(self.run_probe({"action": "alloc", "mb": 16}), 16 * 1024 * 1024)
+        self.assertEqual(self.run_probe({})["pid"], pid)
+
+    @unittest.skipIf(worker_pool.resource is None, "resource limits not supported")
+    def test_cpu_limit_and_timeout_kill_the_worker(self):
+        started = time.monotonic()
+        with self.assertRaisesRegex(PluginWorkerError, "crashed"):
+            self.run_probe({"action": "spin"})
+        self.assertLess(time.monotonic() - started, 5.0)
+        with self.assertRaisesRegex(PluginWorkerError, "timed out"):
+            self.run_probe({"action": "sleep", "seconds": 5}, timeout=0.5)
+        self.assertIn("pid", self.run_probe({}))
+
+    def test_close_during_a_call_stops_the_worker_afterwards(self):
+        pid = self.run_probe({})["pid"]
+        results = []
+        call = threading.Thread(target=lambda: results.append(self.run_probe({"action": "sleep", "seconds": 0.5})))
+        call.start()
+        time.sleep(0.2)
+        self.pool.close()
+        call.join(5.0)
+        self.assertEqual([r["pid"] for r in results], [pid])  # the call finished normally
+        self.assertEqual(self.pool.stats()["workers"], 0)
+        with self.assertRaisesRegex(PluginWorkerError, "closed"):
+            self.run_probe({})
+        with self.assertRaises(ProcessLookupError):
+            os.kill(pid, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,7 +4,7 @@ def get_available_voices(tts_endpoint: str = "http://localhost:5002/api/voices")
 	Returns a list of voice dicts (name, language, style).
 	"""
 	try:
-		response = requests.get(tts_endpoint)
+		response = get_session("coqui").get(tts_endpoint, timeout=get_timeout("coqui"))
 		response.raise_for_status()
 		return response.json().get("voices", [])
 	except Exception as e:
@@ -12,12 +12,118 @@ def get_available_voices(tts_endpoint: str = "http://localhost:5002/api/voices")
 		return []
 """
 Integrates Coqui TTS for offline text-to-speech synthesis.
+
+Synthesized audio is cached on disk by (text, voice, speaker, style) when
+`tts_cache_enabled` is set (see tts_cache.py), so repeated phrases such as
+reminder announcements play without calling Coqui again. Reply sentences are
+only cached once they have been synthesized `tts_cache_min_uses` times;
+pinned phrases (pre-warmed or announced) are cached right away.
 """
 
-import requests
-import sounddevice as sd
-import numpy as np
-import scipy.io.wavfile as wavfile
+import queue
+import threading
+import time
+import config_loader
+import metrics
+from http_pool import get_session, get_timeout
+from audio_buffer import AudioBuffer, debug_dump, play
+from tts_cache import TTSCache
+
+
+CFG = config_loader.load()
+
+# Created on first use when `tts_cache_enabled` is set.
+TTS_CACHE = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache():
+	global TTS_CACHE
+	if not CFG.get("tts_cache_enabled", True):
+		return None
+	with _cache_lock:
+		if TTS_CACHE is None:
+			TTS_CACHE = TTSCache(
+				directory=CFG.get("tts_cache_dir", "logs/tts_cache"),
+				max_bytes=int(float(CFG.get("tts_cache_max_mb", 64)) * 1024 * 1024),
+				min_uses=int(CFG.get("tts_cache_min_uses", 2)),
+			)
+	return TTS_CACHE
+
+
+def _fetch_speech(text: str, tts_endpoint: str, voice: str, speaker: str, style: str) -> AudioBuffer:
+	cache = _get_cache()
+	key = None
+	if cache is not None:
+		key = cache.make_key(text, voice, speaker, style)
+		cached = cache.get(key)
+		if cached is not None:
+			metrics.inc("cache_hits", cache="tts")
+			return cached
+		metrics.inc("cache_misses", cache="tts")
+	payload = {
+		"text": text,
+		"voice": voice,
+		"speaker": speaker,
+		"style": style
+	}
+	with metrics.span("tts_request", chars=len(text)):
+		started = time.perf_counter()
+		# Streamed, so post() returns at the response headers and the body is read below
+		response = get_session("coqui").post(tts_endpoint, json=payload, timeout=get_timeout("coqui"), stream=True)
+		metrics.record_span("tts_first_byte", started, time.perf_counter() - started)
+		response.raise_for_status()
+		content = response.content
+	if cache is not None and cache.admit(key):
+		cache.put(key, content)
+	# Decoded in place: the samples are a view over the response body.
+	return AudioBuffer.from_wav_bytes(content)
+
+
+def pin_phrases(texts, voice: str = "en_US", speaker: str = "default", style: str = "neutral"):
+	"""
+	Marks phrases (e.g. a reminder about to be announced) to be cached on
+	their first synthesis instead of after `tts_cache_min_uses` syntheses.
+	"""
+	cache = _get_cache()
+	if cache is None:
+		return
+	for text in texts:
+		cache.pin(cache.make_key(text, voice, speaker, style))
+
+
+def prewarm_cache(texts, tts_endpoint: str = "http://localhost:5002/api/tts", voice: str = "en_US", speaker: str = "default", style: str = "neutral") -> int:
+	"""
+	Synthesizes and caches phrases that are known in advance (reminder
+	announcements, fixed system prompts) so they play instantly later.
+	Args:
+		texts (Iterable[str]): Phrases to cache; ones already cached are skipped.
+		Remaining arguments are the same as synthesize_speech().
+	Returns:
+		int: Number of phrases newly synthesized.
+	"""
+	cache = _get_cache()
+	if cache is None:
+		return 0
+	warmed = 0
+	for text in dict.fromkeys(t for t in texts if t):
+		key = cache.make_key(text, voice, speaker, style)
+		cache.pin(key)
+		if key in cache:
+			continue
+		try:
+			_fetch_speech(text, tts_endpoint, voice, speaker, style)
+			warmed += 1
+		except Exception as e:
+			print("TTS cache pre-warm error:", e)
+	return warmed
+
+
+def _play_buffer(buffer: AudioBuffer, output_path: str, cancel=None):
+	debug_dump(buffer, output_path)
+	with metrics.span("playback", seconds=round(buffer.duration, 2)):
+		play(buffer, cancel)
+
 
 def synthesize_speech(text: str, tts_endpoint: str = "http://localhost:5002/api/tts", output_path: str = "nova_reply.wav", voice: str = "en_US", speaker: str = "default", style: str = "neutral"):
 	"""
@@ -25,26 +131,67 @@ def synthesize_speech(text: str, tts_endpoint: str = "http://localhost:5002/api/
 	Args:
 		text (str): Text to synthesize.
 		tts_endpoint (str): Coqui TTS API endpoint.
-		output_path (str): Path to save the generated audio.
+		output_path (str): Where to save the generated audio when `audio_debug_dump` is enabled.
 		voice (str): Language/accent code (e.g., 'en_US').
 		speaker (str): Speaker voice name.
 		style (str): Speaking style (e.g., 'neutral', 'happy').
 	"""
-	payload = {
-		"text": text,
-		"voice": voice,
-		"speaker": speaker,
-		"style": style
-	}
 	try:
-		response = requests.post(tts_endpoint, json=payload)
-		response.raise_for_status()
-		with open(output_path, "wb") as f:
-			f.write(response.content)
-		print(f"Synthesized speech saved to {output_path}")
-		# Play audio
-		fs, audio = wavfile.read(output_path)
-		sd.play(audio, fs)
-		sd.wait()
+		_play_buffer(_fetch_speech(text, tts_endpoint, voice, speaker, style), output_path)
 	except Exception as e:
 		print("Coqui TTS error:", e)
+
+
+def synthesize_stream(sentences, tts_endpoint: str = "http://localhost:5002/api/tts", output_path: str = "nova_reply.wav", voice: str = "en_US", speaker: str = "default", style: str = "neutral", cancel=None, on_play=None) -> list:
+	"""
+	Speaks sentences as they arrive from an iterator (e.g. a streaming LLM reply).
+	A background thread pulls the next sentence and synthesizes it while the
+	previous one is playing, so generation, synthesis and playback overlap.
+	Args:
+		sentences (Iterable[str]): Sentences to speak, in order.
+		cancel (threading.Event): Optional; when set, playback stops and the
+			remaining sentences are consumed without being spoken.
+		on_play (callable): Optional; called with each sentence right before it plays.
+		Remaining arguments are the same as synthesize_speech().
+	Returns:
+		list: The sentences that were consumed, in order (spoken or not).
+	"""
+	pending = queue.Queue(maxsize=2)
+	done = object()
+	spoken = []
+	trace = metrics.current_trace()
+
+	def _producer():
+		with metrics.activate(trace):
+			_produce()
+
+	def _produce():
+		try:
+			for sentence in sentences:
+				spoken.append(sentence)
+				if cancel is not None and cancel.is_set():
+					continue
+				try:
+					pending.put((sentence, _fetch_speech(sentence, tts_endpoint, voice, speaker, style)))
+				except Exception as e:
+					print("Coqui TTS error:", e)
+		finally:
+			pending.put(done)
+
+	worker = threading.Thread(target=_producer, daemon=True)
+	worker.start()
+	while True:
+		item = pending.get()
+		if item is done:
+			break
+		if cancel is not None and cancel.is_set():
+			continue
+		sentence, buffer = item
+		try:
+			if on_play is not None:
+				on_play(sentence)
+			_play_buffer(buffer, output_path, cancel)
+		except Exception as e:
+			print("Coqui TTS error:", e)
+	worker.join()
+	return spoken
@@ -0,0 +1,162 @@
+"""
+Content-addressed cache of synthesized speech.
+
+Each WAV returned by Coqui is stored under logs/tts_cache/ as
+`<sha256(text, voice, speaker, style)>.wav`. Cached files are memory-mapped
+for playback, so a repeated phrase (a reminder, a fixed system prompt or a
+frequent reply) plays without calling the TTS service or copying the audio.
+The directory is bounded to `max_bytes`; least-recently-used files are
+evicted first. A file's mtime records its last use, so LRU order survives
+restarts without a separate index file.
+
+To avoid writing every reply sentence to the SD card, a phrase is only
+admitted once it has been synthesized `min_uses` times, unless it was pinned
+(pre-warmed phrases and reminder announcements).
+"""
+
+import hashlib
+import mmap
+import os
+import threading
+from collections import OrderedDict
+
+from audio_buffer import AudioBuffer
+
+CACHE_DIR = "logs/tts_cache"
+
+
+class TTSCache:
+    """
+    Thread-safe on-disk LRU cache of WAV audio keyed by synthesis parameters.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = 64 * 1024 * 1024, min_uses: int = 2, track: int = 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.min_uses = min_uses
+        self.track = track
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self._bytes = 0
+        self._uses = OrderedDict()     # key -> syntheses seen, for admission (bounded to `track`)
+        self._pinned = OrderedDict()   # keys admitted on their first synthesis
+        self._lock = threading.Lock()
+        self._scan()
+
+    @staticmethod
+    def make_key(text: str, voice: str, speaker: str, style: str) -> str:
+        parts = [" ".join((text or "").split()), voice or "", speaker or "", style or ""]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.wav")
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key: str):
+        """Return a memory-mapped AudioBuffer for `key`, or None on a miss."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            # The samples are a view into the mapping; it is unmapped when they are released.
+            buffer = AudioBuffer.from_wav_bytes(mapped)
+            os.utime(path)
+            return buffer
+        except Exception as e:
+            print("TTS cache read error:", e)
+            with self._lock:
+                self._forget(key)
+            return None
+
+    def pin(self, key: str):
+        """Admit `key` on its first synthesis (pre-warmed phrases, announcements)."""
+        with self._lock:
+            self._pinned[key] = True
+            self._pinned.move_to_end(key)
+            while len(self._pinned) > self.track:
+                self._pinned.popitem(last=False)
+
+    def admit(self, key: str) -> bool:
+        """
+        Record one synthesis of `key` and return whether its audio should be
+        stored: pinned keys always are, others once seen `min_uses` times.
+        """
+        with self._lock:
+            if key in self._pinned:
+                return True
+            uses = self._uses.pop(key, 0) + 1
+            self._uses[key] = uses
+            while len(self._uses) > self.track:
+                self._uses.popitem(last=False)
+            return uses >= self.min_uses
+
+    def put(self, key: str, wav_bytes: bytes):
+        """Store WAV bytes under `key`, evicting least-recently-used files beyond max_bytes."""
+        if not wav_bytes or len(wav_bytes) > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(wav_bytes)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print("TTS cache write error:", e)
+            return
+        with self._lock:
+            self._forget(key)
+            self._entries[key] = len(wav_bytes)
+            self._bytes += len(wav_bytes)
+            self._uses.pop(key, None)
+            self._evict()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self._bytes}
+
+    def _forget(self, key: str):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._bytes -= size
+
+    def _evict(self):
+        # put() rejects files larger than max_bytes, so the newest entry always fits.
+        while self._bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._forget(oldest)
+            try:
+                os.remove(self._path(oldest))
+            except OSError:
+                pass
+
+    def _scan(self):
+        if not os.path.isdir(self.directory):
+            return
+        found = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if name.endswith(".tmp"):
+                    # Left behind by a write that was interrupted
+                    os.remove(path)
+                elif name.endswith(".wav"):
+                    st = os.stat(path)
+                    found.append((st.st_mtime, name[:-4], st.st_size))
+            except OSError:
+                continue
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._bytes += size
+        # max_bytes may have been lowered since the files were written
+        self._evict()
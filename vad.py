@@ -0,0 +1,161 @@
+"""
+Lightweight voice activity detection and endpointing (pure numpy).
+
+Audio is split into fixed-length frames and each frame is classified from its
+RMS energy and zero-crossing rate, computed for a whole block of frames at
+once. The Endpointer turns those per-frame decisions into an utterance: it
+keeps a short pre-roll before speech onset, and ends the utterance after a
+configurable stretch of trailing silence.
+"""
+
+import numpy as np
+
+
+def frame_features(samples: np.ndarray, frame_len: int):
+	"""
+	Split mono samples into whole frames and compute per-frame features.
+	Args:
+		samples (np.ndarray): 1-D int16 or float samples; a trailing partial frame is ignored.
+		frame_len (int): Samples per frame.
+	Returns:
+		(rms, zcr): float arrays of shape (n_frames,). RMS is normalized to
+		full scale (0..1); ZCR is the fraction of sign changes per sample.
+	"""
+	n = len(samples) // frame_len
+	if n == 0:
+		return np.zeros(0), np.zeros(0)
+	frames = samples[:n * frame_len].reshape(n, frame_len)
+	if frames.dtype == np.int16:
+		frames = frames.astype(np.float32) / 32768.0
+	rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+	signs = np.signbit(frames)
+	zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / float(frame_len - 1)
+	return rms, zcr
+
+
+class VoiceActivityDetector:
+	"""
+	Frame classifier combining energy and zero-crossing rate.
+
+	A frame is speech when its energy clears the threshold (voiced sounds), or
+	when it has at least half that energy and a high zero-crossing rate
+	(unvoiced consonants such as "s" or "f"). The threshold adapts upwards to
+	a slowly tracked noise floor so steady background noise is not speech.
+	"""
+
+	def __init__(self, energy_threshold: float = 0.02, zcr_threshold: float = 0.25, noise_ratio: float = 3.0, noise_alpha: float = 0.05):
+		self.energy_threshold = energy_threshold
+		self.zcr_threshold = zcr_threshold
+		self.noise_ratio = noise_ratio
+		self.noise_alpha = noise_alpha
+		self.noise_floor = 0.0
+
+	def classify(self, rms: np.ndarray, zcr: np.ndarray) -> np.ndarray:
+		"""Return a boolean speech mask for a block of frames."""
+		threshold = max(self.energy_threshold, self.noise_floor * self.noise_ratio)
+		voiced = rms >= threshold
+		unvoiced = (rms >= threshold * 0.5) & (zcr >= self.zcr_threshold)
+		speech = voiced | unvoiced
+		quiet = rms[~speech]
+		if len(quiet):
+			self.noise_floor += self.noise_alpha * (float(np.mean(quiet)) - self.noise_floor)
+		return speech
+
+
+class Endpointer:
+	"""
+	Collects one utterance from a stream of audio chunks.
+
+	feed() accepts chunks of any length and returns True once the utterance is
+	complete: speech has started (`onset_ms` of consecutive speech) and then
+	`trailing_silence_ms` of silence followed, or `max_duration` was reached.
+	The captured audio (with `pre_roll_ms` before onset and at most
+	`keep_silence_ms` of the trailing silence) is returned by audio().
+	"""
+
+	def __init__(self, sample_rate: int = 16000, frame_ms: int = 30, onset_ms: int = 90, trailing_silence_ms: int = 700,
+				pre_roll_ms: int = 300, keep_silence_ms: int = 150, max_duration: float = 15.0, detector: VoiceActivityDetector = None):
+		self.sample_rate = sample_rate
+		self.frame_len = max(2, int(sample_rate * frame_ms / 1000))
+		self.onset_frames = max(1, int(round(onset_ms / frame_ms)))
+		self.trailing_frames = max(1, int(round(trailing_silence_ms / frame_ms)))
+		self.keep_frames = int(round(keep_silence_ms / frame_ms))
+		self.pre_roll_frames = int(round(pre_roll_ms / frame_ms))
+		self.detector = detector or VoiceActivityDetector()
+		# Preallocated capture buffer: pre-roll plus the maximum utterance length.
+		self._max_frames = self.pre_roll_frames + int(max_duration * sample_rate / self.frame_len)
+		self._buf = np.zeros(self._max_frames * self.frame_len, dtype=np.int16)
+		self._frames = 0           # whole frames held in _buf
+		# Ring buffer holding the most recent frames before onset.
+		self._ring = np.zeros((self.pre_roll_frames + self.onset_frames, self.frame_len), dtype=np.int16)
+		self._ring_pos = 0
+		self._ring_count = 0
+		self._pending = np.zeros(0, dtype=np.int16)
+		self._speech_run = 0
+		self._silence_run = 0
+		self._last_speech = 0      # frame index just after the last speech frame
+		self.started = False
+		self.done = False
+
+	@property
+	def captured_frames(self) -> int:
+		"""Number of captured frames (including pre-roll) so far."""
+		return self._frames
+
+	def feed(self, chunk: np.ndarray) -> bool:
+		if self.done:
+			return True
+		chunk = np.reshape(chunk, -1)
+		if len(self._pending):
+			chunk = np.concatenate((self._pending, chunk))
+		rms, zcr = frame_features(chunk, self.frame_len)
+		n = len(rms)
+		self._pending = chunk[n * self.frame_len:].copy()
+		if n == 0:
+			return False
+		speech = self.detector.classify(rms, zcr)
+		frames = chunk[:n * self.frame_len].reshape(n, self.frame_len)
+		for i in range(n):
+			if not self.started:
+				self._speech_run = self._speech_run + 1 if speech[i] else 0
+				self._push_ring(frames[i])
+				if self._speech_run >= self.onset_frames:
+					self._start()
+				continue
+			self._append(frames[i])
+			if speech[i]:
+				self._silence_run = 0
+				self._last_speech = self._frames
+			else:
+				self._silence_run += 1
+			if self._silence_run >= self.trailing_frames or self._frames >= self._max_frames:
+				self.done = True
+				return True
+		return False
+
+	def audio(self) -> np.ndarray:
+		"""The captured utterance with trailing silence trimmed (a view, not a copy)."""
+		if not self.started:
+			return self._buf[:0]
+		end = min(self._frames, self._last_speech + self.keep_frames)
+		return self._buf[:end * self.frame_len]
+
+	def _append(self, frame: np.ndarray):
+		if self._frames >= self._max_frames:
+			return
+		start = self._frames * self.frame_len
+		self._buf[start:start + self.frame_len] = frame
+		self._frames += 1
+
+	def _push_ring(self, frame: np.ndarray):
+		self._ring[self._ring_pos] = frame
+		self._ring_pos = (self._ring_pos + 1) % len(self._ring)
+		self._ring_count = min(self._ring_count + 1, len(self._ring))
+
+	def _start(self):
+		# Copy the pre-roll and onset frames, oldest first, to the head of the capture buffer.
+		order = (np.arange(self._ring_count) + self._ring_pos - self._ring_count) % len(self._ring)
+		self._buf[:self._ring_count * self.frame_len] = self._ring[order].reshape(-1)
+		self._frames = self._ring_count
+		self._last_speech = self._frames
+		self.started = True
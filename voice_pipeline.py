@@ -0,0 +1,397 @@
+"""
+Stage-based voice loop for Nova.
+
+Capture, speech-to-text, reasoning, speech output and memory persistence each
+run on their own worker thread, joined by bounded queues. Nova can start
+listening for the next utterance while the previous reply is still being
+spoken, and a new utterance (barge-in) cancels the reply that is playing.
+Without echo cancellation the microphone also hears the reply itself, so an
+utterance captured during playback whose transcript mostly repeats the reply
+is dropped as an echo instead of interrupting it.
+
+Each turn carries a metrics trace (turn["trace"]) that is activated on every
+stage thread while it works on the turn, so spans recorded by the backends
+end up in the trace of the turn they belong to.
+"""
+
+import itertools
+import queue
+import re
+import threading
+import time
+from typing import Iterator
+import metrics
+
+STAGES = ("capture", "stt", "plugins", "first_sentence", "reasoning", "first_audio", "tts", "memory", "turn")
+
+
+class StageStats:
+    """
+    Thread-safe latency counters per pipeline stage (count, last, mean, max).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, stage: str, seconds: float):
+        ms = seconds * 1000.0
+        with self._lock:
+            s = self._stats.setdefault(stage, {"count": 0, "total_ms": 0.0, "last_ms": 0.0, "max_ms": 0.0})
+            s["count"] += 1
+            s["total_ms"] += ms
+            s["last_ms"] = ms
+            s["max_ms"] = max(s["max_ms"], ms)
+
+    def snapshot(self) -> dict:
+        """Return {stage: {count, last_ms, mean_ms, max_ms}} for every recorded stage."""
+        with self._lock:
+            return {
+                stage: {
+                    "count": s["count"],
+                    "last_ms": round(s["last_ms"], 1),
+                    "mean_ms": round(s["total_ms"] / s["count"], 1),
+                    "max_ms": round(s["max_ms"], 1),
+                }
+                for stage, s in self._stats.items()
+            }
+
+
+def format_timings(timings: dict) -> str:
+    """Render a turn's stage timings (seconds) as a compact one-line summary."""
+    return ", ".join(f"{stage}={timings[stage] * 1000:.0f}ms" for stage in STAGES if stage in timings)
+
+
+def _words(text: str) -> list:
+    return re.findall(r"[\w']+", text.lower())
+
+
+def is_echo(transcript: str, reply: str, overlap: float = 0.6) -> bool:
+    """True if at least `overlap` of the transcript's words occur in the reply."""
+    heard = _words(transcript)
+    if not heard:
+        return False
+    spoken = set(_words(reply))
+    return sum(1 for w in heard if w in spoken) >= overlap * len(heard)
+
+
+def _drain(q: "queue.Queue", done) -> Iterator:
+    """Yield items from a per-turn sentence queue until the `done` marker."""
+    while True:
+        item = q.get()
+        if item is done:
+            return
+        yield item
+
+
+class VoicePipeline:
+    """
+    Runs Nova's turn loop as concurrent stages.
+
+    Every stage is a callable injected by the caller, so the pipeline has no
+    hard dependency on audio hardware or backend services:
+      capture() -> audio or None
+      transcribe(audio) -> str
+      plugins(transcript) -> dict
+      reason(transcript, plugin_results) -> Iterator[str] of sentences
+      speak(sentences, cancel, on_play) -> None
+      persist(transcript, response) -> None
+      set_state(state) -> None            (optional, e.g. LED feedback)
+      before_capture(pipeline) -> None    (optional, e.g. reminder checks)
+    """
+
+    _DONE = object()
+
+    def __init__(self, capture, transcribe, plugins, reason, speak, persist, set_state=None, before_capture=None,
+                 queue_size: int = 2, barge_in: bool = False, idle_delay: float = 0.0, stats: StageStats = None,
+                 echo_overlap: float = 0.6):
+        self.capture = capture
+        self.transcribe = transcribe
+        self.plugins = plugins
+        self.reason = reason
+        self.speak = speak
+        self.persist = persist
+        self.set_state = set_state
+        self.before_capture = before_capture
+        self.barge_in = barge_in
+        self.idle_delay = idle_delay
+        self.echo_overlap = echo_overlap
+        self.stats = stats or StageStats()
+        self.stopped = threading.Event()
+        self._stt_q = queue.Queue(maxsize=queue_size)
+        self._reason_q = queue.Queue(maxsize=queue_size)
+        self._speak_q = queue.Queue(maxsize=queue_size)
+        self._persist_q = queue.Queue(maxsize=max(queue_size, 8))
+        self._ids = itertools.count(1)
+        self._speaking_lock = threading.Lock()
+        self._speaking = None
+        # (turn, perf_counter time) of the last reply that finished playing
+        self._last_spoken = (None, 0.0)
+        self._quiet = threading.Event()
+        self._quiet.set()
+        self._threads = []
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def start(self):
+        loops = [
+            ("capture", self._capture_loop),
+            ("stt", lambda: self._worker(self._stt_q, self._handle_stt)),
+            ("reasoning", lambda: self._worker(self._reason_q, self._handle_reasoning)),
+            ("tts", lambda: self._worker(self._speak_q, self._handle_speak)),
+            ("memory", lambda: self._worker(self._persist_q, self._handle_persist)),
+        ]
+        for name, target in loops:
+            t = threading.Thread(target=target, name=f"nova-{name}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self, timeout: float = 2.0):
+        self.stopped.set()
+        self.cancel_speech()
+        for t in self._threads:
+            t.join(timeout)
+
+    def run_forever(self):
+        self.start()
+        try:
+            while not self.stopped.wait(1.0):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    # -- public helpers ------------------------------------------------------
+
+    def announce(self, text: str):
+        """Queue a fixed phrase (e.g. a reminder) for playback; it is not saved to memory."""
+        turn = self._new_turn()
+        turn["persist"] = False
+        turn["reply"].append(text)
+        turn["sentences"].put(text)
+        turn["sentences"].put(self._DONE)
+        self._put(self._speak_q, turn)
+
+    @property
+    def speaking(self) -> bool:
+        """True while a reply is queued or playing."""
+        return not self._quiet.is_set()
+
+    def cancel_speech(self):
+        """Stop the reply that is currently playing (barge-in)."""
+        with self._speaking_lock:
+            if self._speaking is not None:
+                self._speaking["cancel"].set()
+
+    # -- internals -----------------------------------------------------------
+
+    def _new_turn(self, trace=None) -> dict:
+        return {
+            "id": next(self._ids),
+            "audio": None,
+            "transcript": "",
+            "plugin_results": {},
+            "sentences": queue.Queue(),
+            "reply": [],
+            "cancel": threading.Event(),
+            "persist": True,
+            "timings": {},
+            "captured_at": time.perf_counter(),
+            "heard_during": [],
+            "trace": trace,
+        }
+
+    def _state(self, state: str):
+        if self.set_state is None:
+            return
+        try:
+            self.set_state(state)
+        except Exception as e:
+            print(f"LED {state} state error:", e)
+
+    def _put(self, q: "queue.Queue", item) -> bool:
+        while not self.stopped.is_set():
+            try:
+                q.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _timed(self, turn: dict, stage: str, started: float):
+        elapsed = time.perf_counter() - started
+        turn["timings"][stage] = elapsed
+        self.stats.record(stage, elapsed)
+        metrics.record_span(stage, started, elapsed, turn.get("trace"))
+
+    def _finish(self, turn: dict, outcome: str):
+        metrics.finish_trace(turn.get("trace"), outcome=outcome, transcript=turn["transcript"][:80])
+
+    def _worker(self, inbox: "queue.Queue", handler):
+        while not self.stopped.is_set():
+            try:
+                turn = inbox.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            try:
+                with metrics.activate(turn.get("trace")):
+                    handler(turn)
+            except Exception as e:
+                print(f"Pipeline stage error ({threading.current_thread().name}):", e)
+
+    def _capture_loop(self):
+        while not self.stopped.is_set():
+            if self.before_capture is not None:
+                try:
+                    self.before_capture(self)
+                except Exception as e:
+                    print("Pipeline pre-capture hook error:", e)
+            if not self.barge_in:
+                # Without barge-in, wait for the reply to finish so Nova does not hear itself.
+                while not self._quiet.wait(0.2):
+                    if self.stopped.is_set():
+                        return
+            if self.idle_delay:
+                if self.stopped.wait(self.idle_delay):
+                    return
+            if self._quiet.is_set():
+                self._state("listening")
+            trace = metrics.start_trace("turn")
+            started = time.perf_counter()
+            with self._speaking_lock:
+                playing_before = self._speaking
+            try:
+                with metrics.activate(trace):
+                    audio = self.capture()
+            except Exception as e:
+                print("Audio input error:", e)
+                print("Nova could not record audio. Please check your microphone.")
+                if self.stopped.wait(1.0):
+                    return
+                continue
+            if audio is None:
+                continue
+            turn = self._new_turn(trace)
+            turn["audio"] = audio
+            turn["heard_during"] = self._replies_since(started, playing_before)
+            self._timed(turn, "capture", started)
+            self._put(self._stt_q, turn)
+
+    def _replies_since(self, started: float, playing_before) -> list:
+        """Replies that were playing at some point since `started` (candidate echoes)."""
+        with self._speaking_lock:
+            candidates = [playing_before, self._speaking]
+            last, finished_at = self._last_spoken
+            if finished_at >= started:
+                candidates.append(last)
+        replies = []
+        for t in candidates:
+            if t is not None and all(t is not r for r in replies):
+                replies.append(t)
+        return [t["reply"] for t in replies]
+
+    def _handle_stt(self, turn: dict):
+        if self._quiet.is_set():
+            self._state("thinking")
+        started = time.perf_counter()
+        try:
+            turn["transcript"] = self.transcribe(turn["audio"]) or ""
+        except Exception as e:
+            print("Speech-to-text error:", e)
+            print("Nova could not transcribe audio.")
+            self._finish(turn, "stt_error")
+            return
+        finally:
+            self._timed(turn, "stt", started)
+        turn["audio"] = None
+        print("Transcript:", turn["transcript"])
+        if not turn["transcript"]:
+            print("No transcript to process.")
+            self._finish(turn, "empty")
+            return
+        heard = " ".join(" ".join(reply) for reply in turn["heard_during"])
+        if heard and is_echo(turn["transcript"], heard, self.echo_overlap):
+            print("Ignoring Nova's own reply picked up by the microphone.")
+            self._finish(turn, "echo")
+            return
+        if self.barge_in:
+            self.cancel_speech()
+        self._put(self._reason_q, turn)
+
+    def _handle_reasoning(self, turn: dict):
+        started = time.perf_counter()
+        turn["plugin_results"] = self.plugins(turn["transcript"]) or {}
+        self._timed(turn, "plugins", started)
+        for pname, presult in turn["plugin_results"].items():
+            print(f"Plugin [{pname}]: {presult}")
+        # Hand the turn to the TTS stage right away; sentences follow as they are generated.
+        self._put(self._speak_q, turn)
+        started = time.perf_counter()
+        try:
+            for sentence in self.reason(turn["transcript"], turn["plugin_results"]):
+                if not turn["reply"]:
+                    self._timed(turn, "first_sentence", started)
+                turn["reply"].append(sentence)
+                turn["sentences"].put(sentence)
+                if turn["cancel"].is_set() or self.stopped.is_set():
+                    break
+        except Exception as e:
+            print("Reasoning engine error:", e)
+            print("Nova could not process your request.")
+        finally:
+            self._timed(turn, "reasoning", started)
+            turn["sentences"].put(self._DONE)
+
+    def _handle_speak(self, turn: dict):
+        with self._speaking_lock:
+            self._speaking = turn
+        self._quiet.clear()
+        started = time.perf_counter()
+        first = []
+
+        def on_play(_sentence):
+            if not first:
+                first.append(True)
+                self._state("speaking")
+                turn["timings"]["first_audio"] = time.perf_counter() - turn["captured_at"]
+                self.stats.record("first_audio", turn["timings"]["first_audio"])
+                metrics.record_span("first_audio", turn["captured_at"], turn["timings"]["first_audio"], turn.get("trace"))
+
+        try:
+            self.speak(_drain(turn["sentences"], self._DONE), turn["cancel"], on_play)
+        except Exception as e:
+            print("TTS error:", e)
+            print("Nova could not speak the response.")
+        finally:
+            with self._speaking_lock:
+                self._speaking = None
+                self._last_spoken = (turn, time.perf_counter())
+            self._timed(turn, "tts", started)
+            if self._speak_q.empty():
+                self._quiet.set()
+                self._state("idle")
+        if turn["persist"]:
+            self._put(self._persist_q, turn)
+        else:
+            self._finish(turn, "cancelled" if turn["cancel"].is_set() else "ok")
+
+    def _handle_persist(self, turn: dict):
+        response = "\n".join(turn["reply"])
+        if not response:
+            print("No response from reasoning engine.")
+            self._finish(turn, "no_response")
+            return
+        print("Nova Response:", response)
+        started = time.perf_counter()
+        try:
+            self.persist(turn["transcript"], response)
+        except Exception as e:
+            print("Memory save error:", e)
+        self._timed(turn, "memory", started)
+        turn["timings"]["turn"] = time.perf_counter() - turn["captured_at"]
+        self.stats.record("turn", turn["timings"]["turn"])
+        metrics.record_span("turn", turn["captured_at"], turn["timings"]["turn"], turn.get("trace"))
+        self._finish(turn, "cancelled" if turn["cancel"].is_set() else "ok")
+        print(f"Turn {turn['id']} latency: {format_timings(turn['timings'])}")